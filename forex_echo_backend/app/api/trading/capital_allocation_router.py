@@ -93,7 +93,7 @@ def allocate_mt5_strategy_capital():
         account_info = None
         if service.mt5_manager.is_terminal_connected():
             try:
-                import MetaTrader5 as mt5
+                from app.services.mt5_gateway import mt5
                 account_info = mt5.account_info()
             except:
                 pass
@@ -208,7 +208,7 @@ def get_mt5_portfolio_summary():
             return jsonify({'error': 'MT5 not connected'}), 400
         
         try:
-            import MetaTrader5 as mt5
+            from app.services.mt5_gateway import mt5
             account_info = mt5.account_info()
             if not account_info:
                 return jsonify({'error': 'Cannot get MT5 account info'}), 400
@@ -1,8 +1,6 @@
 from flask import Blueprint, request, jsonify
-try:
-    import MetaTrader5 as mt5
-except ImportError:
-    mt5 = None
+from app.services.mt5_gateway import mt5
+from app.services.symbol_info_cache import symbol_info_cache
 from app.core.trading_engine import TradingEngine
 from app.core.session_manager import SessionManager
 from app.core.strategy_manager import strategy_manager
@@ -25,10 +23,13 @@ def get_available_pairs():
         if mt5 is None:
             return jsonify({'success': False, 'error': 'MetaTrader5 not installed'}), 500
         
-        if not mt5.initialize():
-            return jsonify({'success': False, 'error': 'MT5 initialization failed'}), 500
-        
-        symbols = mt5.symbols_get()
+        symbols = symbol_info_cache.all_symbols()
+        if not symbols:
+            # Nothing cached yet - make sure the terminal is up, then load
+            if not mt5.initialize():
+                return jsonify({'success': False, 'error': 'MT5 initialization failed'}), 500
+            symbol_info_cache.load()
+            symbols = symbol_info_cache.all_symbols()
         if not symbols:
             return jsonify({'success': False, 'error': 'No symbols available'}), 500
         
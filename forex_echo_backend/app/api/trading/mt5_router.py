@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
 from app.services.mt5_connection_manager import mt5_connection_manager
+from app.services.mt5_gateway import mt5_gateway
+from app.services.order_execution_service import order_execution_service, ANY_MAGIC
+from app.services.order_queue import order_queue
 from app.core.session_manager import SessionManager
 from app.utilities.forex_logger import forex_logger
 
@@ -95,7 +98,8 @@ def get_mt5_status():
 def get_symbols():
     """Get available trading symbols"""
     try:
-        symbols = mt5_connection_manager.get_available_symbols()
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
+        symbols = mt5_connection_manager.get_available_symbols(refresh=refresh)
         
         return jsonify({
             'success': True,
@@ -133,4 +137,60 @@ def get_account_info():
         
     except Exception as e:
         logger.error(f"Error getting account info: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@mt5_bp.route('/gateway-stats', methods=['GET'])
+def get_gateway_stats():
+    """Get MT5 gateway queue depth and per-call latency"""
+    try:
+        return jsonify({
+            'success': True,
+            'gateway': mt5_gateway.get_stats()
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error getting MT5 gateway stats: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@mt5_bp.route('/flatten', methods=['POST'])
+def flatten_positions():
+    """Close all positions (optionally only some symbols / one magic number) in one batch"""
+    try:
+        data = request.get_json(silent=True) or {}
+        symbols = data.get('symbols')
+        magic = data.get('magic', ANY_MAGIC)
+        if not isinstance(magic, int) or isinstance(magic, bool):
+            return jsonify({'success': False, 'error': 'magic must be an integer'}), 400
+        if symbols is not None and (not isinstance(symbols, list)
+                                    or not all(isinstance(symbol, str) for symbol in symbols)):
+            return jsonify({'success': False, 'error': 'symbols must be a list of symbol names'}), 400
+        
+        report = order_execution_service.flatten(symbols, magic, data.get('comment'))
+        if report is None:
+            return jsonify({
+                'success': False,
+                'error': 'MT5 not connected or trading not allowed'
+            }), 400
+        
+        return jsonify({
+            'success': not report['failed'],
+            'report': report
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error flattening positions: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@mt5_bp.route('/execution-stats', methods=['GET'])
+def get_execution_stats():
+    """Get order counts and signal-to-order_send latency per symbol"""
+    try:
+        return jsonify({
+            'success': True,
+            'execution': order_execution_service.get_stats(),
+            'order_queue': order_queue.get_stats()
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error getting execution stats: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
@@ -1,10 +1,7 @@
 """MT5 Trades and Positions Router"""
 
 from flask import Blueprint, jsonify
-try:
-    import MetaTrader5 as mt5
-except ImportError:
-    mt5 = None
+from app.services.mt5_gateway import mt5
 
 mt5_trades_bp = Blueprint('mt5_trades', __name__, url_prefix='/api/mt5')
 
@@ -58,7 +58,9 @@ def list_implemented_strategies():
                     'symbol1': {'default': 'EURUSD', 'description': 'First symbol in pair'},
                     'symbol2': {'default': 'GBPUSD', 'description': 'Second symbol in pair'},
                     'rsi_period': {'default': 14, 'description': 'RSI calculation period'},
+                    'rsi_mode': {'default': 'sma', 'description': 'RSI averaging: sma or wilder'},
                     'atr_period': {'default': 5, 'description': 'ATR calculation period'},
+                    'atr_mode': {'default': 'sma', 'description': 'ATR averaging: sma or wilder'},
                     'rsi_overbought': {'default': 75.0, 'description': 'RSI overbought threshold'},
                     'rsi_oversold': {'default': 25.0, 'description': 'RSI oversold threshold'},
                     'profit_target_usd': {'default': 500.0, 'description': 'Profit target in USD'},
@@ -280,12 +282,24 @@ def get_strategy_details(strategy_name):
                         'range': '5-50',
                         'description': 'RSI calculation period'
                     },
+                    'rsi_mode': {
+                        'default': 'sma',
+                        'type': 'string',
+                        'options': ['sma', 'wilder'],
+                        'description': 'RSI gain/loss averaging method'
+                    },
                     'atr_period': {
                         'default': 5,
                         'type': 'integer',
                         'range': '3-20',
                         'description': 'ATR calculation period for hedge ratio'
                     },
+                    'atr_mode': {
+                        'default': 'sma',
+                        'type': 'string',
+                        'options': ['sma', 'wilder'],
+                        'description': 'ATR true range averaging method'
+                    },
                     'rsi_overbought': {
                         'default': 75.0,
                         'type': 'float',
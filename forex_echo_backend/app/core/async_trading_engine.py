@@ -0,0 +1,117 @@
+"""asyncio execution mode for TradingEngine tasks"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict
+from app.services.market_data_feed import market_data_feed
+from app.utilities.forex_logger import forex_logger
+
+logger = forex_logger.get_logger(__name__)
+
+class AsyncTaskRunner:
+    """Runs every trading task as a coroutine on one event loop thread.
+    
+    Tasks hold no thread while waiting for bars: the feed wakes them through
+    an asyncio.Event. Blocking work (strategy construction, MT5 and database
+    calls made while processing a bar) goes to a small bounded executor, so
+    the number of tasks is no longer limited by the number of threads.
+    """
+    
+    def __init__(self, engine, io_workers: int = 8):
+        self.engine = engine
+        self.io_workers = io_workers
+        self.executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="engine-io")
+        self.running_tasks = 0
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self._run_loop, name="engine-event-loop", daemon=True)
+        self.loop_thread.start()
+        logger.info(f"AsyncTaskRunner started with {io_workers} I/O workers")
+    
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def submit(self, task_id: str) -> Future:
+        """Schedule a task coroutine; cancelling the returned future stops the task"""
+        return asyncio.run_coroutine_threadsafe(self._run_task(task_id), self.loop)
+    
+    async def _blocking(self, func, *args):
+        return await self.loop.run_in_executor(self.executor, func, *args)
+    
+    async def _run_task(self, task_id: str):
+        engine = self.engine
+        strategy = None
+        subscription = None
+        task = None
+        try:
+            task = engine.active_tasks.get(task_id)
+            if not task:
+                return
+            
+            self.running_tasks += 1
+            logger.info(f"Running trading task (async): {task_id}")
+            
+            strategy, last_closed_timestamp = await self._blocking(engine._create_task_strategy, task)
+            if strategy is None:
+                return
+            
+            bar_ready = asyncio.Event()
+            subscription = market_data_feed.subscribe(
+                task.pair, task.timeframe,
+                intrabar=bool(task.config.get('intrabar_mode', False)),
+                on_publish=lambda: self.loop.call_soon_threadsafe(bar_ready.set)
+            )
+            
+            while True:
+                current_task = engine.active_tasks.get(task_id)
+                if current_task is not task or not current_task.is_active:
+                    break
+                
+                try:
+                    # Timeout only guards against missed wake-ups; stop_trading_task cancels directly
+                    await asyncio.wait_for(bar_ready.wait(), timeout=30)
+                except asyncio.TimeoutError:
+                    continue
+                bar_ready.clear()
+                
+                event = subscription.get(timeout=0)
+                while event is not None:
+                    try:
+                        last_closed_timestamp = await self._blocking(
+                            engine._handle_bar_event, task_id, task, strategy, event, last_closed_timestamp)
+                    except Exception as e:
+                        logger.error(f"Error in trading task {task_id}: {e}")
+                        await asyncio.sleep(30)
+                    event = subscription.get(timeout=0)
+        
+        except asyncio.CancelledError:
+            logger.info(f"Trading task {task_id} cancelled")
+        except Exception as e:
+            logger.error(f"Fatal error in trading task {task_id}: {e}")
+        finally:
+            if task:
+                self.running_tasks -= 1
+            engine._cleanup_task(task_id, task, strategy, subscription)
+    
+    def get_stats(self) -> Dict:
+        """Coroutine and executor counts for monitoring"""
+        return {
+            'mode': 'async',
+            'tasks': self.running_tasks,
+            'io_workers': self.io_workers
+        }
+    
+    def shutdown(self):
+        """Cancel all task coroutines, then stop the loop and executor"""
+        async def _cancel_all():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(_cancel_all(), self.loop).result(timeout=30)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.loop_thread.join(timeout=5)
+        self.executor.shutdown(wait=True)
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""Bar-close scheduling for timeframe-driven polling"""
+
+import math
+
+class BarCloseSchedule:
+    """Wake-up times for one timeframe: shortly after each bar closes.
+    
+    MT5 bars are aligned to the broker's server clock, which usually runs
+    two or three hours ahead of UTC; `offset` (server time minus UTC, in
+    seconds) shifts the bar boundaries accordingly. If the closed bar is not
+    available yet (market closed, terminal disconnected, or a wrong offset),
+    retries back off exponentially up to `max_retry_interval` and never past
+    the next bar close.
+    """
+    
+    def __init__(self, bar_seconds: int, grace: float = 1.0,
+                 retry_interval: float = 2.0, max_retry_interval: float = 900.0, offset: float = 0.0):
+        if bar_seconds <= 0:
+            raise ValueError(f"Bar length must be positive, got {bar_seconds}")
+        self.bar_seconds = bar_seconds
+        self.grace = grace
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.offset = offset
+        self._retry = retry_interval
+    
+    def next_close(self, now: float) -> float:
+        """Epoch time at which the bar open at `now` closes."""
+        server_now = now + self.offset
+        return (math.floor(server_now / self.bar_seconds) + 1) * self.bar_seconds - self.offset
+    
+    def next_wake(self, now: float, got_closed_bar: bool) -> float:
+        """When to look for the next closed bar, given whether the last look found a new one."""
+        next_close = self.next_close(now) + self.grace
+        if got_closed_bar:
+            self._retry = self.retry_interval
+            return next_close
+        
+        wait = min(self._retry, self.max_retry_interval, self.bar_seconds)
+        self._retry = min(self._retry * 2, self.max_retry_interval)
+        return min(now + wait, next_close)
\ No newline at end of file
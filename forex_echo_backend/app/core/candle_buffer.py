@@ -0,0 +1,87 @@
+"""Fixed-capacity columnar OHLCV store for strategy candle history"""
+
+import numpy as np
+from typing import Dict, Optional
+
+CANDLE_FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+_INT_FIELDS = ('timestamp', 'volume')
+
+class CandleBuffer:
+    """Ring buffer of the last `capacity` candles kept in float64/int64 columns.
+    
+    Every value is written twice, at `i` and `i + capacity`, so the most
+    recent `n` candles are always a contiguous slice and window() returns
+    NumPy views instead of copies. Appending never allocates.
+    """
+    
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"Capacity must be >= 1, got {capacity}")
+        self.capacity = capacity
+        self._columns: Dict[str, np.ndarray] = {
+            field: np.zeros(2 * capacity, dtype=np.int64 if field in _INT_FIELDS else np.float64)
+            for field in CANDLE_FIELDS
+        }
+        self.clear()
+    
+    def clear(self):
+        self._head = 0
+        self._count = 0
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def append(self, timestamp: int, open: float, high: float, low: float, close: float, volume: int = 0):
+        """Add one candle, overwriting the oldest once the buffer is full."""
+        head, mirror = self._head, self._head + self.capacity
+        for field, value in zip(CANDLE_FIELDS, (timestamp, open, high, low, close, volume)):
+            column = self._columns[field]
+            column[head] = value
+            column[mirror] = value
+        self._head = (head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+    
+    def append_candle(self, candle):
+        """Add a MarketData-like object (anything with OHLC/timestamp attributes)."""
+        self.append(candle.timestamp, candle.open, candle.high, candle.low, candle.close,
+                    getattr(candle, 'volume', 0) or 0)
+    
+    def extend(self, columns: Dict[str, np.ndarray]):
+        """Bulk-load columns (as returned by rates_to_columns); only the last `capacity` rows are kept."""
+        size = min(len(columns['close']), self.capacity)
+        if size == 0:
+            return
+        positions = (self._head + np.arange(size)) % self.capacity
+        for field in CANDLE_FIELDS:
+            tail = columns[field][-size:] if field in columns else 0
+            column = self._columns[field]
+            column[positions] = tail
+            column[positions + self.capacity] = tail
+        self._head = (self._head + size) % self.capacity
+        self._count = min(self._count + size, self.capacity)
+    
+    def column(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        """Zero-copy view of the last `n` values (default: all stored) of one column."""
+        n = self._count if n is None else min(n, self._count)
+        end = self._head + self.capacity
+        return self._columns[field][end - n:end]
+    
+    def window(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy views of the last `n` candles for every column."""
+        return {field: self.column(field, n) for field in CANDLE_FIELDS}
+    
+    def last(self, field: str = 'close'):
+        """Most recent value of a column as a Python scalar."""
+        if self._count == 0:
+            raise IndexError("CandleBuffer is empty")
+        return self._columns[field][self._head + self.capacity - 1].item()
+    
+    def __getitem__(self, index: int) -> dict:
+        """Candle at `index` (negative counts from the newest) as a plain dict."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("CandleBuffer index out of range")
+        position = self._head + self.capacity - self._count + index
+        return {field: self._columns[field][position].item() for field in CANDLE_FIELDS}
\ No newline at end of file
@@ -0,0 +1,362 @@
+"""Multi-process sharded execution mode for TradingEngine tasks"""
+
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from app.models.trading_models import TradingTask, BarEvent, BAR_CLOSED, BAR_UPDATE
+from app.services.account_balance_sync import account_balance_sync
+from app.services.market_data_feed import market_data_feed
+from app.utilities.forex_logger import forex_logger
+
+logger = forex_logger.get_logger(__name__)
+
+def shard_for(pair: str, timeframe: str, shards: int) -> int:
+    """Stable shard index for a pair/timeframe - identical across processes and restarts"""
+    return zlib.crc32(f"{pair}|{timeframe}".encode()) % shards
+
+def _shard_worker(shard_index: int, conn):
+    """Worker process: owns the strategies of one shard and never talks to MT5.
+    
+    Messages in:  ("start", run_id, task, strategy_class, history)
+                  ("stop", run_id)
+                  ("bar", (pair, timeframe), event, equity)
+                  ("account", balance, equity, login)
+                  ("shutdown",)
+    Messages out: ("signal", run_id, candle, signal)
+                  ("stopped", run_id)
+    """
+    from app.core.task_runtime import build_task_strategy, evaluate_bar_event
+    from app.services.mt5_gateway import mt5_gateway
+    
+    # Terminal data comes from the parent; a call that slips through must not open a second connection
+    mt5_gateway.detach()
+    
+    runs: Dict[int, list] = {}  # run_id -> [task, strategy, last closed bar timestamp]
+    runs_by_key: Dict[Tuple[str, str], set] = {}
+    
+    def release(run_id: int):
+        task, strategy, _ = runs.pop(run_id)
+        runs_by_key.get((task.pair, task.timeframe), set()).discard(run_id)
+        if hasattr(strategy, 'release_indicators'):
+            strategy.release_indicators()
+    
+    logger.info(f"Shard worker {shard_index} started (pid {os.getpid()})")
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        
+        command = message[0]
+        if command == "bar":
+            _, key, event, equity = message
+            for run_id in list(runs_by_key.get(key, ())):
+                entry = runs[run_id]
+                task, strategy, last_closed_timestamp = entry
+                if event.kind == BAR_UPDATE and not task.config.get('intrabar_mode', False):
+                    continue
+                try:
+                    signal, entry[2] = evaluate_bar_event(task, strategy, event, last_closed_timestamp,
+                                                          lambda: equity)
+                    if signal:
+                        conn.send(("signal", run_id, event.bar, signal))
+                except Exception as e:
+                    logger.error(f"Error in trading task {task.task_id}: {e}")
+        
+        elif command == "start":
+            _, run_id, task, strategy_class, history = message
+            strategy, last_closed_timestamp = build_task_strategy(strategy_class, task, history)
+            if strategy is None:
+                conn.send(("stopped", run_id))
+                continue
+            runs[run_id] = [task, strategy, last_closed_timestamp]
+            runs_by_key.setdefault((task.pair, task.timeframe), set()).add(run_id)
+        
+        elif command == "account":
+            _, balance, equity, login = message
+            account_balance_sync.publish(balance, equity, login)
+        
+        elif command == "stop":
+            _, run_id = message
+            if run_id in runs:
+                release(run_id)
+            conn.send(("stopped", run_id))
+        
+        elif command == "shutdown":
+            for run_id in list(runs):
+                release(run_id)
+            break
+    
+    logger.info(f"Shard worker {shard_index} stopped")
+
+class ShardedTaskRunner:
+    """Spreads trading tasks over N worker processes by hash of (pair, timeframe).
+    
+    The parent keeps MT5 to itself: it owns the market data feed, forwards
+    each bar once per shard over a pipe, supplies equity, account balance
+    and warm-up history, and executes the signals workers send back. Every
+    task of a pair/timeframe lands in the same worker, so indicators are
+    still shared between them. Capital and risk state is shared through the
+    database: each worker's risk ledger writes behind and revalidates its
+    rows, so resets and allocation changes made by the API reach it. A
+    worker that dies ends its tasks instead of leaving them hanging.
+    """
+    
+    def __init__(self, engine, shards: int = 0, feed=None):
+        self.engine = engine
+        self.feed = feed if feed is not None else market_data_feed
+        self.shards = shards or os.cpu_count() or 1
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: List = []
+        self.connections: List = []
+        self.send_locks: List[threading.Lock] = []
+        self.signal_executors: List[ThreadPoolExecutor] = []
+        self.runs: Dict[int, dict] = {}  # run_id -> task, shard, future
+        self.current_runs: Dict[str, int] = {}  # task_id -> run_id
+        self.key_feeds: Dict[Tuple[str, str], dict] = {}  # (pair, timeframe) -> subscription, run_ids
+        self.pending_keys: queue.Queue = queue.Queue()
+        self.run_ids = itertools.count(1)
+        self.runner_lock = threading.RLock()
+        self.started = False
+        self.stopping = False
+        self.listening = False
+        self.dead_shards = set()
+    
+    def _ensure_started(self):
+        # Workers start lazily so importing the engine never spawns processes
+        if self.started:
+            return
+        for shard_index in range(self.shards):
+            parent_conn, child_conn = self.context.Pipe()
+            process = self.context.Process(target=_shard_worker, args=(shard_index, child_conn),
+                                           name=f"engine-shard-{shard_index}", daemon=True)
+            process.start()
+            self.processes.append(process)
+            self.connections.append(parent_conn)
+            self.send_locks.append(threading.Lock())
+            # One executor per shard keeps each task's signals in order
+            self.signal_executors.append(ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"shard-{shard_index}-orders"))
+            threading.Thread(target=self._read_loop, args=(shard_index,),
+                             name=f"engine-shard-{shard_index}-reader", daemon=True).start()
+        threading.Thread(target=self._forward_loop, name="engine-shard-forwarder", daemon=True).start()
+        
+        # Workers have no terminal - they get the account from the parent's balance sync
+        account_balance_sync.get_balance()
+        self._forward_account(account_balance_sync.balance, account_balance_sync.equity,
+                              account_balance_sync.login)
+        if not self.listening:
+            account_balance_sync.add_listener(self._forward_account)
+            self.listening = True
+        self.started = True
+        self.stopping = False
+        logger.info(f"ShardedTaskRunner started {self.shards} worker processes")
+    
+    def _send(self, shard: int, message: tuple):
+        with self.send_locks[shard]:
+            self.connections[shard].send(message)
+    
+    def _forward_account(self, balance, equity, login):
+        with self.runner_lock:
+            shards = [shard for shard in range(len(self.connections)) if shard not in self.dead_shards]
+        for shard in shards:
+            try:
+                self._send(shard, ("account", balance, equity, login))
+            except Exception as e:
+                logger.error(f"Failed to forward account state to shard {shard}: {e}")
+    
+    def submit(self, task: TradingTask) -> Future:
+        """Start a task in its shard; the returned future resolves when the task has stopped"""
+        strategy_class = self.engine.strategies_registry.get(task.strategy_name)
+        history = self.engine._fetch_warm_up_history(task)
+        future = Future()
+        key = (task.pair, task.timeframe)
+        intrabar = bool(task.config.get('intrabar_mode', False))
+        
+        started = False
+        with self.runner_lock:
+            self._ensure_started()
+            shard = shard_for(task.pair, task.timeframe, self.shards)
+            run_id = next(self.run_ids)
+            self.runs[run_id] = {'task': task, 'shard': shard, 'future': future}
+            self.current_runs[task.task_id] = run_id
+            if strategy_class is None:
+                logger.error(f"Strategy {task.strategy_name} not found")
+            elif shard in self.dead_shards:
+                logger.error(f"Shard {shard} is down, cannot start {task.task_id}")
+            else:
+                try:
+                    self._send(shard, ("start", run_id, task, strategy_class, history))
+                    self._attach_feed(key, shard, run_id, intrabar)
+                    started = True
+                except Exception as e:
+                    logger.error(f"Failed to start {task.task_id} in shard {shard}: {e}")
+        
+        if not started:
+            self._finish_run(run_id)
+        return future
+    
+    def stop(self, task_id: str):
+        """Ask the owning worker to stop a task; cleanup happens when it confirms"""
+        with self.runner_lock:
+            run_id = self.current_runs.get(task_id)
+            run = self.runs.get(run_id)
+            if run is None:
+                return
+            try:
+                if run['shard'] in self.dead_shards:
+                    raise EOFError(f"shard {run['shard']} is down")
+                self._send(run['shard'], ("stop", run_id))
+                return
+            except Exception as e:
+                logger.error(f"Could not reach the worker of {task_id}: {e}")
+        # No worker left to confirm - clean up here
+        self._finish_run(run_id)
+    
+    def _attach_feed(self, key: Tuple[str, str], shard: int, run_id: int, intrabar: bool):
+        feed = self.key_feeds.get(key)
+        if feed is not None and (feed['intrabar'] or not intrabar):
+            feed['run_ids'].add(run_id)
+            # New task in an existing feed starts from the last closed bar, as thread-mode tasks do
+            last_closed = self.feed.last_closed.get(key)
+            if last_closed is not None:
+                self._send(shard, ("bar", key, BarEvent(BAR_CLOSED, last_closed), self.engine._get_current_equity()))
+            return
+        
+        # First task of this key, or the first one that needs intrabar updates:
+        # subscribe before closing any old subscription so the poller keeps running
+        run_ids = feed['run_ids'] if feed else set()
+        run_ids.add(run_id)
+        subscription = self.feed.subscribe(key[0], key[1], intrabar=intrabar,
+                                                  on_publish=lambda: self.pending_keys.put(key))
+        self.key_feeds[key] = {'subscription': subscription, 'shard': shard, 'run_ids': run_ids,
+                               'intrabar': intrabar}
+        if feed:
+            feed['subscription'].close()
+        self.pending_keys.put(key)
+    
+    def _forward_loop(self):
+        """Drain feed subscriptions and forward each event once to the owning shard"""
+        while True:
+            key = self.pending_keys.get()
+            if key is None:
+                break
+            with self.runner_lock:
+                feed = self.key_feeds.get(key)
+            if feed is None:
+                continue
+            
+            equity = None
+            event = feed['subscription'].get(timeout=0)
+            while event is not None:
+                try:
+                    if equity is None and event.kind == BAR_CLOSED:
+                        equity = self.engine._get_current_equity()
+                    self._send(feed['shard'], ("bar", key, event, equity))
+                except Exception as e:
+                    logger.error(f"Failed to forward bar for {key}: {e}")
+                event = feed['subscription'].get(timeout=0)
+    
+    def _read_loop(self, shard: int):
+        """Handle signals and stop confirmations coming back from one worker"""
+        conn = self.connections[shard]
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                self._shard_died(shard)
+                break
+            
+            if message[0] == "signal":
+                _, run_id, candle, signal = message
+                run = self.runs.get(run_id)
+                if run is not None:
+                    task = run['task']
+                    self.signal_executors[shard].submit(self._dispatch_signal, task, candle, signal)
+            elif message[0] == "stopped":
+                self._finish_run(message[1])
+    
+    def _shard_died(self, shard: int):
+        """End every run of a worker whose pipe closed, so their futures resolve"""
+        with self.runner_lock:
+            if self.stopping:
+                return  # Shut down on purpose; shutdown() finishes the runs
+            self.dead_shards.add(shard)
+            run_ids = [run_id for run_id, run in self.runs.items() if run['shard'] == shard]
+            logger.critical(f"Shard worker {shard} exited unexpectedly - stopping its {len(run_ids)} task(s)")
+        for run_id in run_ids:
+            self._finish_run(run_id)
+    
+    def _dispatch_signal(self, task: TradingTask, candle, signal):
+        try:
+            self.engine._dispatch_signal(task.task_id, task, candle, signal)
+        except Exception as e:
+            logger.error(f"Error executing signal for {task.task_id}: {e}")
+    
+    def _finish_run(self, run_id: int):
+        # Engine cleanup takes the engine's task lock, so it runs outside runner_lock
+        with self.runner_lock:
+            run = self.runs.pop(run_id, None)
+            if run is None:
+                return
+            task = run['task']
+            if self.current_runs.get(task.task_id) == run_id:
+                del self.current_runs[task.task_id]
+            
+            key = (task.pair, task.timeframe)
+            feed = self.key_feeds.get(key)
+            if feed is not None:
+                feed['run_ids'].discard(run_id)
+                if not feed['run_ids']:
+                    feed['subscription'].close()
+                    del self.key_feeds[key]
+        
+        self.engine._cleanup_task(task.task_id, task, None, None)
+        run['future'].set_result(None)
+    
+    def get_stats(self) -> Dict:
+        """Shard layout for monitoring"""
+        with self.runner_lock:
+            per_shard = [0] * self.shards
+            for run in self.runs.values():
+                per_shard[run['shard']] += 1
+            return {
+                'mode': 'sharded',
+                'shards': self.shards,
+                'tasks_per_shard': per_shard,
+                'feeds': len(self.key_feeds)
+            }
+    
+    def shutdown(self):
+        """Stop every worker process and release feed subscriptions"""
+        with self.runner_lock:
+            if not self.started:
+                return
+            self.stopping = True
+            for shard in range(self.shards):
+                try:
+                    self._send(shard, ("shutdown",))
+                except Exception:
+                    pass
+            for feed in self.key_feeds.values():
+                feed['subscription'].close()
+            self.key_feeds.clear()
+            self.pending_keys.put(None)
+        
+        for process in self.processes:
+            process.join(timeout=10)
+        for executor in self.signal_executors:
+            executor.shutdown(wait=True)
+        for run_id in list(self.runs):
+            self._finish_run(run_id)
+        with self.runner_lock:
+            self.processes.clear()
+            self.connections.clear()
+            self.send_locks.clear()
+            self.signal_executors.clear()
+            self.dead_shards.clear()
+            self.started = False
\ No newline at end of file
@@ -12,6 +12,11 @@ class BaseStrategy(ABC):
         self.timeframe = timeframe
         self.name = self.__class__.__name__
     
+    @classmethod
+    def warm_up_symbols(cls, config: dict, pair: str) -> List[str]:
+        """Symbols whose history warm_up() needs; the task pair unless the strategy trades more"""
+        return [pair]
+    
     @abstractmethod
     def process_tick(self, candle, current_equity: float = 0):
         """Process market tick and return signal if any"""
@@ -26,6 +31,10 @@ class BaseStrategy(ABC):
     def get_status(self) -> dict:
         """Get current strategy status"""
         pass
+    
+    def on_bar_update(self, candle):
+        """Intrabar update of the forming bar (intrabar mode only); may return a signal"""
+        return None
 
 class StrategyManager:
     """Manages all available trading strategies"""
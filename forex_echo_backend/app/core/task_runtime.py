@@ -0,0 +1,69 @@
+"""Strategy-side steps of a trading task, shared by every engine mode.
+
+Nothing here talks to MT5, so the same code runs inside engine threads,
+the asyncio runner and shard worker processes; callers pass in whatever
+terminal data (warm-up history, equity) a step needs.
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+from app.models.trading_models import TradingTask, TradeSignal, BarEvent, BAR_UPDATE
+from app.utilities.forex_logger import forex_logger
+
+logger = forex_logger.get_logger(__name__)
+
+def build_task_strategy(strategy_class, task: TradingTask,
+                        history: Optional[Dict] = None) -> Tuple[Optional[object], int]:
+    """Instantiate a task's strategy and warm it up from closed historical rates.
+    
+    `history` maps symbols to rates: the task pair, plus any other symbol
+    the strategy listed in warm_up_symbols().
+    
+    Returns (strategy, last closed bar timestamp already seen), or (None, 0) on failure.
+    """
+    # Initialize strategy with proper error handling
+    try:
+        # Initialize strategy (most strategies only need config and timeframe)
+        strategy = strategy_class(task.config, task.pair, task.timeframe)
+        logger.info(f"Strategy {task.strategy_name} initialized successfully")
+    except Exception as e:
+        logger.error(f"Strategy initialization failed: {e}")
+        return None, 0
+    
+    last_closed_timestamp = 0
+    if not history or not hasattr(strategy, 'warm_up'):
+        return strategy, last_closed_timestamp
+    
+    for symbol, rates in history.items():
+        if rates is None or len(rates) == 0:
+            continue
+        try:
+            if symbol == task.pair:
+                strategy.warm_up(rates)
+                last_closed_timestamp = int(rates['time'][-1])
+            else:
+                strategy.warm_up(rates, symbol=symbol)
+        except Exception as e:
+            logger.warning(f"Strategy warm-up of {symbol} failed for {task.task_id}: {e}")
+    
+    return strategy, last_closed_timestamp
+
+def evaluate_bar_event(task: TradingTask, strategy, event: BarEvent, last_closed_timestamp: int,
+                       get_equity: Callable[[], float]) -> Tuple[Optional[TradeSignal], int]:
+    """Feed one bar event to the strategy.
+    
+    Returns (signal or None, updated last closed bar timestamp). Equity is
+    only fetched when a closed bar is actually processed. Forming-bar updates
+    only arrive for tasks with `intrabar_mode` set and go to on_bar_update().
+    """
+    candle = event.bar
+    if candle.timestamp <= last_closed_timestamp:
+        return None, last_closed_timestamp  # Already processed (replayed or stale bar)
+    
+    if event.kind == BAR_UPDATE:
+        # Forming bar changed - never fed into the closed-bar windows
+        signal = strategy.on_bar_update(candle) if hasattr(strategy, 'on_bar_update') else None
+        return signal, last_closed_timestamp
+    
+    signal = strategy.process_tick(candle, get_equity())
+    logger.debug(f"[{task.pair} {task.timeframe}] Price: {candle.close:.2f} | Time: {candle.timestamp}")
+    return signal, candle.timestamp
\ No newline at end of file
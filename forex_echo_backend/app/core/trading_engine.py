@@ -1,13 +1,21 @@
 import threading
 import time
 from typing import Dict, List, Optional, Callable
-from app.models.trading_models import TradingTask as TradingTaskModel, MarketData
+from app.models.trading_models import TradingTask as TradingTaskModel, OrderIntent, OrderEvent, ORDER_FILLED, ORDER_FAILED
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from app.utilities.forex_logger import forex_logger
 from app.core.session_manager import SessionManager
-from app.utilities.connection_decorator import require_mt5_connection, handle_mt5_errors
-import MetaTrader5 as mt5
+from app.services.market_data_feed import market_data_feed
+from app.core.async_trading_engine import AsyncTaskRunner
+from app.core.sharded_trading_engine import ShardedTaskRunner
+from app.core.task_runtime import build_task_strategy, evaluate_bar_event
+from config import TRADING_ENGINE_MODE, TRADING_ENGINE_IO_WORKERS, TRADING_ENGINE_SHARDS
+from app.services.mt5_gateway import mt5
+from app.services.mt5_connection_state import mt5_connection_state
+from app.services.order_queue import order_queue
+from app.services.risk_ledger import risk_ledger
+from app.services.account_balance_sync import account_balance_sync
 
 logger = forex_logger.get_logger(__name__)
 
@@ -38,8 +46,11 @@ class TradingEngine:
             self.task_futures: Dict[str, object] = {}
             self.task_lock = threading.RLock()
             self.strategies_registry = {}
+            self.engine_mode = TRADING_ENGINE_MODE
+            self.async_runner = AsyncTaskRunner(self, TRADING_ENGINE_IO_WORKERS) if self.engine_mode == "async" else None
+            self.shard_runner = ShardedTaskRunner(self, TRADING_ENGINE_SHARDS) if self.engine_mode == "sharded" else None
             self.initialized = True
-            logger.info("TradingEngine initialized")
+            logger.info(f"TradingEngine initialized ({self.engine_mode} mode)")
     
     def register_strategy(self, name: str, strategy_class):
         """Register strategy class"""
@@ -64,6 +75,7 @@ class TradingEngine:
                 self.active_tasks[task_id] = updated_task
                 # Remove from futures
                 if task_id in self.task_futures:
+                    self._cancel_task_future(task_id)
                     del self.task_futures[task_id]
             
             task = TradingTask(
@@ -77,7 +89,12 @@ class TradingEngine:
             )
             
             self.active_tasks[task_id] = task
-            future = self.thread_pool.submit(self._run_trading_task, task_id)
+            if self.async_runner:
+                future = self.async_runner.submit(task_id)
+            elif self.shard_runner:
+                future = self.shard_runner.submit(task)
+            else:
+                future = self.thread_pool.submit(self._run_trading_task, task_id)
             self.task_futures[task_id] = future
             
             # Save to database
@@ -102,6 +119,7 @@ class TradingEngine:
             # Update task to inactive (Pydantic models are immutable)
             updated_task = task.model_copy(update={'is_active': False})
             self.active_tasks[task_id] = updated_task
+            self._cancel_task_future(task_id)
             
             # Deactivate in database
             try:
@@ -113,6 +131,14 @@ class TradingEngine:
             logger.info(f"Stopped trading task: {task_id}")
             return True
     
+    def _cancel_task_future(self, task_id: str):
+        """Async and sharded tasks are stopped directly; thread tasks notice is_active on their next wake-up"""
+        future = self.task_futures.get(task_id)
+        if self.async_runner and future is not None:
+            future.cancel()
+        elif self.shard_runner:
+            self.shard_runner.stop(task_id)
+    
     def get_active_tasks_for_session(self, session_id: str) -> List[TradingTask]:
         """Get all active tasks for session"""
         with self.task_lock:
@@ -121,6 +147,9 @@ class TradingEngine:
     
     def _run_trading_task(self, task_id: str):
         """Main trading task loop"""
+        strategy = None
+        subscription = None
+        task = None
         try:
             task = self.active_tasks.get(task_id)
             if not task:
@@ -128,84 +157,29 @@ class TradingEngine:
             
             logger.info(f"Running trading task: {task_id}")
             
-            # Initialize strategy with database session
-            strategy_class = self.strategies_registry.get(task.strategy_name)
-            if not strategy_class:
-                logger.error(f"Strategy {task.strategy_name} not found")
+            strategy, last_closed_timestamp = self._create_task_strategy(task)
+            if strategy is None:
                 return
             
-            # Initialize strategy with proper error handling
-            try:
-                # Initialize strategy (most strategies only need config and timeframe)
-                strategy = strategy_class(task.config, task.pair, task.timeframe)
-                logger.info(f"Strategy {task.strategy_name} initialized successfully")
-            except Exception as e:
-                logger.error(f"Strategy initialization failed: {e}")
-                return
+            # Bars come from the shared feed - one MT5 poller per pair/timeframe for all tasks.
+            # Strategies are evaluated once per closed bar unless the task opts into intrabar updates.
+            subscription = market_data_feed.subscribe(task.pair, task.timeframe,
+                                                      intrabar=bool(task.config.get('intrabar_mode', False)))
             
             while task.is_active:
                 try:
-                    # Check if task is still active (refresh from active_tasks)
+                    # Check if task is still active (refresh from active_tasks) and not replaced by a restart
                     current_task = self.active_tasks.get(task_id)
-                    if not current_task or not current_task.is_active:
+                    if current_task is not task or not current_task.is_active:
                         break
                     
-                    # Get market data - skip if MT5 not connected
-                    if not mt5.terminal_info():
-                        time.sleep(10)
+                    # Wait briefly so a stopped task exits promptly
+                    event = subscription.get(timeout=1.0)
+                    if event is None:
                         continue
                     
-                    # Get latest candle
-                    rates = mt5.copy_rates_from_pos(task.pair, self._get_mt5_timeframe(task.timeframe), 0, 1)
-                    if rates is None or len(rates) == 0:
-                        time.sleep(1)
-                        continue
-                    
-                    # Process with strategy
-                    candle = MarketData(
-                        timestamp=rates[0]['time'],
-                        open=rates[0]['open'],
-                        high=rates[0]['high'],
-                        low=rates[0]['low'],
-                        close=rates[0]['close'],
-                        volume=rates[0]['tick_volume']
-                    )
-                    
-                    # Get current account equity for drawdown calculation
-                    account_info = mt5.account_info()
-                    current_equity = account_info.equity if account_info else 100000  # Default fallback
-                    
-                    signal = strategy.process_tick(candle, current_equity)
-                    
-                    # Console logging for candles and signals
-                    print(f"[{task.pair} {task.timeframe}] Price: {candle.close:.2f} | Time: {candle.timestamp}")
-                    
-                    if signal:
-                        print(f"🚨 SIGNAL: {task.pair} {task.timeframe} - {signal.action} {signal.lot_size} lots")
-                        print(f"   Reason: {signal.reason}")
-                        print(f"   Price: {candle.close:.2f}")
-                        logger.info(f"Signal generated for {task_id}: {signal.action}")
-                        
-                        # Execute trade via MT5
-                        result = self._execute_signal(task.pair, signal, task_id)
-                        
-                        # Log trade execution
-                        candle_dict = {
-                            'open': candle.open,
-                            'high': candle.high, 
-                            'low': candle.low,
-                            'close': candle.close,
-                            'timestamp': candle.timestamp
-                        }
-                        signal_dict = {
-                            'action': signal.action,
-                            'lot_size': signal.lot_size,
-                            'reason': signal.reason,
-                            'take_profit': signal.take_profit
-                        }
-                        forex_logger.log_trade(task.pair, task.timeframe, signal_dict, candle_dict, result)
-                    
-                    time.sleep(10)  # 10 second interval when MT5 connected
+                    last_closed_timestamp = self._handle_bar_event(task_id, task, strategy, event,
+                                                                   last_closed_timestamp)
                     
                 except Exception as e:
                     logger.error(f"Error in trading task {task_id}: {e}")
@@ -214,15 +188,153 @@ class TradingEngine:
         except Exception as e:
             logger.error(f"Fatal error in trading task {task_id}: {e}")
         finally:
-            # Cleanup task resources
-            pass
+            self._cleanup_task(task_id, task, strategy, subscription)
+    
+    def _create_task_strategy(self, task: TradingTask):
+        """Instantiate and optionally warm up the task's strategy.
+        
+        Returns (strategy, last closed bar timestamp already seen), or (None, 0) on failure.
+        """
+        strategy_class = self.strategies_registry.get(task.strategy_name)
+        if not strategy_class:
+            logger.error(f"Strategy {task.strategy_name} not found")
+            return None, 0
+        return build_task_strategy(strategy_class, task, self._fetch_warm_up_history(task))
+    
+    def _fetch_warm_up_history(self, task: TradingTask):
+        """Closed historical bars per symbol to preload indicators with, if the task config asks for them"""
+        warm_up_bars = int(task.config.get('warm_up_bars', 0) or 0)
+        if warm_up_bars <= 0:
+            return None
+        strategy_class = self.strategies_registry.get(task.strategy_name)
+        warm_up_symbols = getattr(strategy_class, 'warm_up_symbols', None)
+        symbols = warm_up_symbols(task.config, task.pair) if warm_up_symbols else [task.pair]
+        
+        history = {}
+        for symbol in symbols:
+            try:
+                history[symbol] = mt5.copy_rates_from_pos(symbol, self._get_mt5_timeframe(task.timeframe), 1,
+                                                          warm_up_bars)
+            except Exception as e:
+                logger.warning(f"Could not load warm-up history of {symbol} for {task.task_id}: {e}")
+        return history
+    
+    def _get_current_equity(self) -> float:
+        """Current account equity for drawdown calculation"""
+        account_info = mt5_connection_state.account_info()
+        return account_info.equity if account_info else 100000  # Default fallback
+    
+    def _handle_bar_event(self, task_id: str, task: TradingTask, strategy, event,
+                          last_closed_timestamp: int) -> int:
+        """Run the strategy on one feed event; returns the updated last closed bar timestamp"""
+        signal, last_closed_timestamp = evaluate_bar_event(task, strategy, event, last_closed_timestamp,
+                                                           self._get_current_equity)
+        if signal:
+            self._dispatch_signal(task_id, task, event.bar, signal)
+        return last_closed_timestamp
+    
+    def _dispatch_signal(self, task_id: str, task: TradingTask, candle, signal):
+        """Queue a strategy signal for execution on MT5; the result is logged when it arrives"""
+        received_at = time.perf_counter()
+        print(f"🚨 SIGNAL: {task.pair} {task.timeframe} - {signal.action} {signal.lot_size} lots")
+        print(f"   Reason: {signal.reason}")
+        print(f"   Price: {candle.close:.2f}")
+        logger.info(f"Signal generated for {task_id}: {signal.action}")
+        
+        # Execute trade via the order queue - the task never waits for the broker.
+        # One intent per task, bar and action, so a replayed bar cannot double an order.
+        intent = OrderIntent(
+            key=f"{task_id}:{candle.timestamp}:{signal.action}",
+            symbol=task.pair,
+            action=signal.action,
+            lot_size=signal.lot_size,
+            take_profit=signal.take_profit,
+            received_at=received_at
+        )
+        return order_queue.submit(intent, on_result=lambda event: self._on_order_result(task_id, task, candle,
+                                                                                         signal, event))
+    
+    def _on_order_result(self, task_id: str, task: TradingTask, candle, signal, event: OrderEvent):
+        """Report and log the outcome of a queued signal"""
+        pair = task.pair
+        result = None
+        if event.status == ORDER_FILLED and signal.action == "CLOSE_ALL":
+            print(f"\n🔴 CLOSING ALL POSITIONS:")
+            print(f"   Pair: {pair}")
+            print(f"   Reason: {signal.reason}")
+            print(f"   Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            result = {'action': 'CLOSE_ALL', 'status': 'executed'}
+        elif event.status == ORDER_FILLED:
+            result = {
+                'ticket': event.ticket,
+                'action': signal.action,
+                'volume': event.filled_volume,
+                'price': event.price,
+                'take_profit': signal.take_profit,
+                'retcode': event.retcode
+            }
+            print(f"\n🎯 TRADE EXECUTED:")
+            print(f"   Pair: {pair}")
+            print(f"   Action: {signal.action}")
+            print(f"   Lot Size: {signal.lot_size}")
+            print(f"   Price: {result.get('price', 'N/A')}")
+            print(f"   MT5 Ticket: {result.get('ticket', 'N/A')}")
+            print(f"   Take Profit: {signal.take_profit}")
+            print(f"   Reason: {signal.reason}")
+            print(f"   Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            logger.info(f"Order executed: {result}")
+        else:
+            print(f"\n❌ TRADE FAILED: {pair} {signal.action} {signal.lot_size} lots")
+            print(f"   Reason: Order execution {event.status} ({event.message or event.retcode})")
+            print(f"   Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             
-            with self.task_lock:
-                if task_id in self.active_tasks:
-                    del self.active_tasks[task_id]
-                if task_id in self.task_futures:
-                    del self.task_futures[task_id]
-            logger.info(f"Trading task {task_id} completed")
+            # Log failed trade (will be blocked if MT5 not connected)
+            if event.status == ORDER_FAILED:
+                try:
+                    persistence = get_persistence_service()
+                    log_result = persistence.log_trade(
+                        session_id=task.session_id,
+                        task_id=task_id,
+                        pair=pair,
+                        action=signal.action,
+                        lot_size=signal.lot_size,
+                        reason=f"Error: {event.message}",
+                        status='FAILED'
+                    )
+                    if log_result is None:
+                        logger.warning("Failed trade logging blocked - MT5 not connected")
+                except Exception as log_error:
+                    logger.error(f"Error logging failed trade: {log_error}")
+        
+        # Log trade execution
+        candle_dict = {
+            'open': candle.open,
+            'high': candle.high, 
+            'low': candle.low,
+            'close': candle.close,
+            'timestamp': candle.timestamp
+        }
+        signal_dict = {
+            'action': signal.action,
+            'lot_size': signal.lot_size,
+            'reason': signal.reason,
+            'take_profit': signal.take_profit
+        }
+        forex_logger.log_trade(task.pair, task.timeframe, signal_dict, candle_dict, result)
+    
+    def _cleanup_task(self, task_id: str, task: Optional[TradingTask], strategy, subscription):
+        """Release feed/indicator resources and forget the task (unless it was restarted meanwhile)"""
+        if subscription is not None:
+            subscription.close()
+        if strategy is not None and hasattr(strategy, 'release_indicators'):
+            strategy.release_indicators()
+        
+        with self.task_lock:
+            current_task = self.active_tasks.get(task_id)
+            if current_task is not None and (current_task is task or not current_task.is_active):
+                del self.active_tasks[task_id]
+                self.task_futures.pop(task_id, None)
+        logger.info(f"Trading task {task_id} completed")
     
     def _get_mt5_timeframe(self, timeframe: str):
         """Convert timeframe string to MT5 constant"""
@@ -236,113 +348,6 @@ class TradingEngine:
         }
         return timeframe_map.get(timeframe, mt5.TIMEFRAME_M15)
     
-    @require_mt5_connection
-    @handle_mt5_errors
-    def _execute_signal(self, pair: str, signal, task_id: str = None) -> Optional[dict]:
-        """Execute trading signal"""
-        # Connection decorator will block execution if MT5 is not connected
-        # This code will not run when MT5 is disabled
-        try:
-            from app.services.mt5_trader import MT5Trader
-            trader = MT5Trader()
-            trader.symbol = pair
-            
-            if signal.action in ["BUY", "SELL"]:
-                result = trader.place_order(signal.action, signal.lot_size, signal.take_profit)
-                if result:
-                    print(f"\n🎯 TRADE EXECUTED:")
-                    print(f"   Pair: {pair}")
-                    print(f"   Action: {signal.action}")
-                    print(f"   Lot Size: {signal.lot_size}")
-                    print(f"   Price: {result.get('price', 'N/A')}")
-                    print(f"   MT5 Ticket: {result.get('ticket', 'N/A')}")
-                    print(f"   Take Profit: {signal.take_profit}")
-                    print(f"   Reason: {signal.reason}")
-                    print(f"   Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    logger.info(f"Order executed: {result}")
-                    return result
-                else:
-                    print(f"\n❌ TRADE FAILED: {pair} {signal.action} {signal.lot_size} lots")
-                    print(f"   Reason: Order execution failed")
-                    print(f"   Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    return None
-                    
-                    # Log trade to database (will be blocked if MT5 not connected)
-                    if task_id:
-                        try:
-                            task = self.active_tasks.get(task_id)
-                            if task:
-                                persistence = get_persistence_service()
-                                log_result = persistence.log_trade(
-                                    session_id=task.session_id,
-                                    task_id=task_id,
-                                    pair=pair,
-                                    action=signal.action,
-                                    lot_size=signal.lot_size,
-                                    price=result.get('price'),
-                                    take_profit=signal.take_profit,
-                                    reason=signal.reason,
-                                    mt5_ticket=str(result.get('ticket')),
-                                    status='EXECUTED'
-                                )
-                                if log_result is None:
-                                    logger.warning("Trade logging blocked - MT5 not connected")
-                        except Exception as e:
-                            logger.error(f"Error logging trade: {e}")
-                            
-            elif signal.action == "CLOSE_ALL":
-                print(f"\n🔴 CLOSING ALL POSITIONS:")
-                print(f"   Pair: {pair}")
-                print(f"   Reason: {signal.reason}")
-                print(f"   Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                trader.close_all_positions()
-                return {'action': 'CLOSE_ALL', 'status': 'executed'}
-                
-                # Log close all action (will be blocked if MT5 not connected)
-                if task_id:
-                    try:
-                        task = self.active_tasks.get(task_id)
-                        if task:
-                            persistence = get_persistence_service()
-                            log_result = persistence.log_trade(
-                                session_id=task.session_id,
-                                task_id=task_id,
-                                pair=pair,
-                                action="CLOSE_ALL",
-                                lot_size=0,
-                                reason=signal.reason,
-                                status='EXECUTED'
-                            )
-                            if log_result is None:
-                                logger.warning("Close all logging blocked - MT5 not connected")
-                    except Exception as e:
-                        logger.error(f"Error logging close all: {e}")
-                
-        except Exception as e:
-            logger.error(f"Error executing signal: {e}")
-            
-            # Log failed trade (will be blocked if MT5 not connected)
-            if task_id:
-                try:
-                    task = self.active_tasks.get(task_id)
-                    if task:
-                        persistence = get_persistence_service()
-                        log_result = persistence.log_trade(
-                            session_id=task.session_id,
-                            task_id=task_id,
-                            pair=pair,
-                            action=signal.action,
-                            lot_size=signal.lot_size,
-                            reason=f"Error: {str(e)}",
-                            status='FAILED'
-                        )
-                        if log_result is None:
-                            logger.warning("Failed trade logging blocked - MT5 not connected")
-                except Exception as log_error:
-                    logger.error(f"Error logging failed trade: {log_error}")
-            
-            return None
-    
     def shutdown(self):
         """Shutdown trading engine"""
         logger.info("Shutting down trading engine")
@@ -351,5 +356,12 @@ class TradingEngine:
                 updated_task = task.model_copy(update={'is_active': False})
                 self.active_tasks[task_id] = updated_task
         
+        if self.async_runner:
+            self.async_runner.shutdown()
+        if self.shard_runner:
+            self.shard_runner.shutdown()
         self.thread_pool.shutdown(wait=True)
+        order_queue.shutdown()
+        risk_ledger.shutdown()
+        account_balance_sync.shutdown()
         logger.info("Trading engine shutdown complete")
\ No newline at end of file
@@ -1,15 +1,24 @@
-from typing import List
+import numpy as np
+from typing import List, Optional
 from app.models.trading_models import MarketData
+from app.indicators.rolling import RollingSum
+from app.indicators.batch import atr_series
 from app.utilities.forex_logger import forex_logger
 
 logger = forex_logger.get_logger(__name__)
 
+ATR_MODES = ("sma", "wilder")
+
+def true_range(high: float, low: float, prev_close: float) -> float:
+    """True Range from raw high/low and the previous close."""
+    tr1 = high - low
+    tr2 = abs(high - prev_close)
+    tr3 = abs(low - prev_close)
+    return max(tr1, tr2, tr3)
+
 def calculate_true_range(current: MarketData, previous: MarketData) -> float:
     """Calculate True Range for a single candle."""
-    tr1 = current.high - current.low
-    tr2 = abs(current.high - previous.close)
-    tr3 = abs(current.low - previous.close)
-    return max(tr1, tr2, tr3)
+    return true_range(current.high, current.low, previous.close)
 
 def calculate_atr(candles: List[MarketData], period: int) -> float:
     """Calculate Average True Range."""
@@ -28,4 +37,66 @@ def calculate_atr(candles: List[MarketData], period: int) -> float:
     
     atr = sum(true_ranges[-period:]) / period
     logger.debug(f"ATR calculated: {atr:.4f} over {period} periods")
-    return atr
\ No newline at end of file
+    return atr
+
+class StreamingATR:
+    """Incremental ATR fed with high/low/close floats, O(1) per bar.
+    
+    mode="sma" matches calculate_atr (mean of the last `period` true ranges);
+    mode="wilder" seeds with that mean and then applies Wilder smoothing.
+    The value stays at 0.0 until period + 1 candles have been seen.
+    """
+    
+    def __init__(self, period: int, mode: str = "sma"):
+        if mode not in ATR_MODES:
+            raise ValueError(f"Unsupported ATR mode: {mode}")
+        self.period = period
+        self.mode = mode
+        self.reset()
+    
+    def reset(self):
+        self._true_ranges = RollingSum(self.period)
+        self._prev_close: Optional[float] = None
+        self._seeded = False
+        self.value = 0.0
+    
+    def update(self, high: float, low: float, close: float) -> float:
+        """Feed the next candle and return the current ATR."""
+        if self._prev_close is None:
+            self._prev_close = close
+            return self.value
+        
+        tr = true_range(high, low, self._prev_close)
+        self._prev_close = close
+        
+        if self.mode == "wilder" and self._seeded:
+            self.value = (self.value * (self.period - 1) + tr) / self.period
+            return self.value
+        
+        self._true_ranges.push(tr)
+        if self._true_ranges.full:
+            self._seeded = True
+            self.value = self._true_ranges.total / self.period
+        return self.value
+    
+    def warm_up(self, highs, lows, closes) -> float:
+        """Rebuild state from high/low/close histories (lists or NumPy arrays) in one call."""
+        self.reset()
+        highs = np.asarray(highs, dtype=np.float64)
+        lows = np.asarray(lows, dtype=np.float64)
+        closes = np.asarray(closes, dtype=np.float64)
+        if self.mode == "sma" or closes.size < self.period + 1:
+            # SMA ATR only depends on the last period + 1 candles
+            tail = -(self.period + 1)
+            for high, low, close in zip(highs[tail:].tolist(), lows[tail:].tolist(), closes[tail:].tolist()):
+                self.update(high, low, close)
+            return self.value
+        
+        self.value = float(atr_series(highs, lows, closes, self.period, self.mode)[-1])
+        self._prev_close = float(closes[-1])
+        self._seeded = True
+        return self.value
+    
+    @property
+    def ready(self) -> bool:
+        return self._seeded
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""Vectorized indicator series over NumPy arrays for warm-up and analysis.
+
+Inputs can be taken straight from the structured array returned by
+mt5.copy_rates_from_pos via rates_to_columns. Every series has one value per
+input bar and NaN where the indicator is still warming up; the last value
+matches the corresponding streaming indicator fed with the same bars.
+"""
+
+import numpy as np
+from typing import Dict, List, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+from app.indicators.ema import ema_series, exponential_smoothing
+from app.models.trading_models import Bar
+
+def rates_to_columns(rates) -> Dict[str, np.ndarray]:
+    """Split an MT5 rates structured array into float64/int64 column arrays."""
+    if rates is None or len(rates) == 0:
+        empty_f = np.empty(0, dtype=np.float64)
+        return {
+            'timestamp': np.empty(0, dtype=np.int64),
+            'open': empty_f, 'high': empty_f, 'low': empty_f, 'close': empty_f,
+            'volume': np.empty(0, dtype=np.int64)
+        }
+    
+    names = rates.dtype.names or ()
+    volume_field = 'tick_volume' if 'tick_volume' in names else 'volume'
+    return {
+        'timestamp': np.asarray(rates['time'], dtype=np.int64),
+        'open': np.asarray(rates['open'], dtype=np.float64),
+        'high': np.asarray(rates['high'], dtype=np.float64),
+        'low': np.asarray(rates['low'], dtype=np.float64),
+        'close': np.asarray(rates['close'], dtype=np.float64),
+        'volume': np.asarray(rates[volume_field], dtype=np.int64) if volume_field in names
+                  else np.zeros(len(rates), dtype=np.int64)
+    }
+
+def rates_to_bars(rates) -> List[Bar]:
+    """Convert MT5 rates into Bar tuples of plain Python scalars (no per-bar validation)."""
+    columns = rates_to_columns(rates)
+    rows = zip(*(columns[field].tolist() for field in Bar._fields))
+    return [Bar._make(row) for row in rows]
+
+def _rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    return sliding_window_view(values, period).sum(axis=1) / period
+
+def _averages(values: np.ndarray, period: int, mode: str) -> np.ndarray:
+    """SMA of each `period` window, or Wilder smoothing seeded with the first SMA."""
+    if mode == "sma":
+        return _rolling_mean(values, period)
+    if mode == "wilder":
+        seed = values[:period].sum() / period
+        out = np.empty(values.size - period + 1)
+        out[0] = seed
+        out[1:] = exponential_smoothing(values[period:], 1.0 / period, seed)
+        return out
+    raise ValueError(f"Unsupported averaging mode: {mode}")
+
+def gain_loss_averages(closes: np.ndarray, period: int, mode: str = "sma") -> Tuple[np.ndarray, np.ndarray]:
+    """Average gain/loss per bar from the second close onwards (period + 1 closes needed)."""
+    deltas = np.diff(np.asarray(closes, dtype=np.float64))
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+    return _averages(gains, period, mode), _averages(losses, period, mode)
+
+def rsi_series(closes: np.ndarray, period: int = 14, mode: str = "sma") -> np.ndarray:
+    """RSI per bar (same definition as calculate_rsi / StreamingRSI)."""
+    closes = np.asarray(closes, dtype=np.float64)
+    out = np.full(closes.shape, np.nan)
+    if closes.size < period + 1:
+        return out
+    
+    avg_gain, avg_loss = gain_loss_averages(closes, period, mode)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+    if mode == "sma":
+        # A window without any losses is exactly 100, as in calculate_rsi
+        losses = np.maximum(-np.diff(closes), 0.0)
+        no_losses = sliding_window_view(losses, period).max(axis=1) == 0
+    else:
+        no_losses = avg_loss == 0
+    out[period:] = np.where(no_losses, 100.0, rsi)
+    return out
+
+def true_range_series(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray) -> np.ndarray:
+    """True range per bar; the first bar has no previous close and is NaN."""
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    closes = np.asarray(closes, dtype=np.float64)
+    out = np.full(closes.shape, np.nan)
+    if closes.size < 2:
+        return out
+    
+    prev_close = closes[:-1]
+    out[1:] = np.maximum.reduce([
+        highs[1:] - lows[1:],
+        np.abs(highs[1:] - prev_close),
+        np.abs(lows[1:] - prev_close)
+    ])
+    return out
+
+def atr_series(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+               period: int = 14, mode: str = "sma") -> np.ndarray:
+    """ATR per bar (same definition as calculate_atr / StreamingATR)."""
+    true_ranges = true_range_series(highs, lows, closes)
+    out = np.full(true_ranges.shape, np.nan)
+    if true_ranges.size < period + 1:
+        return out
+    
+    out[period:] = _averages(true_ranges[1:], period, mode)
+    return out
+
+def zscore_series(closes: np.ndarray, period: int, ddof: int = 1) -> np.ndarray:
+    """Z-score of each close against its trailing `period` window (sample stdev by default)."""
+    closes = np.asarray(closes, dtype=np.float64)
+    out = np.full(closes.shape, np.nan)
+    if closes.size < period:
+        return out
+    if period <= ddof:
+        out[period - 1:] = 0.0
+        return out
+    
+    windows = sliding_window_view(closes, period)
+    mean = windows.mean(axis=1)
+    stdev = windows.std(axis=1, ddof=ddof)
+    flat = windows.max(axis=1) == windows.min(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zscore = (closes[period - 1:] - mean) / stdev
+    out[period - 1:] = np.where(flat | (stdev == 0), 0.0, zscore)
+    return out
\ No newline at end of file
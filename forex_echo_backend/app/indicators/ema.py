@@ -1,5 +1,123 @@
 """EMA technical indicator implementation."""
 
-def calculate_ema(prices: list, period: int) -> float:
-    """Calculate EMA indicator."""
-    pass
\ No newline at end of file
+import math
+import numpy as np
+from app.utilities.forex_logger import forex_logger
+
+logger = forex_logger.get_logger(__name__)
+
+EMA_MODES = ("ema", "smma")
+
+# Largest growth factor allowed inside one vectorized smoothing block
+_MAX_BLOCK_SCALE = 1e30
+
+def smoothing_alpha(period: int, mode: str = "ema") -> float:
+    """Smoothing factor: 2/(period+1) for EMA, 1/period for SMMA (Wilder/RMA)."""
+    if period < 1:
+        raise ValueError(f"Period must be >= 1, got {period}")
+    if mode == "ema":
+        return 2.0 / (period + 1)
+    if mode == "smma":
+        return 1.0 / period
+    raise ValueError(f"Unsupported EMA mode: {mode}")
+
+def calculate_ema(prices: list, period: int, mode: str = "ema") -> float:
+    """Calculate EMA (or SMMA) of the latest price, seeded with the SMA of the first `period` prices."""
+    if len(prices) < period:
+        logger.debug(f"Insufficient data for EMA: {len(prices)}/{period}")
+        return 0.0
+    
+    ema = StreamingEMA(period, mode)
+    for price in prices:
+        ema.update(price)
+    return ema.value
+
+class StreamingEMA:
+    """Incremental EMA/SMMA updated in O(1) per bar.
+    
+    Seeded with the SMA of the first `period` prices; the value stays at 0.0
+    until then. Produces the same values as ema_series.
+    """
+    
+    def __init__(self, period: int, mode: str = "ema"):
+        self.period = period
+        self.mode = mode
+        self.alpha = smoothing_alpha(period, mode)
+        self.reset()
+    
+    def reset(self):
+        self._seed_sum = 0.0
+        self._count = 0
+        self.value = 0.0
+    
+    def update(self, price: float) -> float:
+        """Feed the next close and return the current EMA."""
+        if self._count >= self.period:
+            self.value += self.alpha * (price - self.value)
+            return self.value
+        
+        self._count += 1
+        self._seed_sum += price
+        if self._count == self.period:
+            self.value = self._seed_sum / self.period
+        return self.value
+    
+    def warm_up(self, closes) -> float:
+        """Rebuild state from a close history (list or NumPy array) in one vectorized pass."""
+        self.reset()
+        closes = np.asarray(closes, dtype=np.float64)
+        if closes.size < self.period:
+            for price in closes.tolist():
+                self.update(price)
+            return self.value
+        
+        self.value = float(ema_series(closes, self.period, self.mode)[-1])
+        self._count = self.period
+        return self.value
+    
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.period
+
+def exponential_smoothing(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """Vectorized y[i] = y[i-1] + alpha * (values[i] - y[i-1]) starting from y[-1] = initial.
+    
+    Uses the closed form of the recursion over blocks sized so the
+    intermediate scale factors stay bounded, instead of a Python loop per bar.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty_like(values)
+    if values.size == 0:
+        return out
+    
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        out[:] = values
+        return out
+    if decay >= 1.0:
+        out[:] = initial
+        return out
+    
+    block = max(1, int(math.log(_MAX_BLOCK_SCALE) / -math.log(decay)))
+    level = initial
+    for start in range(0, values.size, block):
+        chunk = values[start:start + block]
+        steps = np.arange(1, chunk.size + 1, dtype=np.float64)
+        growth = decay ** -steps
+        accumulated = np.cumsum(chunk * growth) * alpha
+        out[start:start + chunk.size] = (level + accumulated) / growth
+        level = out[start + chunk.size - 1]
+    return out
+
+def ema_series(prices: np.ndarray, period: int, mode: str = "ema") -> np.ndarray:
+    """EMA/SMMA for every bar of a price array; NaN until `period` prices are available."""
+    alpha = smoothing_alpha(period, mode)
+    prices = np.asarray(prices, dtype=np.float64)
+    out = np.full(prices.shape, np.nan)
+    if prices.size < period:
+        return out
+    
+    seed = prices[:period].mean()
+    out[period - 1] = seed
+    out[period:] = exponential_smoothing(prices[period:], alpha, seed)
+    return out
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""Rolling window primitives shared by the streaming indicators."""
+
+from collections import deque
+from typing import List
+
+class RollingSum:
+    """Fixed-size window keeping a running sum with O(1) updates.
+    
+    The running sum is rebuilt from the window every `resync_interval` pushes
+    so floating point drift cannot accumulate over long sessions.
+    """
+    
+    def __init__(self, period: int, resync_interval: int = 1000):
+        if period < 1:
+            raise ValueError(f"Period must be >= 1, got {period}")
+        self.period = period
+        self.resync_interval = max(resync_interval, period)
+        self.reset()
+    
+    def reset(self):
+        self._values: List[float] = [0.0] * self.period
+        self._index = 0
+        self._count = 0
+        self._nonzero = 0
+        self._pushes = 0
+        self.total = 0.0
+    
+    def push(self, value: float) -> float:
+        """Add a value, dropping the oldest one once the window is full."""
+        if self._count == self.period:
+            oldest = self._values[self._index]
+            self.total -= oldest
+            if oldest != 0:
+                self._nonzero -= 1
+        else:
+            self._count += 1
+        
+        self._values[self._index] = value
+        self._index = (self._index + 1) % self.period
+        self.total += value
+        if value != 0:
+            self._nonzero += 1
+        
+        self._pushes += 1
+        if self._nonzero == 0:
+            self.total = 0.0
+        elif self._pushes % self.resync_interval == 0:
+            self.total = sum(self._values[:self._count])
+        return self.total
+    
+    @property
+    def full(self) -> bool:
+        return self._count == self.period
+    
+    @property
+    def count(self) -> int:
+        return self._count
+    
+    @property
+    def mean(self) -> float:
+        return self.total / self._count if self._count else 0.0
+
+class RollingExtrema:
+    """Rolling max/min over the last `period` values using monotonic deques.
+    
+    Each push is amortized O(1) regardless of the window size, so large
+    lookbacks cost the same per bar as small ones.
+    """
+    
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError(f"Period must be >= 1, got {period}")
+        self.period = period
+        self.reset()
+    
+    def reset(self):
+        self._max_deque = deque()  # (sequence, value), values decreasing
+        self._min_deque = deque()  # (sequence, value), values increasing
+        self._seq = 0
+    
+    def push(self, value: float):
+        """Add a value, expiring entries that fell out of the window."""
+        while self._max_deque and self._max_deque[-1][1] <= value:
+            self._max_deque.pop()
+        self._max_deque.append((self._seq, value))
+        
+        while self._min_deque and self._min_deque[-1][1] >= value:
+            self._min_deque.pop()
+        self._min_deque.append((self._seq, value))
+        
+        expired = self._seq - self.period
+        if self._max_deque[0][0] <= expired:
+            self._max_deque.popleft()
+        if self._min_deque[0][0] <= expired:
+            self._min_deque.popleft()
+        self._seq += 1
+    
+    def warm_up(self, values):
+        """Rebuild state from a history; only the last `period` values matter."""
+        self.reset()
+        for value in list(values)[-self.period:]:
+            self.push(float(value))
+    
+    @property
+    def max(self) -> float:
+        return self._max_deque[0][1] if self._max_deque else 0.0
+    
+    @property
+    def min(self) -> float:
+        return self._min_deque[0][1] if self._min_deque else 0.0
+    
+    @property
+    def count(self) -> int:
+        return min(self._seq, self.period)
+    
+    @property
+    def full(self) -> bool:
+        return self._seq >= self.period
\ No newline at end of file
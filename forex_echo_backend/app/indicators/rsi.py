@@ -1,5 +1,12 @@
 """RSI technical indicator implementation."""
 
+import numpy as np
+from typing import Optional
+from app.indicators.rolling import RollingSum
+from app.indicators.batch import gain_loss_averages
+
+RSI_MODES = ("sma", "wilder")
+
 def calculate_rsi(prices: list, period: int = 14) -> float:
     """Calculate RSI indicator using SMA-based gain/loss averaging."""
     if len(prices) < period + 1:
@@ -27,4 +34,84 @@ def calculate_rsi(prices: list, period: int = 14) -> float:
     rs = avg_gain / avg_loss
     rsi = 100 - (100 / (1 + rs))
     
-    return rsi
\ No newline at end of file
+    return rsi
+
+def _rsi_from_averages(avg_gain: float, avg_loss: float) -> float:
+    if avg_loss == 0:
+        return 100.0
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+class StreamingRSI:
+    """Incremental RSI updated in O(1) per bar.
+    
+    mode="sma" matches calculate_rsi (simple average of the last `period`
+    gains/losses); mode="wilder" seeds with that average and then applies
+    Wilder smoothing. The value stays at 50.0 until period + 1 prices are seen.
+    """
+    
+    def __init__(self, period: int = 14, mode: str = "sma"):
+        if mode not in RSI_MODES:
+            raise ValueError(f"Unsupported RSI mode: {mode}")
+        self.period = period
+        self.mode = mode
+        self.reset()
+    
+    def reset(self):
+        self._gains = RollingSum(self.period)
+        self._losses = RollingSum(self.period)
+        self._prev_price: Optional[float] = None
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self._seeded = False
+        self.value = 50.0
+    
+    def update(self, price: float) -> float:
+        """Feed the next close and return the current RSI."""
+        if self._prev_price is None:
+            self._prev_price = price
+            return self.value
+        
+        delta = price - self._prev_price
+        self._prev_price = price
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        
+        if self.mode == "wilder" and self._seeded:
+            self._avg_gain = (self._avg_gain * (self.period - 1) + gain) / self.period
+            self._avg_loss = (self._avg_loss * (self.period - 1) + loss) / self.period
+            self.value = _rsi_from_averages(self._avg_gain, self._avg_loss)
+            return self.value
+        
+        self._gains.push(gain)
+        self._losses.push(loss)
+        if not self._gains.full:
+            return self.value
+        
+        self._avg_gain = self._gains.total / self.period
+        self._avg_loss = self._losses.total / self.period
+        self._seeded = True
+        self.value = _rsi_from_averages(self._avg_gain, self._avg_loss)
+        return self.value
+    
+    def warm_up(self, closes) -> float:
+        """Rebuild state from a close history (list or NumPy array) in one call."""
+        self.reset()
+        closes = np.asarray(closes, dtype=np.float64)
+        if self.mode == "sma" or closes.size < self.period + 1:
+            # SMA RSI only depends on the last period + 1 closes
+            for price in closes[-(self.period + 1):].tolist():
+                self.update(price)
+            return self.value
+        
+        avg_gain, avg_loss = gain_loss_averages(closes, self.period, self.mode)
+        self._avg_gain = float(avg_gain[-1])
+        self._avg_loss = float(avg_loss[-1])
+        self._prev_price = float(closes[-1])
+        self._seeded = True
+        self.value = _rsi_from_averages(self._avg_gain, self._avg_loss)
+        return self.value
+    
+    @property
+    def ready(self) -> bool:
+        return self._seeded
\ No newline at end of file
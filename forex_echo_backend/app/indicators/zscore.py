@@ -1,3 +1,4 @@
+import math
 import statistics
 from typing import List
 from app.utilities.forex_logger import forex_logger
@@ -22,4 +23,91 @@ def calculate_zscore(prices: List[float], period: int) -> float:
     
     zscore = (current_price - mean_price) / stdev_price
     logger.debug(f"Z-score calculated: {zscore:.3f} (price: ${current_price}, mean: ${mean_price:.2f}, stdev: {stdev_price:.2f})")
-    return zscore
\ No newline at end of file
+    return zscore
+
+class RollingZScore:
+    """Rolling Z-score over the last `period` prices with O(1) updates.
+    
+    Uses a sliding-window Welford update for mean/variance (sample stdev, same
+    as calculate_zscore) on prices shifted by a reference level, and rebuilds
+    both from the window every `resync_interval` updates to keep drift bounded.
+    """
+    
+    def __init__(self, period: int, resync_interval: int = 1000):
+        if period < 1:
+            raise ValueError(f"Z-score period must be >= 1, got {period}")
+        self.period = period
+        self.resync_interval = max(resync_interval, period)
+        self.reset()
+    
+    def reset(self):
+        self._values: List[float] = [0.0] * self.period
+        self._index = 0
+        self._count = 0
+        self._updates = 0
+        self._flat_run = 0
+        self._shift = None
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.value = 0.0
+    
+    def update(self, price: float) -> float:
+        """Feed the next close and return the Z-score of that close."""
+        previous = self._values[self._index - 1] if self._count else None
+        self._flat_run = self._flat_run + 1 if price == previous else 1
+        if self._shift is None:
+            self._shift = price
+        
+        x = price - self._shift
+        if self._count < self.period:
+            self._count += 1
+            delta = x - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (x - self._mean)
+        else:
+            oldest = self._values[self._index] - self._shift
+            new_mean = self._mean + (x - oldest) / self.period
+            self._m2 += (x - oldest) * (x - new_mean + oldest - self._mean)
+            self._mean = new_mean
+        
+        self._values[self._index] = price
+        self._index = (self._index + 1) % self.period
+        
+        self._updates += 1
+        if self._updates % self.resync_interval == 0:
+            self._resync()
+        
+        if self._count < self.period:
+            self.value = 0.0
+            return self.value
+        
+        stdev = self.stdev
+        self.value = (price - self._shift - self._mean) / stdev if stdev > 0 else 0.0
+        return self.value
+    
+    def warm_up(self, closes) -> float:
+        """Rebuild state from a close history; only the last `period` closes matter."""
+        self.reset()
+        for price in list(closes)[-self.period:]:
+            self.update(float(price))
+        return self.value
+    
+    def _resync(self):
+        window = self._values[:self._count]
+        self._shift = sum(window) / self._count
+        self._mean = 0.0
+        self._m2 = sum((x - self._shift) ** 2 for x in window)
+    
+    @property
+    def mean(self) -> float:
+        return self._shift + self._mean if self._shift is not None else 0.0
+    
+    @property
+    def stdev(self) -> float:
+        if self._count < 2 or self._flat_run >= self._count:
+            return 0.0
+        return math.sqrt(max(self._m2, 0.0) / (self._count - 1))
+    
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.period
\ No newline at end of file
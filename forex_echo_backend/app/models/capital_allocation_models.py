@@ -72,4 +72,11 @@ class RiskControlStatus(BaseModel):
     floating_loss_pct: Decimal
     capital_exhaustion_pct: Decimal
     risk_breached: bool
-    can_trade: bool
\ No newline at end of file
+    can_trade: bool
+
+class RiskEvaluation(BaseModel):
+    """Trade permission, risk status and breach check for one decision, from a single risk snapshot"""
+    can_trade: bool
+    risk_triggered: bool = False
+    risk_event: Optional[RiskEvent] = None
+    status: Optional[RiskControlStatus] = None
\ No newline at end of file
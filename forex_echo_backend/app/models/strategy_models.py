@@ -5,6 +5,7 @@ from typing import List, Optional
 from enum import Enum
 from datetime import datetime
 from app.models.trading_models import TradeDirection, SetupState
+from app.core.candle_buffer import CandleBuffer
 
 class GoldBuyDipConfig(BaseModel):
     """Configuration for Gold Buy Dip Strategy"""
@@ -20,6 +21,7 @@ class GoldBuyDipConfig(BaseModel):
     use_grid_percent: bool = True
     grid_atr_multiplier: float = 1.0
     atr_period: int = 14
+    atr_mode: str = "sma"  # "sma" or "wilder"
     grid_lot_multiplier: float = 1.0
     use_progressive_lots: bool = False
     lot_progression_factor: float = 1.2
@@ -45,7 +47,9 @@ class RSIPairsConfig(BaseModel):
     symbol1: str  # No default - user must specify
     symbol2: str  # No default - user must specify
     rsi_period: int = 14
+    rsi_mode: str = "sma"  # "sma" or "wilder"
     atr_period: int = 5
+    atr_mode: str = "sma"  # "sma" or "wilder"
     rsi_overbought: float = 75.0
     rsi_oversold: float = 25.0
     profit_target_usd: float = 500.0
@@ -55,7 +59,7 @@ class RSIPairsConfig(BaseModel):
 
 class RSIPairsState:
     """State management for RSI Pairs Strategy"""
-    def __init__(self):
+    def __init__(self, candle_capacity: int = 100):
         self.in_trade: bool = False
         self.entry_time: Optional[datetime] = None
         self.entry_price_s1: float = 0.0
@@ -63,5 +67,5 @@ class RSIPairsState:
         self.lot_size_s1: float = 0.0
         self.lot_size_s2: float = 0.0
         self.trade_direction: str = ""  # "long" or "short"
-        self.s1_candles: List[dict] = []
-        self.s2_candles: List[dict] = []
\ No newline at end of file
+        self.s1_candles = CandleBuffer(candle_capacity)
+        self.s2_candles = CandleBuffer(candle_capacity)
\ No newline at end of file
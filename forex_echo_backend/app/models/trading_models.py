@@ -1,7 +1,7 @@
 """Business models for trading domain - Pydantic"""
 
 from pydantic import BaseModel
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, NamedTuple
 from datetime import datetime
 from enum import Enum
 
@@ -60,4 +60,56 @@ class MarketData(BaseModel):
     high: float
     low: float
     close: float
-    volume: int = 0
\ No newline at end of file
+    volume: int = 0
+
+class Bar(NamedTuple):
+    """Lightweight candle for internal hot paths - same fields as MarketData, no validation"""
+    timestamp: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int = 0
+    
+    def to_market_data(self) -> MarketData:
+        """Validated copy for API boundaries"""
+        return MarketData(**self._asdict())
+
+BAR_CLOSED = "closed"
+BAR_UPDATE = "update"
+
+class BarEvent(NamedTuple):
+    """Feed event: a bar that just closed, or an intrabar update of the forming bar"""
+    kind: str
+    bar: Bar
+class OrderIntent(NamedTuple):
+    """An order a strategy wants placed; `key` makes resubmissions of the same intent no-ops"""
+    key: str
+    symbol: str
+    action: str  # BUY, SELL or CLOSE_ALL
+    lot_size: float = 0.0
+    take_profit: Optional[float] = None
+    magic: Optional[int] = None  # Executor defaults when None
+    comment: Optional[str] = None
+    deviation: Optional[int] = None
+    received_at: Optional[float] = None  # perf_counter() when the signal arrived
+
+ORDER_FILLED = "filled"
+ORDER_PARTIAL = "partial"  # Retries exhausted with only part of the volume filled
+ORDER_REJECTED = "rejected"
+ORDER_FAILED = "failed"
+ORDER_UNKNOWN = "unknown"  # Sent, but whether it executed could not be established - check the terminal
+
+class OrderEvent(NamedTuple):
+    """Outcome of an OrderIntent, reported once by the order queue"""
+    key: str
+    symbol: str
+    action: str
+    status: str
+    ticket: Optional[int] = None
+    price: Optional[float] = None
+    filled_volume: float = 0.0
+    attempts: int = 0
+    retcode: Optional[int] = None
+    message: str = ""
+    latency_ms: float = 0.0  # Intent queued -> outcome known
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""MT5 account balance tracked in the background for portfolio reads"""
+
+import threading
+import time
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Set
+from sqlalchemy import func
+from app.database.database import SessionLocal
+from app.database.entities.capital_allocation_entity import PortfolioEntity
+from app.models.trading_models import OrderEvent
+from app.services.mt5_connection_state import mt5_connection_state
+from app.services.order_queue import order_queue
+from app.services.portfolio_snapshot_cache import portfolio_snapshot_cache
+from app.utilities.forex_logger import forex_logger
+from config import ACCOUNT_SYNC_INTERVAL_MS
+
+logger = forex_logger.get_logger(__name__)
+
+BALANCE_TOLERANCE = Decimal('0.01')
+
+class AccountBalanceSync:
+    """Account balance, equity and login refreshed off the request path.
+    
+    A sync thread reads the shared connection snapshot once per interval,
+    and right away after an order fills. Capital services read the last
+    synced values from memory, so a portfolio read never waits on terminal
+    IPC. When the balance moves, the portfolios of every user read so far
+    are reconciled in one UPDATE and their dashboard snapshots dropped;
+    an unchanged balance writes nothing. Processes without a terminal
+    (shard workers) are fed the parent's values through publish().
+    """
+    
+    def __init__(self, session_factory=None, state=None, interval_ms: int = 5000):
+        self.session_factory = session_factory
+        self.state = state if state is not None else mt5_connection_state
+        self.interval = interval_ms / 1000.0
+        self.balance: Optional[Decimal] = None  # None while no account is logged in
+        self.equity: Optional[Decimal] = None
+        self.login: Optional[int] = None
+        self.synced_at: Optional[float] = None  # time.monotonic() of the last sync
+        self.users: Set[str] = set()  # portfolios kept in line with the balance
+        self.sync_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.worker: Optional[threading.Thread] = None
+        self.running = True
+        self.external = False  # Values come from publish(), never from the terminal
+        self.listeners: List[Callable[[Optional[Decimal], Optional[Decimal], Optional[int]], None]] = []
+        self.stats = {'syncs': 0, 'changes': 0, 'reconciled': 0, 'reconcile_errors': 0}
+    
+    def get_balance(self) -> Optional[Decimal]:
+        """Last synced balance (None when MT5 is not connected)"""
+        self._ensure_synced()
+        return self.balance
+    
+    def get_login(self) -> Optional[int]:
+        """Last synced account login (None when MT5 is not connected)"""
+        self._ensure_synced()
+        return self.login
+    
+    def track(self, user_id: str):
+        """Keep `user_id`'s portfolio reconciled with the balance from now on"""
+        self.users.add(user_id)
+    
+    def request_sync(self):
+        """Sync now instead of at the next interval"""
+        self.wake.set()
+    
+    def add_listener(self, listener: Callable[[Optional[Decimal], Optional[Decimal], Optional[int]], None]):
+        """Call `listener` with (balance, equity, login) whenever the balance or login changes"""
+        self.listeners.append(listener)
+    
+    def publish(self, balance: Optional[Decimal], equity: Optional[Decimal], login: Optional[int]):
+        """Take account values read by another process; this instance stops syncing on its own"""
+        with self.sync_lock:
+            self.external = True
+            self.balance = balance
+            self.equity = equity
+            self.login = login
+            self.synced_at = time.monotonic()
+    
+    def on_order_event(self, event: OrderEvent):
+        """Order queue listener: fills and closes move the balance"""
+        if event.filled_volume:
+            self.request_sync()
+    
+    def _ensure_synced(self):
+        if self.external:
+            return
+        if self.worker is None and self.session_factory is not None:
+            with self.sync_lock:
+                if self.worker is None:
+                    # Started on first read so importing the service never creates a thread
+                    self.worker = threading.Thread(target=self._sync_loop, name="account-balance-sync", daemon=True)
+                    self.worker.start()
+        synced_at = self.synced_at
+        if synced_at is None or time.monotonic() - synced_at > self.interval * 2:
+            # First read, or the sync thread has fallen behind
+            self.sync()
+    
+    def _sync_loop(self):
+        while self.running:
+            forced = self.wake.wait(self.interval)
+            self.wake.clear()
+            if self.running:
+                self.sync(max_age=0 if forced else None)
+    
+    def sync(self, max_age: Optional[float] = None) -> bool:
+        """Read the account from the connection snapshot; returns True when the balance changed"""
+        account_info = self.state.get(max_age).account_info
+        with self.sync_lock:
+            self.stats['syncs'] += 1
+            self.synced_at = time.monotonic()
+            if account_info:
+                balance = Decimal(str(account_info.balance))
+                self.equity = Decimal(str(account_info.equity))
+                login = account_info.login
+            else:
+                balance = None
+                self.equity = None
+                login = None
+            
+            old_balance = self.balance
+            changed = balance != old_balance and (
+                balance is None or old_balance is None or abs(balance - old_balance) > BALANCE_TOLERANCE)
+            login_changed = login != self.login
+            self.login = login
+            if not changed and not login_changed:
+                return False
+            if changed:
+                self.balance = balance
+                self.stats['changes'] += 1
+            equity = self.equity
+        
+        if changed:
+            logger.info(f"MT5 account balance: {old_balance} -> {balance}")
+            if balance is not None:
+                self.reconcile(balance)
+        for listener in self.listeners:
+            try:
+                listener(self.balance, equity, login)
+            except Exception as e:
+                logger.error(f"Account balance listener failed: {e}")
+        return changed
+    
+    def reconcile(self, balance: Decimal) -> int:
+        """Move tracked portfolios whose total differs to `balance`; returns rows updated"""
+        users = list(self.users)
+        if not users or self.session_factory is None:
+            return 0
+        db = self.session_factory()
+        try:
+            updated = db.query(PortfolioEntity).filter(
+                PortfolioEntity.user_id.in_(users),
+                func.abs(PortfolioEntity.total_capital - balance) > BALANCE_TOLERANCE
+            ).update({
+                PortfolioEntity.total_capital: balance,
+                PortfolioEntity.available_capital: balance - func.coalesce(PortfolioEntity.allocated_capital, 0)
+            }, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error reconciling portfolio balances: {e}")
+            self.stats['reconcile_errors'] += 1
+            return 0
+        finally:
+            db.close()
+        
+        if updated:
+            self.stats['reconciled'] += updated
+            for user_id in users:
+                portfolio_snapshot_cache.invalidate(user_id)
+            logger.info(f"Reconciled {updated} portfolio(s) to balance ${balance}")
+        return updated
+    
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'balance': float(self.balance) if self.balance is not None else None,
+            'equity': float(self.equity) if self.equity is not None else None,
+            'users': len(self.users)
+        }
+    
+    def shutdown(self):
+        """Stop the sync thread"""
+        self.running = False
+        self.wake.set()
+        if self.worker is not None:
+            self.worker.join(timeout=10)
+
+# Global instance
+account_balance_sync = AccountBalanceSync(SessionLocal, interval_ms=ACCOUNT_SYNC_INTERVAL_MS)
+order_queue.add_listener(account_balance_sync.on_order_event)
\ No newline at end of file
@@ -5,6 +5,7 @@ from typing import Optional, Dict, Any
 from decimal import Decimal
 from sqlalchemy.orm import Session
 from app.models.trading_models import MarketData, TradeSignal
+from app.models.capital_allocation_models import RiskEvaluation
 from app.services.risk_control_manager import RiskControlManager
 from app.utilities.forex_logger import forex_logger
 
@@ -21,12 +22,31 @@ class BaseStrategy(ABC):
         self.risk_manager = RiskControlManager(db) if db else None
         self.current_floating_pnl = Decimal('0.00')
         self.current_realized_pnl = Decimal('0.00')
+        self.forming_bar: Optional[MarketData] = None
+        self.tick_risk: Optional[RiskEvaluation] = None  # Risk snapshot of the tick being processed
     
     @abstractmethod
     def _process_market_data(self, candle: MarketData) -> Optional[TradeSignal]:
         """Strategy-specific market data processing - to be implemented by each strategy"""
         pass
     
+    def _process_forming_bar(self, candle: MarketData) -> Optional[TradeSignal]:
+        """Strategy-specific intrabar check (intrabar mode only); the forming bar never enters the history"""
+        return None
+    
+    def on_bar_update(self, candle: MarketData) -> Optional[TradeSignal]:
+        """Intrabar update of the forming bar - kept separate from the closed-bar history"""
+        self.forming_bar = candle
+        strategy_signal = self._process_forming_bar(candle)
+        if not strategy_signal or not self.risk_manager:
+            return strategy_signal
+        
+        # Validate with the P&L of the last closed bar; the ledger check stays in memory
+        return self.risk_manager.validate_trade_signal(
+            self.pair, self.strategy_name, strategy_signal,
+            self.current_floating_pnl, self.current_realized_pnl
+        )
+    
     def process_tick(self, candle: MarketData, floating_pnl: Decimal = Decimal('0.00'), 
                     realized_pnl: Decimal = Decimal('0.00')) -> Optional[TradeSignal]:
         """Main entry point - processes market data with risk control"""
@@ -35,50 +55,68 @@ class BaseStrategy(ABC):
         self.current_floating_pnl = floating_pnl
         self.current_realized_pnl = realized_pnl
         
-        # Update P&L in risk system and check for risk events (if risk manager available)
-        if self.risk_manager:
-            risk_event = self.risk_manager.update_pnl(
-                self.pair, self.strategy_name, floating_pnl, realized_pnl
+        # One risk evaluation per tick, shared by the strategy's own checks and signal validation
+        if not self.risk_manager:
+            return self._process_market_data(candle)
+        
+        evaluation = self.risk_manager.evaluate(self.pair, self.strategy_name, floating_pnl, realized_pnl)
+        
+        # If risk control triggered, override any strategy signal
+        if evaluation.risk_triggered:
+            logger.critical(f"Risk control triggered during P&L update for {self.pair}: {evaluation.risk_event.event_type.value}")
+            return TradeSignal(
+                action="CLOSE_ALL",
+                lot_size=0,
+                reason=f"Risk control: {evaluation.risk_event.event_type.value}"
             )
-            
-            # If risk control triggered, override any strategy signal
-            if risk_event:
-                return TradeSignal(
-                    action="CLOSE_ALL",
-                    lot_size=0,
-                    reason=f"Risk control: {risk_event.event_type.value}"
-                )
         
-        # Get strategy signal
-        strategy_signal = self._process_market_data(candle)
+        self.tick_risk = evaluation
+        try:
+            # Get strategy signal
+            strategy_signal = self._process_market_data(candle)
+        finally:
+            self.tick_risk = None
         
         # If no signal from strategy, return None
         if not strategy_signal:
             return None
         
-        # Validate signal through risk control (if risk manager available)
-        if self.risk_manager:
-            validated_signal = self.risk_manager.validate_trade_signal(
-                self.pair, self.strategy_name, strategy_signal, 
-                self.current_floating_pnl, self.current_realized_pnl
-            )
-            return validated_signal
-        
-        # Return strategy signal directly if no risk manager
-        return strategy_signal
+        # Validate signal through risk control
+        return self.risk_manager.validate_trade_signal(
+            self.pair, self.strategy_name, strategy_signal, 
+            self.current_floating_pnl, self.current_realized_pnl, evaluation
+        )
+    
+    def evaluate_risk(self) -> RiskEvaluation:
+        """Risk snapshot for this pair - the current tick's while one is being processed"""
+        if self.tick_risk is not None:
+            return self.tick_risk
+        if not self.risk_manager:
+            return RiskEvaluation(can_trade=True)  # Allow trading if no risk manager (no database)
+        return self.risk_manager.evaluate(self.pair, self.strategy_name)
     
     def can_trade(self) -> bool:
         """Check if strategy can trade for this pair"""
-        if not self.risk_manager:
-            return True  # Allow trading if no risk manager (no database)
-        return self.risk_manager.check_trade_permission(self.pair, self.strategy_name)
+        return self.evaluate_risk().can_trade
+    
+    def check_capital_allocation_risk(self) -> bool:
+        """Check if strategy should stop due to capital allocation risk"""
+        evaluation = self.evaluate_risk()
+        if evaluation.status and evaluation.status.risk_breached:
+            logger.critical(f"Risk breached for {self.pair} - stopping strategy")
+            return True
+        if not evaluation.can_trade:
+            logger.warning(f"Trading blocked by capital allocation for {self.pair}")
+            return True
+        
+        return False
     
     def get_risk_status(self) -> Dict[str, Any]:
         """Get current risk status for this strategy/pair"""
         if not self.risk_manager:
             return {"error": "Risk manager not available (no database)"}
-            
-        risk_status = self.risk_manager.capital_service.get_risk_status(self.pair, self.strategy_name)
+        
+        risk_status = self.evaluate_risk().status
         if not risk_status:
             return {"error": "No risk allocation found"}
         
@@ -2,20 +2,21 @@
 
 from typing import Dict, List, Optional, Tuple
 from decimal import Decimal
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app.database.entities.capital_allocation_entity import (
     PortfolioEntity, StrategyAllocationEntity, PairAllocationEntity, RiskEventEntity
 )
 from app.models.capital_allocation_models import (
     Portfolio, StrategyAllocation, PairAllocation, RiskEvent, 
-    CapitalAllocationConfig, RiskControlStatus, RiskEventType
+    CapitalAllocationConfig, RiskControlStatus, RiskEvaluation, RiskEventType
 )
 from app.utilities.forex_logger import forex_logger
 from app.services.mt5_connection_manager import mt5_connection_manager
-try:
-    import MetaTrader5 as mt5
-except ImportError:
-    mt5 = None
+from app.services.mt5_gateway import mt5
+from app.services.symbol_info_cache import symbol_info_cache
+from app.services.risk_ledger import risk_ledger
+from app.services.portfolio_snapshot_cache import portfolio_snapshot_cache
+from app.services.account_balance_sync import account_balance_sync
 
 logger = forex_logger.get_logger(__name__)
 
@@ -25,21 +26,13 @@ class CapitalAllocationService:
         self.mt5_manager = mt5_connection_manager
     
     def get_mt5_account_balance(self) -> Optional[Decimal]:
-        """Fetch real account balance from MT5"""
-        try:
-            if self.mt5_manager.is_terminal_connected():
-                import MetaTrader5 as mt5
-                account_info = mt5.account_info()
-                if account_info:
-                    balance = Decimal(str(account_info.balance))
-                    logger.info(f"MT5 Account Balance: ${balance}")
-                    return balance
-            # Fallback for user_6 when MT5 not connected
-            logger.info("MT5 not connected, using fallback balance")
-            return Decimal('100000.00')
-        except Exception as e:
-            logger.error(f"Error fetching MT5 balance: {e}")
-            return Decimal('100000.00')
+        """Account balance as last synced from MT5"""
+        balance = account_balance_sync.get_balance()
+        if balance is not None:
+            return balance
+        # Fallback for user_6 when MT5 not connected
+        logger.info("MT5 not connected, using fallback balance")
+        return Decimal('100000.00')
     
     def get_or_create_user_portfolio(self, user_id: str) -> Portfolio:
         """Get existing portfolio or create new one for user (Professional Standard)"""
@@ -49,13 +42,16 @@ class CapitalAllocationService:
         ).first()
         
         if existing_portfolio:
-            # Update with current MT5 balance
-            mt5_balance = self.get_mt5_account_balance()
+            # Catch up with the synced balance; later changes are reconciled by the balance sync
+            account_balance_sync.track(user_id)
+            # Unknown balance (no terminal in this process) - keep the stored one, never the fallback
+            mt5_balance = account_balance_sync.get_balance()
             if mt5_balance and abs(existing_portfolio.total_capital - mt5_balance) > Decimal('0.01'):
                 old_total = existing_portfolio.total_capital
                 existing_portfolio.total_capital = mt5_balance
                 existing_portfolio.available_capital = mt5_balance - existing_portfolio.allocated_capital
                 self.db.commit()
+                portfolio_snapshot_cache.invalidate(user_id)
                 logger.info(f"Updated portfolio balance: ${old_total} → ${mt5_balance}")
             
             return self._entity_to_portfolio(existing_portfolio)
@@ -73,6 +69,7 @@ class CapitalAllocationService:
         self.db.add(portfolio_entity)
         self.db.commit()
         self.db.refresh(portfolio_entity)
+        account_balance_sync.track(user_id)
         
         logger.info(f"Created new portfolio for user {user_id} with ${mt5_balance}")
         return self._entity_to_portfolio(portfolio_entity)
@@ -115,6 +112,7 @@ class CapitalAllocationService:
         
         self.db.commit()
         self.db.refresh(strategy_allocation)
+        portfolio_snapshot_cache.invalidate(user_id)
         
         return {
             "success": True,
@@ -155,6 +153,7 @@ class CapitalAllocationService:
             logger.info(f"Removed strategy '{strategy_name}' (no capital remaining)")
         
         self.db.commit()
+        self._allocations_changed(user_id, strategy_name=strategy_name)
         
         return {
             "success": True,
@@ -201,6 +200,7 @@ class CapitalAllocationService:
             old_amount = existing_pair.allocated_capital
             existing_pair.allocated_capital += allocation_amount
             self.db.commit()
+            self._allocations_changed(user_id, pair, strategy_name)
             logger.info(f"Updated {pair} in {strategy_name}: ${old_amount} + ${allocation_amount} = ${existing_pair.allocated_capital}")
         else:
             # Create new pair allocation
@@ -212,6 +212,7 @@ class CapitalAllocationService:
             )
             self.db.add(pair_allocation)
             self.db.commit()
+            self._allocations_changed(user_id, pair, strategy_name)
             logger.info(f"Allocated ${allocation_amount} to {pair} in {strategy_name}")
         
         return {
@@ -348,6 +349,7 @@ class CapitalAllocationService:
             pair_allocation_entities.append(pair_allocation)
         
         self.db.commit()
+        self._allocations_changed(strategy_name=strategy_allocation.strategy_name)
         
         logger.info(f"Allocated ${total_requested} across {len(pair_allocations)} pairs in strategy {strategy_allocation.strategy_name}")
         return [self._entity_to_pair_allocation(pa) for pa in pair_allocation_entities]
@@ -363,15 +365,8 @@ class CapitalAllocationService:
                 mt5_balance = Decimal('10000.00')  # Fallback
             
             # Use MT5 account as user_id for persistence
-            account_info = None
-            if self.mt5_manager.is_terminal_connected():
-                try:
-                    import MetaTrader5 as mt5
-                    account_info = mt5.account_info()
-                except:
-                    pass
-            
-            user_id = f"mt5_account_{account_info.login}" if account_info else session_id
+            login = account_balance_sync.get_login()
+            user_id = f"mt5_account_{login}" if login else session_id
             
             # Find or create portfolio for user (not session)
             portfolio = self.db.query(PortfolioEntity).filter(
@@ -448,6 +443,7 @@ class CapitalAllocationService:
             self.db.add(pair_allocation)
             self.db.commit()
             self.db.refresh(pair_allocation)
+            self._allocations_changed(user_id, pair, strategy_name)
             
             logger.info(f"Allocated ${allocation_amount} to {pair} in {strategy_name} for session {session_id}")
             
@@ -468,79 +464,33 @@ class CapitalAllocationService:
     
     def check_risk_control(self, pair: str, strategy_name: str, 
                           floating_pnl: Decimal, realized_pnl: Decimal) -> Tuple[bool, Optional[RiskEvent]]:
-        """Check if risk control should trigger for a pair"""
+        """Check if risk control should trigger for a pair (in memory; the ledger writes P&L and breaches behind)"""
         if not self.db:
             return False, None  # No risk control if no database
-            
-        pair_allocation = self._get_pair_allocation(pair, strategy_name)
-        if not pair_allocation:
-            return False, None
-        
-        # Update P&L
-        pair_allocation.floating_pnl = floating_pnl
-        pair_allocation.realized_pnl = realized_pnl
-        
-        cumulative_loss = realized_pnl + floating_pnl
-        floating_loss_pct = abs(floating_pnl / pair_allocation.allocated_capital * 100) if pair_allocation.allocated_capital > 0 else 0
-        capital_exhaustion_pct = abs(cumulative_loss / pair_allocation.allocated_capital * 100) if pair_allocation.allocated_capital > 0 else 0
         
-        # Check floating loss threshold
-        if floating_loss_pct >= pair_allocation.floating_loss_threshold_pct:
-            risk_event = self._create_risk_event(
-                pair_allocation.id,
-                RiskEventType.FLOATING_LOSS_BREACH,
-                abs(floating_pnl),
-                pair_allocation.allocated_capital * (pair_allocation.floating_loss_threshold_pct / 100)
-            )
-            pair_allocation.risk_breached = True
-            self.db.commit()
-            
-            logger.critical(f"FLOATING LOSS BREACH: {pair} - {floating_loss_pct:.2f}% >= {pair_allocation.floating_loss_threshold_pct}%")
-            return True, risk_event
-        
-        # Check capital exhaustion
-        if abs(cumulative_loss) >= pair_allocation.allocated_capital:
-            risk_event = self._create_risk_event(
-                pair_allocation.id,
-                RiskEventType.CAPITAL_EXHAUSTION,
-                abs(cumulative_loss),
-                pair_allocation.allocated_capital
-            )
-            pair_allocation.risk_breached = True
-            self.db.commit()
-            
-            logger.critical(f"CAPITAL EXHAUSTION: {pair} - Loss ${abs(cumulative_loss)} >= Allocated ${pair_allocation.allocated_capital}")
-            return True, risk_event
+        return risk_ledger.update(pair, strategy_name, floating_pnl, realized_pnl,
+                                  lambda: self._get_pair_allocation(pair, strategy_name))
+    
+    def evaluate_risk(self, pair: str, strategy_name: str, floating_pnl: Optional[Decimal] = None,
+                      realized_pnl: Optional[Decimal] = None) -> Optional[RiskEvaluation]:
+        """Permission, status and breach check for a pair in one call (None if the pair is not allocated)"""
+        if not self.db:
+            return None
         
-        self.db.commit()
-        return False, None
+        return risk_ledger.evaluate(pair, strategy_name, floating_pnl, realized_pnl,
+                                    lambda: self._get_pair_allocation(pair, strategy_name))
     
     def get_risk_status(self, pair: str, strategy_name: str) -> Optional[RiskControlStatus]:
         """Get current risk control status for a pair"""
         if not self.db:
             return None  # No risk status if no database
-            
-        pair_allocation = self._get_pair_allocation(pair, strategy_name)
-        if not pair_allocation:
-            return None
         
-        cumulative_loss = pair_allocation.realized_pnl + pair_allocation.floating_pnl
-        floating_loss_pct = abs(pair_allocation.floating_pnl / pair_allocation.allocated_capital * 100) if pair_allocation.allocated_capital > 0 else 0
-        capital_exhaustion_pct = abs(cumulative_loss / pair_allocation.allocated_capital * 100) if pair_allocation.allocated_capital > 0 else 0
+        # The ledger holds P&L not yet flushed to the database
+        entry = risk_ledger.entry(pair, strategy_name, lambda: self._get_pair_allocation(pair, strategy_name))
+        if not entry:
+            return None
         
-        return RiskControlStatus(
-            pair=pair_allocation.pair,
-            strategy_name=strategy_name,
-            allocated_capital=pair_allocation.allocated_capital,
-            used_capital=pair_allocation.used_capital,
-            realized_pnl=pair_allocation.realized_pnl,
-            floating_pnl=pair_allocation.floating_pnl,
-            cumulative_loss=cumulative_loss,
-            floating_loss_pct=floating_loss_pct,
-            capital_exhaustion_pct=capital_exhaustion_pct,
-            risk_breached=pair_allocation.risk_breached,
-            can_trade=not pair_allocation.risk_breached
-        )
+        return entry.to_status()
     
     def reset_pair_risk(self, pair: str, strategy_name: str) -> bool:
         """Reset risk breach status for a pair"""
@@ -548,51 +498,46 @@ class CapitalAllocationService:
         if not pair_allocation:
             return False
         
+        # Drop unflushed P&L first so a pending write-behind cannot undo the reset
+        risk_ledger.reset(pair, strategy_name)
         pair_allocation.risk_breached = False
         pair_allocation.floating_pnl = Decimal('0.00')
         pair_allocation.realized_pnl = Decimal('0.00')
         self.db.commit()
+        portfolio_snapshot_cache.invalidate()
         
         logger.info(f"Risk status reset for {pair} in strategy {strategy_name}")
         return True
     
     def get_portfolio_summary(self, user_id: str) -> Dict:
         """Get portfolio summary with all allocations"""
-        portfolio = self.db.query(PortfolioEntity).filter(PortfolioEntity.user_id == user_id).first()
+        portfolio = self._get_portfolio_snapshot(user_id)
         if not portfolio:
             return {}
         
-        strategy_allocations = self.db.query(StrategyAllocationEntity).filter(
-            StrategyAllocationEntity.portfolio_id == portfolio.id
-        ).all()
-        
         summary = {
-            "total_capital": float(portfolio.total_capital),
-            "allocated_capital": float(portfolio.allocated_capital),
-            "available_capital": float(portfolio.available_capital),
+            "total_capital": float(portfolio["total_capital"]),
+            "allocated_capital": float(portfolio["allocated_capital"]),
+            "available_capital": float(portfolio["available_capital"]),
             "strategies": {}
         }
         
-        for strategy in strategy_allocations:
-            pair_allocations = self.db.query(PairAllocationEntity).filter(
-                PairAllocationEntity.strategy_allocation_id == strategy.id
-            ).all()
-            
-            summary["strategies"][strategy.strategy_name] = {
-                "allocation_percentage": float(strategy.allocation_percentage),
-                "allocated_capital": float(strategy.allocated_capital),
-                "realized_pnl": float(strategy.realized_pnl),
-                "floating_pnl": float(strategy.floating_pnl),
+        for strategy in portfolio["strategies"]:
+            summary["strategies"][strategy["strategy_name"]] = {
+                "allocation_percentage": float(strategy["allocation_percentage"]),
+                "allocated_capital": float(strategy["allocated_capital"]),
+                "realized_pnl": float(strategy["realized_pnl"]),
+                "floating_pnl": float(strategy["floating_pnl"]),
                 "pairs": {
-                    pa.pair: {
-                        "allocated_capital": float(pa.allocated_capital),
-                        "used_capital": float(pa.used_capital),
-                        "available_capital": float(pa.allocated_capital - pa.used_capital),
-                        "realized_pnl": float(pa.realized_pnl),
-                        "floating_pnl": float(pa.floating_pnl),
-                        "risk_breached": pa.risk_breached,
-                        "can_trade": not pa.risk_breached
-                    } for pa in pair_allocations
+                    pa["pair"]: {
+                        "allocated_capital": float(pa["allocated_capital"]),
+                        "used_capital": float(pa["used_capital"]),
+                        "available_capital": float(pa["allocated_capital"] - pa["used_capital"]),
+                        "realized_pnl": float(pa["realized_pnl"]),
+                        "floating_pnl": float(pa["floating_pnl"]),
+                        "risk_breached": pa["risk_breached"],
+                        "can_trade": not pa["risk_breached"]
+                    } for pa in strategy["pairs"]
                 }
             }
         
@@ -600,22 +545,13 @@ class CapitalAllocationService:
     
     def get_mt5_user_id(self) -> str:
         """Get standardized MT5 user ID"""
-        try:
-            if self.mt5_manager.is_terminal_connected():
-                import MetaTrader5 as mt5
-                account_info = mt5.account_info()
-                if account_info:
-                    return str(account_info.login)
-        except:
-            pass
-        return "demo_user"
+        login = account_balance_sync.get_login()
+        return str(login) if login else "demo_user"
     
     def update_dynamic_capital(self, user_id: str) -> Dict:
         """Update portfolio capital based on current MT5 balance (for dynamic compounding mode)"""
         try:
-            portfolio = self.db.query(PortfolioEntity).filter(
-                PortfolioEntity.user_id == user_id
-            ).first()
+            portfolio = self._get_portfolio_tree(user_id)
             
             if not portfolio:
                 return {"error": "Portfolio not found"}
@@ -631,24 +567,18 @@ class CapitalAllocationService:
             portfolio.available_capital = current_balance - portfolio.allocated_capital
             
             # Update strategy allocations proportionally
-            strategy_allocations = self.db.query(StrategyAllocationEntity).filter(
-                StrategyAllocationEntity.portfolio_id == portfolio.id
-            ).all()
-            
-            for strategy in strategy_allocations:
+            for strategy in portfolio.strategy_allocations:
                 # Maintain percentage allocation
                 new_allocation = current_balance * (strategy.allocation_percentage / 100)
                 strategy.allocated_capital = new_allocation
                 
                 # Update pair allocations proportionally
-                pair_allocations = self.db.query(PairAllocationEntity).filter(
-                    PairAllocationEntity.strategy_allocation_id == strategy.id
-                ).all()
-                
+                pair_allocations = strategy.pair_allocations
                 for pair_alloc in pair_allocations:
                     pair_alloc.allocated_capital = new_allocation / len(pair_allocations)
             
             self.db.commit()
+            self._allocations_changed(user_id)
             
             logger.info(f"Dynamic capital updated: ${old_capital} -> ${current_balance}")
             
@@ -666,47 +596,34 @@ class CapitalAllocationService:
     def get_comprehensive_analytics(self, user_id: str) -> Dict:
         """Get comprehensive analytics for capital allocation dashboard"""
         try:
-            portfolio = self.db.query(PortfolioEntity).filter(
-                PortfolioEntity.user_id == user_id
-            ).first()
+            portfolio = self._get_portfolio_snapshot(user_id)
             
             if not portfolio:
                 return {"error": "Portfolio not found"}
             
-            # Get all strategy allocations
-            strategy_allocations = self.db.query(StrategyAllocationEntity).filter(
-                StrategyAllocationEntity.portfolio_id == portfolio.id
-            ).all()
+            total_capital = portfolio["total_capital"]
+            available_capital = portfolio["available_capital"]
+            strategies_count = len(portfolio["strategies"])
+            pairs = [pa for strategy in portfolio["strategies"] for pa in strategy["pairs"]]
             
             # Calculate totals
-            total_allocated = float(portfolio.allocated_capital)
-            total_utilized = Decimal('0')
-            total_realized_pnl = Decimal('0')
-            total_floating_pnl = Decimal('0')
+            total_allocated = float(portfolio["allocated_capital"])
+            total_utilized = sum((pa["used_capital"] for pa in pairs), Decimal('0'))
+            total_realized_pnl = sum((pa["realized_pnl"] for pa in pairs), Decimal('0'))
+            total_floating_pnl = sum((pa["floating_pnl"] for pa in pairs), Decimal('0'))
             
             # Get pair summary
             pairs_summary = self.get_pairs_cross_strategy_summary(user_id)
             
-            # Calculate utilized capital across all pairs
-            for strategy in strategy_allocations:
-                pair_allocations = self.db.query(PairAllocationEntity).filter(
-                    PairAllocationEntity.strategy_allocation_id == strategy.id
-                ).all()
-                
-                for pa in pair_allocations:
-                    total_utilized += pa.used_capital
-                    total_realized_pnl += pa.realized_pnl
-                    total_floating_pnl += pa.floating_pnl
-            
             return {
                 "success": True,
                 "overview": {
-                    "total_capital": float(portfolio.total_capital),
+                    "total_capital": float(total_capital),
                     "allocated_capital": total_allocated,
                     "utilized_capital": float(total_utilized),
                     "available_in_allocated": total_allocated - float(total_utilized),
-                    "unallocated_capital": float(portfolio.available_capital),
-                    "allocation_percentage": (total_allocated / float(portfolio.total_capital) * 100) if portfolio.total_capital > 0 else 0,
+                    "unallocated_capital": float(available_capital),
+                    "allocation_percentage": (total_allocated / float(total_capital) * 100) if total_capital > 0 else 0,
                     "utilization_percentage": (float(total_utilized) / total_allocated * 100) if total_allocated > 0 else 0,
                     "total_realized_pnl": float(total_realized_pnl),
                     "total_floating_pnl": float(total_floating_pnl),
@@ -714,7 +631,7 @@ class CapitalAllocationService:
                     "roi_percentage": (float(total_realized_pnl + total_floating_pnl) / total_allocated * 100) if total_allocated > 0 else 0
                 },
                 "pairs_summary": pairs_summary,
-                "strategies_count": len(strategy_allocations),
+                "strategies_count": strategies_count,
                 "pairs_count": len(pairs_summary)
             }
             
@@ -725,52 +642,44 @@ class CapitalAllocationService:
     def get_pairs_cross_strategy_summary(self, user_id: str) -> List[Dict]:
         """Get summary of each pair aggregated across all strategies"""
         try:
-            portfolio = self.db.query(PortfolioEntity).filter(
-                PortfolioEntity.user_id == user_id
-            ).first()
+            portfolio = self._get_portfolio_snapshot(user_id)
             
             if not portfolio:
                 return []
-            
-            # Get all pair allocations across all strategies
-            pair_allocations = self.db.query(PairAllocationEntity).join(
-                StrategyAllocationEntity
-            ).filter(
-                StrategyAllocationEntity.portfolio_id == portfolio.id
-            ).all()
+            portfolio_capital = float(portfolio["total_capital"])
             
             # Group by pair
             pairs_data = {}
-            for pa in pair_allocations:
-                pair_name = pa.pair
-                strategy = pa.strategy_allocation
-                
-                if pair_name not in pairs_data:
-                    pairs_data[pair_name] = {
-                        "pair": pair_name,
-                        "total_allocated": Decimal('0'),
-                        "total_used": Decimal('0'),
-                        "total_available": Decimal('0'),
-                        "total_realized_pnl": Decimal('0'),
-                        "total_floating_pnl": Decimal('0'),
-                        "strategies_count": 0,
-                        "strategies": []
-                    }
-                
-                pairs_data[pair_name]["total_allocated"] += pa.allocated_capital
-                pairs_data[pair_name]["total_used"] += pa.used_capital
-                pairs_data[pair_name]["total_available"] += (pa.allocated_capital - pa.used_capital)
-                pairs_data[pair_name]["total_realized_pnl"] += pa.realized_pnl
-                pairs_data[pair_name]["total_floating_pnl"] += pa.floating_pnl
-                pairs_data[pair_name]["strategies_count"] += 1
-                pairs_data[pair_name]["strategies"].append({
-                    "strategy_name": strategy.strategy_name,
-                    "allocated": float(pa.allocated_capital),
-                    "used": float(pa.used_capital),
-                    "realized_pnl": float(pa.realized_pnl),
-                    "floating_pnl": float(pa.floating_pnl),
-                    "risk_breached": pa.risk_breached
-                })
+            for strategy in portfolio["strategies"]:
+                for pa in strategy["pairs"]:
+                    pair_name = pa["pair"]
+                    
+                    if pair_name not in pairs_data:
+                        pairs_data[pair_name] = {
+                            "pair": pair_name,
+                            "total_allocated": Decimal('0'),
+                            "total_used": Decimal('0'),
+                            "total_available": Decimal('0'),
+                            "total_realized_pnl": Decimal('0'),
+                            "total_floating_pnl": Decimal('0'),
+                            "strategies_count": 0,
+                            "strategies": []
+                        }
+                    
+                    pairs_data[pair_name]["total_allocated"] += pa["allocated_capital"]
+                    pairs_data[pair_name]["total_used"] += pa["used_capital"]
+                    pairs_data[pair_name]["total_available"] += (pa["allocated_capital"] - pa["used_capital"])
+                    pairs_data[pair_name]["total_realized_pnl"] += pa["realized_pnl"]
+                    pairs_data[pair_name]["total_floating_pnl"] += pa["floating_pnl"]
+                    pairs_data[pair_name]["strategies_count"] += 1
+                    pairs_data[pair_name]["strategies"].append({
+                        "strategy_name": strategy["strategy_name"],
+                        "allocated": float(pa["allocated_capital"]),
+                        "used": float(pa["used_capital"]),
+                        "realized_pnl": float(pa["realized_pnl"]),
+                        "floating_pnl": float(pa["floating_pnl"]),
+                        "risk_breached": pa["risk_breached"]
+                    })
             
             # Convert to list and add percentages
             result = []
@@ -783,7 +692,7 @@ class CapitalAllocationService:
                     "total_allocated": total_allocated,
                     "total_used": float(data["total_used"]),
                     "total_available": float(data["total_available"]),
-                    "allocation_percentage": (total_allocated / float(portfolio.total_capital) * 100) if portfolio.total_capital > 0 else 0,
+                    "allocation_percentage": (total_allocated / portfolio_capital * 100) if portfolio_capital > 0 else 0,
                     "utilization_percentage": (float(data["total_used"]) / total_allocated * 100) if total_allocated > 0 else 0,
                     "total_realized_pnl": float(data["total_realized_pnl"]),
                     "total_floating_pnl": float(data["total_floating_pnl"]),
@@ -855,6 +764,22 @@ class CapitalAllocationService:
             return {"error": str(e)}
     
     
+    def _get_portfolio_snapshot(self, user_id: str) -> Optional[Dict]:
+        """Cached dashboard snapshot of the user's portfolio (built from one query when missing)"""
+        return portfolio_snapshot_cache.get(user_id, lambda: self._get_portfolio_tree(user_id))
+    
+    def _allocations_changed(self, user_id: Optional[str] = None, pair: Optional[str] = None,
+                             strategy_name: Optional[str] = None):
+        """Drop cached risk entries and dashboard snapshots after allocations were written"""
+        risk_ledger.invalidate(pair, strategy_name)
+        portfolio_snapshot_cache.invalidate(user_id)
+    
+    def _get_portfolio_tree(self, user_id: str) -> Optional[PortfolioEntity]:
+        """Portfolio with its strategy and pair allocations, loaded in one query"""
+        return self.db.query(PortfolioEntity).options(
+            joinedload(PortfolioEntity.strategy_allocations).joinedload(StrategyAllocationEntity.pair_allocations)
+        ).filter(PortfolioEntity.user_id == user_id).first()
+    
     def _get_pair_allocation(self, pair: str, strategy_name: str) -> Optional[PairAllocationEntity]:
         """Get pair allocation entity"""
         if not self.db:
@@ -889,27 +814,24 @@ class CapitalAllocationService:
             if not self.mt5_manager.is_terminal_connected():
                 return Decimal('0.01')  # Default fallback
             
-            symbol_info = mt5.symbol_info(pair)
-            if not symbol_info:
+            # Cached symbol spec - no terminal round trip per sizing request
+            spec = symbol_info_cache.get(pair)
+            if not spec or spec.pip_value <= 0:
                 return Decimal('0.01')
             
             # Calculate risk amount
             risk_amount = allocated_capital * (risk_percent / 100)
             
-            # For gold (XAUUSD), typical pip value is $1 per 0.01 lot
-            # For forex pairs, pip value varies
+            # Exact pip value per 1.0 lot from the symbol's tick size/value
+            pip_value = Decimal(str(spec.pip_value))
             if 'XAU' in pair:
-                pip_value = Decimal('1.0')  # $1 per pip for 0.01 lot
-                stop_loss_pips = Decimal('100')  # Assume 100 pip stop loss
+                # Assume a $100 stop (the old "100 pips" of $1.00), counted in the symbol's own pips
+                stop_loss_pips = Decimal('100') / Decimal(str(spec.pip_size))
             else:
-                pip_value = Decimal('0.1')  # $0.1 per pip for 0.01 lot (major pairs)
                 stop_loss_pips = Decimal('50')  # Assume 50 pip stop loss
             
-            # Calculate lot size: risk_amount / (stop_loss_pips * pip_value * 100)
-            lot_size = risk_amount / (stop_loss_pips * pip_value * 100)
-            
-            # Round to 2 decimal places and ensure minimum
-            lot_size = max(Decimal('0.01'), round(lot_size, 2))
+            # Calculate lot size: risk_amount / (stop_loss_pips * pip_value), snapped to the volume step
+            lot_size = Decimal(str(spec.normalize_volume(float(risk_amount / (stop_loss_pips * pip_value)))))
             
             logger.info(f"Calculated lot size for {pair}: {lot_size} (Capital: ${allocated_capital}, Risk: {risk_percent}%)")
             return lot_size
@@ -1001,6 +923,7 @@ class CapitalAllocationService:
                 logger.info(f"Removed ${trade_amount} from used capital for {pair} in {strategy_name}")
             
             self.db.commit()
+            self._allocations_changed(user_id, pair, strategy_name)
             
             return {
                 "success": True,
@@ -30,6 +30,7 @@ class EnhancedGoldBuyDipStrategy(BaseStrategy):
             use_grid_percent=config.get('use_grid_percent', True),
             grid_atr_multiplier=config.get('grid_atr_multiplier', 1.0),
             atr_period=config.get('atr_period', 14),
+            atr_mode=config.get('atr_mode', 'sma'),
             grid_lot_multiplier=config.get('grid_lot_multiplier', 1.0),
             use_progressive_lots=config.get('use_progressive_lots', False),
             lot_progression_factor=config.get('lot_progression_factor', 1.2),
@@ -82,10 +83,22 @@ class EnhancedGoldBuyDipStrategy(BaseStrategy):
         
         return self.strategy.process_tick(candle, Decimal('0.00'), Decimal('0.00'))
     
+    def warm_up(self, rates) -> int:
+        """Preload indicators from historical MT5 rates"""
+        return self.strategy.warm_up(rates)
+    
     def reset_strategy(self):
         """Reset strategy state"""
         self.strategy.reset_strategy()
     
+    def on_bar_update(self, candle):
+        """Forward intrabar updates to the underlying strategy"""
+        return self.strategy.on_bar_update(candle)
+    
+    def release_indicators(self):
+        """Release shared indicators held by the underlying strategy"""
+        self.strategy.release_indicators()
+    
     def get_status(self) -> dict:
         """Get current strategy status"""
         return {
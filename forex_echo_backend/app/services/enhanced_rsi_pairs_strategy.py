@@ -1,5 +1,6 @@
 """Enhanced RSI Pairs Strategy with BaseStrategy interface"""
 
+from typing import List
 from app.services.rsi_pairs_strategy import RSIPairsStrategy
 from app.core.strategy_manager import BaseStrategy
 from app.models.strategy_models import RSIPairsConfig
@@ -22,7 +23,9 @@ class EnhancedRSIPairsStrategy(BaseStrategy):
             symbol1=config.get('symbol1', pair),
             symbol2=config.get('symbol2', pair),  # Use same pair as default, user must specify symbol2
             rsi_period=config.get('rsi_period', 14),
+            rsi_mode=config.get('rsi_mode', 'sma'),
             atr_period=config.get('atr_period', 5),
+            atr_mode=config.get('atr_mode', 'sma'),
             rsi_overbought=config.get('rsi_overbought', 75.0),
             rsi_oversold=config.get('rsi_oversold', 25.0),
             profit_target_usd=config.get('profit_target_usd', 500.0),
@@ -41,15 +44,32 @@ class EnhancedRSIPairsStrategy(BaseStrategy):
         self.strategy = RSIPairsStrategy(rsi_config, pair, timeframe, db_session)
         logger.info(f"Enhanced RSI Pairs Strategy initialized for {timeframe}")
     
+    @classmethod
+    def warm_up_symbols(cls, config: dict, pair: str) -> List[str]:
+        """Both legs of the pair, so the second leg's RSI does not start cold"""
+        return list(dict.fromkeys([pair, config.get('symbol1', pair), config.get('symbol2', pair)]))
+    
     def process_tick(self, candle, current_equity: float = 0):
         """Process market tick using underlying strategy"""
         from decimal import Decimal
         return self.strategy.process_tick(candle, Decimal('0.00'), Decimal('0.00'))
     
+    def warm_up(self, rates, symbol: str = None) -> int:
+        """Preload indicators for a symbol (default: task pair) from historical MT5 rates"""
+        return self.strategy.warm_up(symbol or self.pair, rates)
+    
     def reset_strategy(self):
         """Reset strategy state"""
         self.strategy.reset_strategy()
     
+    def on_bar_update(self, candle):
+        """Forward intrabar updates to the underlying strategy"""
+        return self.strategy.on_bar_update(candle)
+    
+    def release_indicators(self):
+        """Release shared indicators held by the underlying strategy"""
+        self.strategy.release_indicators()
+    
     def get_status(self) -> dict:
         """Get current strategy status"""
         status = self.strategy.get_strategy_status()
@@ -4,8 +4,9 @@ from decimal import Decimal
 from sqlalchemy.orm import Session
 from app.models.trading_models import MarketData, TradeSignal, TradeDirection, SetupState
 from app.models.strategy_models import GoldBuyDipConfig, GoldBuyDipState
-from app.indicators.zscore import calculate_zscore
-from app.indicators.atr import calculate_atr
+from app.indicators.batch import rates_to_columns
+from app.core.candle_buffer import CandleBuffer
+from app.services.indicator_cache import indicator_cache
 from app.utilities.forex_logger import forex_logger
 from app.services.strategy_performance_tracker import StrategyPerformanceTracker
 from app.services.base_strategy import BaseStrategy
@@ -17,7 +18,11 @@ class GoldBuyDipStrategy(BaseStrategy):
         super().__init__(pair, timeframe, "gold_buy_dip", db)
         self.config = config
         self.state = GoldBuyDipState()
-        self.candles: List[MarketData] = []
+        self.candles = CandleBuffer(self._max_candles_needed())
+        # Indicators are shared with other tasks on the same pair/timeframe/params
+        self.rolling_zscore = indicator_cache.acquire(self, pair, timeframe, "zscore", config.zscore_period)
+        self.rolling_atr = indicator_cache.acquire(self, pair, timeframe, "atr", config.atr_period, config.atr_mode)
+        self.close_extrema = indicator_cache.acquire(self, pair, timeframe, "extrema", config.lookback_candles)
         self.performance_tracker = StrategyPerformanceTracker(timeframe)
         
         # Capital allocation integration
@@ -26,23 +31,41 @@ class GoldBuyDipStrategy(BaseStrategy):
         self._initialize_capital_allocation()
     
     def add_candle(self, candle: MarketData):
-        self.candles.append(candle)
-        max_needed = max(self.config.lookback_candles, self.config.zscore_period, self.config.atr_period) + 10
-        if len(self.candles) > max_needed:
-            self.candles = self.candles[-max_needed:]
+        self.candles.append_candle(candle)
+        self.rolling_zscore.update(candle.timestamp, candle.close)
+        self.rolling_atr.update(candle.timestamp, candle.high, candle.low, candle.close)
+        self.close_extrema.update(candle.timestamp, candle.close)
+    
+    def _max_candles_needed(self) -> int:
+        # Lookback extrema are tracked incrementally, so history no longer scales with lookback_candles
+        return max(self.config.zscore_period, self.config.atr_period) + 10
+    
+    def warm_up(self, rates) -> int:
+        """Load indicator state from historical MT5 rates without evaluating signals."""
+        columns = rates_to_columns(rates)
+        closes = columns['close']
+        if closes.size == 0:
+            return 0
+        
+        last_timestamp = int(columns['timestamp'][-1])
+        self.rolling_zscore.warm_up(last_timestamp, closes)
+        self.rolling_atr.warm_up(last_timestamp, columns['high'], columns['low'], closes)
+        self.close_extrema.warm_up(last_timestamp, closes)
+        
+        self.candles.clear()
+        self.candles.extend(columns)
+        logger.info(f"Warmed up {self.pair} {self.timeframe} with {len(closes)} historical candles")
+        return len(closes)
     
     def check_percentage_trigger(self) -> Optional[TradeDirection]:
         # Fully dynamic: Use exactly what user configured
-        if len(self.candles) < self.config.lookback_candles:
+        if not self.close_extrema.full:
             return None
         
-        # Use exact user-configured lookback period
-        lookback_count = self.config.lookback_candles
-        
-        recent_candles = self.candles[-lookback_count:]
-        highest_high = max(c.close for c in recent_candles)
-        lowest_low = min(c.close for c in recent_candles)
-        current_price = self.candles[-1].close
+        # Rolling extrema over the exact user-configured lookback period
+        highest_high = self.close_extrema.max
+        lowest_low = self.close_extrema.min
+        current_price = self.candles.last('close')
         
         pct_from_low = ((current_price - lowest_low) / lowest_low) * 100
         if pct_from_low >= self.config.percentage_threshold:
@@ -55,11 +78,11 @@ class GoldBuyDipStrategy(BaseStrategy):
         return None
     
     def check_zscore_confirmation(self) -> bool:
-        if len(self.candles) < self.config.zscore_period:
+        if not self.rolling_zscore.ready:
             return False
         
-        closes = [c.close for c in self.candles]
-        zscore = calculate_zscore(closes, self.config.zscore_period)
+        # Z-score is computed once per candle in add_candle
+        zscore = self.rolling_zscore.value
         
         if self.state.trigger_direction == TradeDirection.SELL:
             return zscore >= self.config.zscore_threshold_sell
@@ -70,11 +93,10 @@ class GoldBuyDipStrategy(BaseStrategy):
     
     def calculate_grid_spacing(self) -> float:
         if self.config.use_grid_percent:
-            last_price = self.candles[-1].close
+            last_price = self.candles.last('close')
             return last_price * (self.config.grid_percent / 100)
         else:
-            atr = calculate_atr(self.candles, self.config.atr_period)
-            return atr * self.config.grid_atr_multiplier
+            return self.rolling_atr.value * self.config.grid_atr_multiplier
     
     def calculate_grid_lot_size(self, grid_level: int) -> float:
         if self.config.use_progressive_lots:
@@ -131,6 +153,25 @@ class GoldBuyDipStrategy(BaseStrategy):
         
         return False
     
+    def _close_grid(self) -> TradeSignal:
+        """Close all grid trades and wait for the next trigger"""
+        self.state.setup_state = SetupState.WAITING_FOR_TRIGGER
+        total_trades = len(self.state.grid_trades)
+        self.state.grid_trades.clear()
+        
+        return TradeSignal(
+            action="CLOSE_ALL",
+            lot_size=0,
+            reason=f"Grid exit: {total_trades} trades closed"
+        )
+    
+    def _process_forming_bar(self, candle: MarketData) -> Optional[TradeSignal]:
+        """Intrabar mode: take the grid profit as soon as the forming bar reaches it"""
+        if (self.state.setup_state == SetupState.TRADE_EXECUTED and self.config.use_grid_trading
+                and self.check_grid_exit_conditions(candle.close)):
+            return self._close_grid()
+        return None
+    
     def _check_strategy_drawdown(self) -> bool:
         """Check if strategy-specific maximum drawdown is exceeded."""
         if self.state.initial_balance == 0:
@@ -162,18 +203,16 @@ class GoldBuyDipStrategy(BaseStrategy):
         atr = 0
         price_movement_score = 0
         
-        if len(self.candles) >= self.config.zscore_period:
-            closes = [c.close for c in self.candles]
-            zscore = calculate_zscore(closes, self.config.zscore_period)
+        if self.rolling_zscore.ready:
+            zscore = self.rolling_zscore.value
         
-        if len(self.candles) >= self.config.atr_period:
-            atr = calculate_atr(self.candles, self.config.atr_period)
+        if self.rolling_atr.ready:
+            atr = self.rolling_atr.value
         
         # Use configured candles for price movement calculation
-        if len(self.candles) >= self.config.lookback_candles:
-            recent_candles = self.candles[-self.config.lookback_candles:]
-            highest_high = max(c.close for c in recent_candles)
-            lowest_low = min(c.close for c in recent_candles)
+        if self.close_extrema.full:
+            highest_high = self.close_extrema.max
+            lowest_low = self.close_extrema.min
             price_range = highest_high - lowest_low
             if price_range > 0:
                 price_movement_score = ((candle.close - lowest_low) / price_range) * 100
@@ -254,17 +293,7 @@ class GoldBuyDipStrategy(BaseStrategy):
         elif self.state.setup_state == SetupState.TRADE_EXECUTED:
             # Check grid exit conditions first
             if self.config.use_grid_trading and self.check_grid_exit_conditions(candle.close):
-                # Close all grid trades
-                self.state.setup_state = SetupState.WAITING_FOR_TRIGGER
-                total_trades = len(self.state.grid_trades)
-                self.state.grid_trades.clear()
-                
-                signal = TradeSignal(
-                    action="CLOSE_ALL",
-                    lot_size=0,
-                    reason=f"Grid exit: {total_trades} trades closed"
-                )
-                return signal
+                return self._close_grid()
             
             # Handle adding new grid trades
             if self.config.use_grid_trading and len(self.state.grid_trades) < self.config.max_grid_trades:
@@ -332,19 +361,17 @@ class GoldBuyDipStrategy(BaseStrategy):
                                     price_movement_score: float, drawdown_pct: float):
         """Log market data following forex standards - trade from available data."""
         # Forex standard: Use available candles (minimum 20 for Z-score)
-        if len(self.candles) < self.config.zscore_period:
+        if not self.rolling_zscore.ready:
             return
             
-        # Log 50 candles with signal (show all candles like before)
-        recent_candles = self.candles[-50:] if len(self.candles) >= 50 else self.candles
-        
         # Use simple CSV logger for signal logging
+        latest = self.candles[-1]
         candle_data = {
-            'timestamp': recent_candles[-1].timestamp,
-            'open': recent_candles[-1].open,
-            'high': recent_candles[-1].high,
-            'low': recent_candles[-1].low,
-            'close': recent_candles[-1].close
+            'timestamp': latest['timestamp'],
+            'open': latest['open'],
+            'high': latest['high'],
+            'low': latest['low'],
+            'close': latest['close']
         }
         
         indicators = {
@@ -382,22 +409,16 @@ class GoldBuyDipStrategy(BaseStrategy):
         logger.info(f"Position size calculated: {adjusted_lot_size} (Capital: ${self.allocated_capital})")
         return adjusted_lot_size
     
-    def check_capital_allocation_risk(self) -> bool:
-        """Check if strategy should stop due to capital allocation risk"""
-        if not self.can_trade():
-            logger.warning(f"Trading blocked by capital allocation for {self.pair}")
-            return True
-        
-        risk_status = self.get_risk_status()
-        if risk_status and risk_status.get('risk_breached', False):
-            logger.critical(f"Risk breached for {self.pair} - stopping strategy")
-            return True
-        
-        return False
-    
     def reset_strategy(self):
         """Reset strategy state."""
         logger.info("Resetting strategy state")
         self.state = GoldBuyDipState()
         self.candles.clear()
-        self._initialize_capital_allocation()
\ No newline at end of file
+        self.rolling_zscore.reset()
+        self.rolling_atr.reset()
+        self.close_extrema.reset()
+        self._initialize_capital_allocation()
+    
+    def release_indicators(self):
+        """Unsubscribe from shared indicators so unused ones can be evicted."""
+        indicator_cache.release(self)
\ No newline at end of file
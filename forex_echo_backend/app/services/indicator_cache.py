@@ -0,0 +1,141 @@
+"""Process-wide registry of streaming indicators shared between trading tasks"""
+
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+from app.indicators.rsi import StreamingRSI
+from app.indicators.atr import StreamingATR
+from app.indicators.ema import StreamingEMA
+from app.indicators.zscore import RollingZScore
+from app.indicators.rolling import RollingExtrema
+from app.utilities.forex_logger import forex_logger
+
+logger = forex_logger.get_logger(__name__)
+
+INDICATOR_TYPES = {
+    "rsi": StreamingRSI,
+    "atr": StreamingATR,
+    "ema": StreamingEMA,
+    "zscore": RollingZScore,
+    "extrema": RollingExtrema,
+}
+
+IndicatorKey = Tuple[str, str, str, Tuple[Any, ...]]
+
+class SharedIndicator:
+    """Streaming indicator shared by every task trading the same symbol/timeframe/params.
+    
+    Updates are keyed by closed-bar timestamp: the first subscriber to deliver
+    a bar computes the new value and later deliveries of the same bar (or an
+    older one) reuse it, so each bar costs one O(1) indicator update.
+    Attribute reads (value, ready, max, ...) go to the wrapped indicator.
+    Subscribers are held weakly, so owners that are never released do not
+    keep the indicator alive.
+    """
+    
+    def __init__(self, key: IndicatorKey, indicator):
+        self.key = key
+        self.indicator = indicator
+        self.last_timestamp: Optional[int] = None
+        self.subscribers = weakref.WeakSet()
+        self._lock = threading.Lock()
+    
+    def _apply(self, values: Tuple[Any, ...]):
+        update = getattr(self.indicator, 'update', None) or self.indicator.push
+        return update(*values)
+    
+    def _current(self):
+        return self.indicator.value if hasattr(self.indicator, 'value') else None
+    
+    def update(self, timestamp: Optional[int], *values):
+        """Feed one closed bar; bars already seen are not recomputed."""
+        with self._lock:
+            if timestamp is None:
+                return self._apply(values)
+            if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                return self._current()
+            self.last_timestamp = timestamp
+            return self._apply(values)
+    
+    def warm_up(self, timestamp: Optional[int], *series):
+        """Rebuild from history ending at `timestamp` unless live bars already cover it."""
+        with self._lock:
+            if timestamp is not None and self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                return
+            self.indicator.warm_up(*series)
+            self.last_timestamp = timestamp
+    
+    def reset(self):
+        """Reset the indicator, but only while a single task is using it."""
+        with self._lock:
+            if len(self.subscribers) > 1:
+                logger.debug(f"Skipping reset of shared indicator {self.key}: {len(self.subscribers)} subscribers")
+                return
+            self.indicator.reset()
+            self.last_timestamp = None
+    
+    def __getattr__(self, name):
+        return getattr(self.indicator, name)
+
+class IndicatorCache:
+    """Hands out shared indicators keyed by (symbol, timeframe, indicator, params)"""
+    
+    _instance = None
+    _lock = threading.Lock()
+    
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.entries: Dict[IndicatorKey, SharedIndicator] = {}
+            self.registry_lock = threading.Lock()
+            self.initialized = True
+            logger.info("IndicatorCache initialized")
+    
+    def acquire(self, owner: object, symbol: str, timeframe: str, indicator: str, *params) -> SharedIndicator:
+        """Subscribe `owner` to an indicator, creating it on first use"""
+        if indicator not in INDICATOR_TYPES:
+            raise ValueError(f"Unsupported indicator: {indicator}")
+        
+        key = (symbol, timeframe, indicator, tuple(params))
+        with self.registry_lock:
+            self._evict_unused()
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = SharedIndicator(key, INDICATOR_TYPES[indicator](*params))
+                self.entries[key] = entry
+                logger.debug(f"Created shared indicator {key}")
+            entry.subscribers.add(owner)
+            return entry
+    
+    def release(self, owner: object):
+        """Drop every subscription of `owner` and evict indicators nobody uses anymore"""
+        with self.registry_lock:
+            for entry in self.entries.values():
+                entry.subscribers.discard(owner)
+            self._evict_unused()
+    
+    def _evict_unused(self):
+        # Subscribers that were garbage collected without release() have already left their WeakSets
+        for key, entry in list(self.entries.items()):
+            if not entry.subscribers:
+                del self.entries[key]
+                logger.debug(f"Evicted shared indicator {key}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Shared indicator counts for monitoring"""
+        with self.registry_lock:
+            self._evict_unused()
+            return {
+                'indicators': len(self.entries),
+                'subscriptions': sum(len(entry.subscribers) for entry in self.entries.values()),
+                'shared': sum(1 for entry in self.entries.values() if len(entry.subscribers) > 1)
+            }
+
+# Global instance
+indicator_cache = IndicatorCache()
\ No newline at end of file
@@ -0,0 +1,271 @@
+"""Shared market data feed - one MT5 poller per (symbol, timeframe) fanning out to subscribers"""
+
+from app.services.mt5_gateway import mt5
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+from app.models.trading_models import Bar, BarEvent, BAR_CLOSED, BAR_UPDATE
+from app.indicators.batch import rates_to_bars
+from app.core.bar_scheduler import BarCloseSchedule
+from app.utilities.forex_logger import forex_logger
+
+logger = forex_logger.get_logger(__name__)
+
+# Timeframe key -> (MT5 constant name, bar length in seconds)
+TIMEFRAMES = {
+    "1M": ("TIMEFRAME_M1", 60),
+    "5M": ("TIMEFRAME_M5", 300),
+    "15M": ("TIMEFRAME_M15", 900),
+    "1H": ("TIMEFRAME_H1", 3600),
+    "4H": ("TIMEFRAME_H4", 14400),
+    "1D": ("TIMEFRAME_D1", 86400),
+}
+
+FeedKey = Tuple[str, str]
+
+SERVER_OFFSET_STEP = 900  # Broker UTC offsets are whole quarter hours
+SERVER_OFFSET_TOLERANCE = 120.0  # A tick further off the step than this is stale (market closed)
+SERVER_OFFSET_MAX_AGE = 3600.0  # Re-read hourly to pick up DST changes
+
+class FeedSubscription:
+    """Queue of bar events for one subscriber of a (symbol, timeframe) feed.
+    
+    BAR_CLOSED events are always delivered; with intrabar=True BAR_UPDATE
+    events for the forming bar are delivered too. An update that has not been
+    consumed yet is replaced in place by a newer update of the same bar, so a
+    slow subscriber never processes stale intrabar data.
+    """
+    
+    def __init__(self, feed: 'MarketDataFeed', symbol: str, timeframe: str,
+                 maxsize: int = 100, intrabar: bool = False):
+        self.feed = feed
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.intrabar = intrabar
+        self.events: deque = deque(maxlen=maxsize)
+        self.condition = threading.Condition()
+        self.dropped = 0
+        self.coalesced = 0
+        self.on_publish: Optional[Callable[[], None]] = None  # Wake-up hook for non-blocking consumers
+    
+    def publish(self, event: BarEvent):
+        """Called by the poller; drops the oldest event when the subscriber falls behind."""
+        with self.condition:
+            if (event.kind == BAR_UPDATE and self.events and self.events[-1].kind == BAR_UPDATE
+                    and self.events[-1].bar.timestamp == event.bar.timestamp):
+                self.events[-1] = event
+                self.coalesced += 1
+            else:
+                if len(self.events) == self.events.maxlen:
+                    self.dropped += 1
+                self.events.append(event)
+            self.condition.notify()
+        if self.on_publish is not None:
+            self.on_publish()
+    
+    def get(self, timeout: Optional[float] = None) -> Optional[BarEvent]:
+        """Next event, or None if nothing arrived within `timeout` seconds."""
+        with self.condition:
+            if not self.events and not self.condition.wait_for(lambda: self.events, timeout):
+                return None
+            return self.events.popleft()
+    
+    def pending(self) -> int:
+        with self.condition:
+            return len(self.events)
+    
+    def close(self):
+        self.feed.unsubscribe(self)
+
+class MarketDataFeed:
+    """Polls MT5 once per (symbol, timeframe) and publishes bars to every subscriber.
+    
+    Each poller sleeps until the next bar close of its timeframe and then
+    publishes the closed bar (position 1). While any subscriber asked for
+    intrabar updates, the forming bar (position 0) is also polled every
+    `intrabar_interval` seconds. Bar closes follow the broker's server
+    clock, whose UTC offset is read from tick times. The MT5 module is injectable so the feed can
+    run against a fake terminal.
+    """
+    
+    def __init__(self, mt5_module=None, intrabar_interval: float = 10.0, close_grace: float = 1.0):
+        self.mt5 = mt5_module if mt5_module is not None else mt5
+        self.intrabar_interval = intrabar_interval
+        self.close_grace = close_grace
+        self.subscribers: Dict[FeedKey, List[FeedSubscription]] = {}
+        self.pollers: Dict[FeedKey, threading.Thread] = {}
+        self.wake_events: Dict[FeedKey, threading.Event] = {}
+        self.last_bars: Dict[FeedKey, Bar] = {}
+        self.last_closed: Dict[FeedKey, Bar] = {}
+        self.server_offset = 0.0  # Broker server time minus UTC, in seconds
+        self.server_offset_checked_at = float('-inf')
+        self.feed_lock = threading.Lock()
+        self.stats = {'polls': 0, 'published': 0, 'errors': 0}
+    
+    def get_mt5_timeframe(self, timeframe: str):
+        """Convert timeframe string to MT5 constant (M15 for unknown keys, as the engine does)"""
+        constant_name, _ = TIMEFRAMES.get(timeframe, TIMEFRAMES["15M"])
+        return getattr(self.mt5, constant_name)
+    
+    def get_bar_seconds(self, timeframe: str) -> int:
+        _, bar_seconds = TIMEFRAMES.get(timeframe, TIMEFRAMES["15M"])
+        return bar_seconds
+    
+    def subscribe(self, symbol: str, timeframe: str, maxsize: int = 100, intrabar: bool = False,
+                  on_publish: Optional[Callable[[], None]] = None) -> FeedSubscription:
+        """Subscribe to bars for a symbol/timeframe, starting its poller if needed"""
+        key = (symbol, timeframe)
+        subscription = FeedSubscription(self, symbol, timeframe, maxsize, intrabar)
+        subscription.on_publish = on_publish
+        with self.feed_lock:
+            self.subscribers.setdefault(key, []).append(subscription)
+            # Late subscribers start from the last closed bar everyone else saw
+            if key in self.last_closed:
+                subscription.publish(BarEvent(BAR_CLOSED, self.last_closed[key]))
+            poller = self.pollers.get(key)
+            if poller is None or not poller.is_alive():
+                self.wake_events[key] = threading.Event()
+                poller = threading.Thread(target=self._poll_loop, args=(key,),
+                                          name=f"feed-{symbol}-{timeframe}", daemon=True)
+                self.pollers[key] = poller
+                poller.start()
+                logger.info(f"Market data poller started: {symbol} {timeframe}")
+            elif intrabar:
+                # A poller sleeping until the next close has to start intrabar polling now
+                self.wake_events[key].set()
+        return subscription
+    
+    def unsubscribe(self, subscription: FeedSubscription):
+        """Remove a subscriber; the poller exits once its feed has none left"""
+        key = (subscription.symbol, subscription.timeframe)
+        with self.feed_lock:
+            subscribers = self.subscribers.get(key, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                self.subscribers.pop(key, None)
+                self.last_bars.pop(key, None)
+                self.last_closed.pop(key, None)
+                if key in self.wake_events:
+                    self.wake_events[key].set()
+    
+    def _has_intrabar_subscribers(self, key: FeedKey) -> bool:
+        with self.feed_lock:
+            return any(subscription.intrabar for subscription in self.subscribers.get(key, []))
+    
+    def _poll_loop(self, key: FeedKey):
+        symbol, timeframe = key
+        schedule = BarCloseSchedule(self.get_bar_seconds(timeframe), grace=self.close_grace)
+        wake_event = self.wake_events[key]
+        next_close_poll = 0.0
+        next_intrabar_poll = 0.0
+        
+        while True:
+            with self.feed_lock:
+                if not self.subscribers.get(key):
+                    self.pollers.pop(key, None)
+                    self.wake_events.pop(key, None)
+                    break
+            
+            now = time.time()
+            intrabar = False
+            try:
+                if now >= next_close_poll:
+                    got_closed_bar = self.poll_closed(key) is not None
+                    schedule.offset = self.get_server_offset(symbol)
+                    next_close_poll = schedule.next_wake(time.time(), got_closed_bar)
+                
+                intrabar = self._has_intrabar_subscribers(key)
+                if intrabar and now >= next_intrabar_poll:
+                    self.poll_forming(key)
+                    next_intrabar_poll = now + self.intrabar_interval
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Market data poll failed for {symbol} {timeframe}: {e}")
+                next_close_poll = schedule.next_wake(time.time(), False)
+            
+            wake_at = min(next_close_poll, next_intrabar_poll) if intrabar else next_close_poll
+            wake_event.wait(max(0.0, wake_at - time.time()))
+            wake_event.clear()
+        
+        logger.info(f"Market data poller stopped: {symbol} {timeframe}")
+    
+    def get_server_offset(self, symbol: str) -> float:
+        """Broker clock minus UTC in seconds, estimated from the last tick time of `symbol`"""
+        now = time.time()
+        if now - self.server_offset_checked_at < SERVER_OFFSET_MAX_AGE:
+            return self.server_offset
+        
+        tick = self.mt5.symbol_info_tick(symbol)
+        if tick:
+            difference = tick.time - now
+            offset = round(difference / SERVER_OFFSET_STEP) * SERVER_OFFSET_STEP
+            # A stale tick (closed market) says nothing about the offset - keep the last one and ask again
+            if abs(difference - offset) <= SERVER_OFFSET_TOLERANCE:
+                if offset != self.server_offset:
+                    logger.info(f"Broker server time offset: {offset / 3600:+g}h")
+                self.server_offset = offset
+                self.server_offset_checked_at = now
+        return self.server_offset
+    
+    def _fetch_bar(self, key: FeedKey, position: int) -> Optional[Bar]:
+        symbol, timeframe = key
+        if not self.mt5.terminal_info():
+            return None
+        
+        rates = self.mt5.copy_rates_from_pos(symbol, self.get_mt5_timeframe(timeframe), position, 1)
+        self.stats['polls'] += 1
+        if rates is None or len(rates) == 0:
+            return None
+        return rates_to_bars(rates)[-1]
+    
+    def _publish(self, key: FeedKey, event: BarEvent):
+        with self.feed_lock:
+            subscribers = [subscription for subscription in self.subscribers.get(key, [])
+                           if subscription.intrabar or event.kind == BAR_CLOSED]
+        for subscription in subscribers:
+            subscription.publish(event)
+        self.stats['published'] += 1
+    
+    def poll_closed(self, key: FeedKey) -> Optional[Bar]:
+        """Fetch the last closed bar and publish it to everyone if it is new"""
+        bar = self._fetch_bar(key, 1)
+        if bar is None:
+            return None
+        
+        with self.feed_lock:
+            last = self.last_closed.get(key)
+            if last is not None and bar.timestamp <= last.timestamp:
+                return None
+            self.last_closed[key] = bar
+        
+        self._publish(key, BarEvent(BAR_CLOSED, bar))
+        return bar
+    
+    def poll_forming(self, key: FeedKey) -> Optional[Bar]:
+        """Fetch the forming bar and publish it to intrabar subscribers if it changed"""
+        bar = self._fetch_bar(key, 0)
+        if bar is None:
+            return None
+        
+        with self.feed_lock:
+            last = self.last_closed.get(key)
+            if self.last_bars.get(key) == bar or (last is not None and bar.timestamp <= last.timestamp):
+                return None
+            self.last_bars[key] = bar
+        
+        self._publish(key, BarEvent(BAR_UPDATE, bar))
+        return bar
+    
+    def get_stats(self) -> Dict:
+        """Feed counts for monitoring"""
+        with self.feed_lock:
+            return {
+                'feeds': len(self.subscribers),
+                'subscribers': sum(len(subs) for subs in self.subscribers.values()),
+                **self.stats
+            }
+
+# Global instance
+market_data_feed = MarketDataFeed()
\ No newline at end of file
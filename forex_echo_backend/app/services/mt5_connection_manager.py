@@ -1,7 +1,6 @@
-try:
-    import MetaTrader5 as mt5
-except ImportError:
-    mt5 = None
+from app.services.mt5_gateway import mt5
+from app.services.mt5_connection_state import mt5_connection_state
+from app.services.symbol_info_cache import symbol_info_cache
 import threading
 import time
 from typing import Optional, Dict, List
@@ -58,6 +57,7 @@ class MT5ConnectionManager:
                     mt5.shutdown()
                 except:
                     pass
+                mt5_connection_state.invalidate()
                 
                 # Initialize MT5 fresh
                 if not mt5.initialize():
@@ -117,7 +117,12 @@ class MT5ConnectionManager:
                         logger.error(self.last_error)
                         return False
                 
-                # Success - mark as connected
+                # Success - mark as connected and share the fresh state with every reader
+                mt5_connection_state.publish(terminal_info, account_info)
+                try:
+                    symbol_info_cache.load()
+                except Exception as e:
+                    logger.warning(f"Could not load symbol info: {e}")
                 self.is_connected = True
                 self.last_error = None
                 logger.info(f"MT5 connected successfully to account {account_info.login}")
@@ -138,6 +143,7 @@ class MT5ConnectionManager:
                     mt5.shutdown()
                 except:
                     pass
+                mt5_connection_state.invalidate()
                 self.is_connected = False
                 self.connection_params = {}
                 return False
@@ -149,23 +155,25 @@ class MT5ConnectionManager:
                 self.auto_reconnect = False
                 if self.is_connected:
                     mt5.shutdown()
+                    mt5_connection_state.invalidate()
+                    symbol_info_cache.clear()
                     self.is_connected = False
                     logger.info("MT5 disconnected")
                 
             except Exception as e:
                 logger.error(f"MT5 disconnect error: {e}")
     
-    def is_terminal_connected(self) -> bool:
-        """Check if MT5 terminal is connected with valid account"""
+    def is_terminal_connected(self, max_age: Optional[float] = None) -> bool:
+        """Check if MT5 terminal is connected with valid account (max_age=0 bypasses the cached state)"""
         try:
-            terminal_info = mt5.terminal_info()
-            if not terminal_info or not terminal_info.connected:
+            state = mt5_connection_state.get(max_age)
+            if not state.connected:
                 self.is_connected = False
                 return False
             
             # If credentials were provided, verify account is still logged in
             if self.connection_params:
-                account_info = mt5.account_info()
+                account_info = state.account_info
                 if not account_info or account_info.login != self.connection_params['login']:
                     self.is_connected = False
                     logger.warning("MT5 account login lost")
@@ -182,8 +190,9 @@ class MT5ConnectionManager:
     def get_connection_status(self) -> Dict:
         """Get detailed connection status"""
         try:
-            terminal_info = mt5.terminal_info()
-            account_info = mt5.account_info()
+            state = mt5_connection_state.get()
+            terminal_info = state.terminal_info
+            account_info = state.account_info
             
             if not terminal_info:
                 return {
@@ -211,31 +220,15 @@ class MT5ConnectionManager:
                 'error': str(e)
             }
     
-    def get_available_symbols(self) -> List[Dict]:
-        """Get available trading symbols"""
+    def get_available_symbols(self, refresh: bool = False) -> List[Dict]:
+        """Get available trading symbols (from the symbol cache unless refresh is requested)"""
         try:
             if not self.is_terminal_connected():
                 return []
             
-            symbols = mt5.symbols_get()
-            if not symbols:
-                return []
-            
-            symbol_list = []
-            for symbol in symbols:
-                if symbol.visible:
-                    symbol_list.append({
-                        'name': symbol.name,
-                        'description': symbol.description,
-                        'currency_base': symbol.currency_base,
-                        'currency_profit': symbol.currency_profit,
-                        'digits': symbol.digits,
-                        'point': symbol.point,
-                        'spread': symbol.spread,
-                        'trade_mode': symbol.trade_mode
-                    })
-            
-            return symbol_list
+            if refresh:
+                symbol_info_cache.load()
+            return [spec.to_dict() for spec in symbol_info_cache.all_symbols() if spec.visible]
             
         except Exception as e:
             logger.error(f"Error getting symbols: {e}")
@@ -247,7 +240,8 @@ class MT5ConnectionManager:
             try:
                 time.sleep(30)  # Check every 30 seconds
                 
-                if not self.is_terminal_connected() and self.connection_params and self.is_connected:
+                # Always read the terminal directly; this also refreshes the shared state
+                if not self.is_terminal_connected(max_age=0) and self.connection_params and self.is_connected:
                     logger.info("Attempting MT5 reconnection...")
                     self.connect(
                         self.connection_params['login'],
@@ -0,0 +1,91 @@
+"""Shared, short-lived snapshot of MT5 terminal and account state"""
+
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+from app.services.mt5_gateway import mt5
+from app.utilities.forex_logger import forex_logger
+from config import MT5_STATE_TTL_MS
+
+logger = forex_logger.get_logger(__name__)
+
+class ConnectionSnapshot(NamedTuple):
+    terminal_info: Any  # mt5.terminal_info() result, None when the terminal is unavailable
+    account_info: Any  # mt5.account_info() result, None when no account is logged in
+    taken_at: float  # time.monotonic() of the refresh
+    
+    @property
+    def connected(self) -> bool:
+        return bool(self.terminal_info) and bool(self.terminal_info.connected)
+    
+    @property
+    def trade_allowed(self) -> bool:
+        return self.connected and bool(self.terminal_info.trade_allowed)
+
+_EMPTY = ConnectionSnapshot(None, None, float('-inf'))
+
+class MT5ConnectionState:
+    """terminal_info/account_info read at most once per TTL for every caller.
+    
+    The trade decorators, engine tasks and the connection manager all ask
+    "are we connected / what is the equity" far more often than the answer
+    changes. Readers get the cached snapshot while it is younger than the
+    TTL; the first reader after that refreshes it while concurrent readers
+    wait for the same refresh. The connection manager pushes a fresh
+    snapshot after connecting and clears it on disconnect.
+    """
+    
+    def __init__(self, mt5_module=None, ttl_ms: int = 500):
+        self.mt5 = mt5_module if mt5_module is not None else mt5
+        self.ttl = ttl_ms / 1000.0
+        self.snapshot = _EMPTY
+        self.refresh_lock = threading.Lock()
+        self.stats = {'hits': 0, 'refreshes': 0}
+    
+    def get(self, max_age: Optional[float] = None) -> ConnectionSnapshot:
+        """Snapshot no older than `max_age` seconds (the TTL by default; 0 forces a refresh)"""
+        max_age = self.ttl if max_age is None else max_age
+        snapshot = self.snapshot
+        if time.monotonic() - snapshot.taken_at < max_age:
+            self.stats['hits'] += 1
+            return snapshot
+        
+        requested_at = time.monotonic()
+        with self.refresh_lock:
+            snapshot = self.snapshot
+            if snapshot.taken_at >= requested_at:
+                # Another thread refreshed while we waited for the lock
+                self.stats['hits'] += 1
+                return snapshot
+            return self.refresh()
+    
+    def refresh(self) -> ConnectionSnapshot:
+        """Read both infos from the terminal now and publish them"""
+        if self.mt5 is None:
+            return self.publish(None, None)
+        try:
+            terminal_info = self.mt5.terminal_info()
+            account_info = self.mt5.account_info() if terminal_info else None
+        except Exception as e:
+            logger.error(f"Error refreshing MT5 connection state: {e}")
+            terminal_info, account_info = None, None
+        self.stats['refreshes'] += 1
+        return self.publish(terminal_info, account_info)
+    
+    def publish(self, terminal_info, account_info) -> ConnectionSnapshot:
+        """Replace the snapshot with infos the caller has just read"""
+        self.snapshot = ConnectionSnapshot(terminal_info, account_info, time.monotonic())
+        return self.snapshot
+    
+    def invalidate(self):
+        """Force the next reader to refresh (after connect/disconnect/login changes)"""
+        self.snapshot = _EMPTY
+    
+    def terminal_info(self):
+        return self.get().terminal_info
+    
+    def account_info(self):
+        return self.get().account_info
+
+# Global instance
+mt5_connection_state = MT5ConnectionState(ttl_ms=MT5_STATE_TTL_MS)
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""MT5 gateway - one thread owns the terminal, everyone else talks to it through a queue"""
+
+try:
+    import MetaTrader5 as _mt5
+except ImportError:
+    _mt5 = None
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+from app.utilities.forex_logger import forex_logger
+
+logger = forex_logger.get_logger(__name__)
+
+# Calls without side effects: identical requests already in flight share one terminal call
+READ_ONLY_CALLS = frozenset({
+    'version', 'terminal_info', 'account_info',
+    'symbols_total', 'symbols_get', 'symbol_info', 'symbol_info_tick',
+    'copy_rates_from', 'copy_rates_from_pos', 'copy_rates_range',
+    'copy_ticks_from', 'copy_ticks_range',
+    'orders_total', 'orders_get', 'positions_total', 'positions_get',
+    'history_orders_total', 'history_orders_get', 'history_deals_total', 'history_deals_get',
+    'order_calc_margin', 'order_calc_profit', 'order_check',
+})
+
+class _GatewayRequest:
+    __slots__ = ('name', 'args', 'kwargs', 'future', 'key', 'queued_at', 'error')
+    
+    def __init__(self, name: str, args: tuple, kwargs: dict, key: Optional[Tuple]):
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.key = key
+        self.queued_at = time.perf_counter()
+        self.error = None  # mt5.last_error() captured right after a failed call
+
+class MT5Gateway:
+    """Serializes every MetaTrader5 call onto a single gateway thread.
+    
+    The MetaTrader5 package is process-global and not safe for concurrent
+    use, so engine tasks, monitors, the reconnect loop and Flask handlers
+    submit requests here instead of calling it directly. Identical read-only
+    requests that are already queued or running are coalesced into one call,
+    and per-function latency is recorded for monitoring. The MT5 module is
+    injectable so the gateway can run against a fake terminal.
+    """
+    
+    def __init__(self, mt5_module=None, call_timeout: float = 60.0):
+        self.mt5 = mt5_module if mt5_module is not None else _mt5
+        self.call_timeout = call_timeout
+        self.requests: queue.Queue = queue.Queue()
+        self.in_flight: Dict[Tuple, _GatewayRequest] = {}
+        self.gateway_lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.metrics: Dict[str, Dict] = {}
+        self.proxy = MT5Proxy(self)
+    
+    @property
+    def available(self) -> bool:
+        return self.mt5 is not None
+    
+    def _ensure_started(self):
+        # Started on first use so importing the gateway never creates a thread
+        if self.thread is None or not self.thread.is_alive():
+            with self.gateway_lock:
+                if self.thread is None or not self.thread.is_alive():
+                    self.thread = threading.Thread(target=self._run, name="mt5-gateway", daemon=True)
+                    self.thread.start()
+                    logger.info("MT5 gateway thread started")
+    
+    def submit(self, name: str, *args, **kwargs) -> Future:
+        """Queue a terminal call and return a future for its result"""
+        return self._submit(name, args, kwargs).future
+    
+    def call(self, name: str, *args, **kwargs):
+        """Run a terminal call on the gateway thread and wait for its result"""
+        if threading.current_thread() is self.thread:
+            # Nested call made while serving a request - already on the owning thread
+            return getattr(self.mt5, name)(*args, **kwargs)
+        return self._submit(name, args, kwargs).future.result(timeout=self.call_timeout)
+    
+    def call_many(self, name: str, args_list: List[tuple]) -> List[Tuple[Any, Any]]:
+        """Queue one call per argument tuple back to back, then wait for all of them.
+        
+        The gateway thread runs the batch without a caller round trip between
+        calls. Returns (result, last_error) pairs in submission order.
+        """
+        if threading.current_thread() is self.thread:
+            function = getattr(self.mt5, name)
+            return [(function(*args), None) for args in args_list]
+        
+        requests = [self._submit(name, args, {}) for args in args_list]
+        outcomes = []
+        for request in requests:
+            try:
+                outcomes.append((request.future.result(timeout=self.call_timeout), request.error))
+            except Exception as e:
+                outcomes.append((None, (-1, str(e))))
+        return outcomes
+    
+    def _submit(self, name: str, args: tuple, kwargs: dict) -> _GatewayRequest:
+        self._ensure_started()
+        key = self._coalesce_key(name, args, kwargs)
+        with self.gateway_lock:
+            if key is not None and key in self.in_flight:
+                self._metric(name)['coalesced'] += 1
+                return self.in_flight[key]
+            request = _GatewayRequest(name, args, kwargs, key)
+            if key is not None:
+                self.in_flight[key] = request
+        self.requests.put(request)
+        return request
+    
+    @staticmethod
+    def _coalesce_key(name: str, args: tuple, kwargs: dict) -> Optional[Tuple]:
+        if name not in READ_ONLY_CALLS:
+            return None
+        key = (name, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None  # Unhashable arguments (e.g. request dicts) are never coalesced
+        return key
+    
+    def _metric(self, name: str) -> Dict:
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = {'calls': 0, 'coalesced': 0, 'errors': 0,
+                                           'total_ms': 0.0, 'max_ms': 0.0, 'wait_ms': 0.0}
+        return metric
+    
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            
+            started = time.perf_counter()
+            result = None
+            exception = None
+            try:
+                result = getattr(self.mt5, request.name)(*request.args, **request.kwargs)
+                if result is None or result is False:
+                    request.error = self.mt5.last_error()
+            except Exception as e:
+                exception = e
+            finished = time.perf_counter()
+            
+            with self.gateway_lock:
+                if request.key is not None:
+                    self.in_flight.pop(request.key, None)
+                metric = self._metric(request.name)
+                metric['calls'] += 1
+                elapsed_ms = (finished - started) * 1000
+                metric['total_ms'] += elapsed_ms
+                metric['max_ms'] = max(metric['max_ms'], elapsed_ms)
+                metric['wait_ms'] += (started - request.queued_at) * 1000
+                if exception is not None or request.error is not None:
+                    metric['errors'] += 1
+            
+            if exception is not None:
+                request.future.set_exception(exception)
+            else:
+                request.future.set_result(result)
+    
+    def get_stats(self) -> Dict:
+        """Per-function call counts and latencies (milliseconds)"""
+        with self.gateway_lock:
+            calls = {}
+            for name, metric in self.metrics.items():
+                executed = metric['calls'] or 1
+                calls[name] = {
+                    'calls': metric['calls'],
+                    'coalesced': metric['coalesced'],
+                    'errors': metric['errors'],
+                    'avg_ms': round(metric['total_ms'] / executed, 3),
+                    'max_ms': round(metric['max_ms'], 3),
+                    'avg_wait_ms': round(metric['wait_ms'] / executed, 3)
+                }
+            return {
+                'queue_depth': self.requests.qsize(),
+                'in_flight': len(self.in_flight),
+                'calls': calls
+            }
+    
+    def detach(self):
+        """Refuse terminal calls from now on (shard workers - the parent process owns MT5)"""
+        if self.mt5 is not None and not isinstance(self.mt5, DetachedTerminal):
+            self.mt5 = DetachedTerminal(self.mt5)
+    
+    def shutdown(self):
+        """Stop the gateway thread after the queued requests have run"""
+        if self.thread is not None and self.thread.is_alive():
+            self.requests.put(None)
+            self.thread.join(timeout=10)
+
+class DetachedTerminal:
+    """MetaTrader5 stand-in for processes that must not open their own terminal connection.
+    
+    Constants come from the real module; every call returns None and
+    last_error() says why.
+    """
+    
+    ERROR = (-10003, "MT5 terminal is owned by the parent process")
+    
+    def __init__(self, module):
+        self._module = module
+    
+    def __getattr__(self, name: str):
+        value = getattr(self._module, name)
+        if not callable(value):
+            return value
+        
+        def detached_call(*args, **kwargs):
+            logger.warning(f"MT5 call {name} refused in a detached process")
+            return None
+        
+        return detached_call
+    
+    def last_error(self):
+        return self.ERROR
+
+class MT5Proxy:
+    """Drop-in stand-in for the MetaTrader5 module that routes calls through the gateway.
+    
+    Constants (TIMEFRAME_*, ORDER_TYPE_*, ...) are read straight from the
+    module. last_error() reports the error of the calling thread's own last
+    failed call, not whatever another thread did in between.
+    """
+    
+    def __init__(self, gateway: MT5Gateway):
+        self._gateway = gateway
+        self._local = threading.local()
+    
+    def __getattr__(self, name: str):
+        value = getattr(self._gateway.mt5, name)
+        if not callable(value):
+            return value
+        
+        def gateway_call(*args, **kwargs):
+            gateway = self._gateway
+            if threading.current_thread() is gateway.thread:
+                return value(*args, **kwargs)
+            request = gateway._submit(name, args, kwargs)
+            result = request.future.result(timeout=gateway.call_timeout)
+            self._local.last_error = request.error
+            return result
+        
+        gateway_call.__name__ = name
+        return gateway_call
+    
+    def last_error(self):
+        error = getattr(self._local, 'last_error', None)
+        if error is not None:
+            return error
+        return self._gateway.call('last_error')
+
+# Global instance
+mt5_gateway = MT5Gateway()
+mt5 = mt5_gateway.proxy if mt5_gateway.available else None
\ No newline at end of file
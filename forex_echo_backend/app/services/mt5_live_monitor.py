@@ -1,19 +1,21 @@
-try:
-    import MetaTrader5 as mt5
-except ImportError:
-    mt5 = None
+from app.services.mt5_gateway import mt5
+from app.services.mt5_connection_state import mt5_connection_state
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import time
 import threading
 from typing import Dict, List, Optional, Callable
 from decimal import Decimal
-from app.models.trading_models import MarketData, TradeSignal
+from app.models.trading_models import Bar, TradeSignal, OrderIntent, OrderEvent, ORDER_FILLED
 from app.services.base_strategy import BaseStrategy
 from app.services.risk_control_manager import RiskControlManager
+from app.services.order_execution_service import ANY_MAGIC, order_execution_service
+from app.services.order_queue import order_queue
 from app.database.database import get_db
 from app.utilities.forex_logger import forex_logger
 from app.utilities.connection_decorator import require_mt5_connection, handle_mt5_errors
+from app.indicators.batch import zscore_series, rates_to_bars
 
 logger = forex_logger.get_logger(__name__)
 
@@ -41,6 +43,7 @@ class MT5LiveMonitor:
         self.active_timeframes = ["1M", "5M", "15M"]
         self.last_updates = {}
         self.cached_data = {}
+        self.last_closed_bars: Dict[str, int] = {}  # timeframe -> last closed bar timestamp sent to callbacks
         
         # Trading components
         self.strategies = {}  # pair_timeframe -> strategy instance
@@ -54,8 +57,8 @@ class MT5LiveMonitor:
                 self.connected = True  # Simulation mode
                 return True
             
-            # Check if already initialized
-            if mt5.terminal_info() is None:
+            # Check if already initialized (fresh read - connect runs after a disconnect was seen)
+            if mt5_connection_state.get(max_age=0).terminal_info is None:
                 if not mt5.initialize():
                     error_code = mt5.last_error()
                     logger.error(f"MT5 initialization failed: Error code {error_code[0]} - {error_code[1]}")
@@ -68,6 +71,7 @@ class MT5LiveMonitor:
                     error_code = mt5.last_error()
                     logger.error(f"MT5 login failed: Error code {error_code[0]} - {error_code[1]} | Account: {self.ACCOUNT} | Server: {self.SERVER}")
                     return False
+            mt5_connection_state.invalidate()
             
             # Select symbols
             symbols = ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY"]
@@ -115,7 +119,7 @@ class MT5LiveMonitor:
         logger.info(f"Active timeframes set to: {self.active_timeframes}")
         return True
     
-    def get_price_data(self, timeframe_key: str, bars: int = 10, symbol: str = "XAUUSD") -> Optional[List[MarketData]]:
+    def get_price_data(self, timeframe_key: str, bars: int = 10, symbol: str = "XAUUSD") -> Optional[List[Bar]]:
         if not self.connected or timeframe_key not in self.TIMEFRAMES:
             logger.warning(f"Not connected or invalid timeframe: {timeframe_key}")
             return None
@@ -123,7 +127,7 @@ class MT5LiveMonitor:
         # TODO: Uncomment when MT5 is enabled
         try:
             # Check MT5 connection
-            if mt5.terminal_info() is None:
+            if mt5_connection_state.terminal_info() is None:
                 logger.warning("MT5 terminal not connected, attempting reconnect...")
                 if not self.connect():
                     return None
@@ -135,15 +139,7 @@ class MT5LiveMonitor:
                 rates = mt5.copy_rates_from_pos(symbol, tf_constant, 0, bars)
                 
                 if rates is not None and len(rates) > 0:
-                    market_data = []
-                    for rate in rates:
-                        market_data.append(MarketData(
-                            open=float(rate[1]),
-                            high=float(rate[2]),
-                            low=float(rate[3]),
-                            close=float(rate[4]),
-                            timestamp=int(rate[0])
-                        ))
+                    market_data = rates_to_bars(rates)
                     
                     # Cache successful data
                     self.cached_data[f"{symbol}_{timeframe_key}"] = market_data
@@ -196,7 +192,7 @@ class MT5LiveMonitor:
         #     logger.error(f"Error generating simulated data: {e}")
         #     return None
     
-    def get_current_tick(self) -> Optional[MarketData]:
+    def get_current_tick(self) -> Optional[Bar]:
         if not self.connected:
             return None
             
@@ -205,12 +201,12 @@ class MT5LiveMonitor:
             if tick is None:
                 return None
             
-            return MarketData(
-                open=tick.bid,
-                high=tick.ask,
-                low=tick.bid,
-                close=tick.bid,
-                timestamp=int(tick.time)
+            return Bar(
+                timestamp=int(tick.time),
+                open=float(tick.bid),
+                high=float(tick.ask),
+                low=float(tick.bid),
+                close=float(tick.bid)
             )
             
         except Exception as e:
@@ -298,7 +294,7 @@ class MT5LiveMonitor:
                 
                 
                 # Check MT5 connection health
-                if mt5.terminal_info() is None:
+                if mt5_connection_state.terminal_info() is None:
                     logger.warning("MT5 terminal disconnected, attempting reconnect...")
                     if not self.connect():
                         consecutive_failures += 1
@@ -331,10 +327,14 @@ class MT5LiveMonitor:
                             if int(current_time) % 60 == 0:  # Every minute
                                 logger.info(f"Data updated: {tf_name} - Price: {data[-1].close:.2f}")
                             
-                            if tf_name in self.callbacks:
+                            # Callbacks get each closed bar exactly once (data[-1] is still forming)
+                            closed_bar = data[-2] if len(data) >= 2 else None
+                            if (tf_name in self.callbacks and closed_bar is not None
+                                    and closed_bar.timestamp > self.last_closed_bars.get(tf_name, 0)):
+                                self.last_closed_bars[tf_name] = closed_bar.timestamp
                                 for callback in self.callbacks[tf_name]:
                                     try:
-                                        callback(tf_name, data[-1])
+                                        callback(tf_name, closed_bar)
                                     except Exception as e:
                                         logger.error(f"Callback error for {tf_name}: {e}")
                 
@@ -366,22 +366,17 @@ class MT5LiveMonitor:
         if not data or len(data) < 50:
             return {"error": "Insufficient data for analysis"}
         
-        closes = [candle.close for candle in data]
-        current_price = closes[-1]
+        closes = np.fromiter((candle.close for candle in data), dtype=np.float64, count=len(data))
+        current_price = float(closes[-1])
         
-        recent_highs = [candle.high for candle in data[-50:]]
-        recent_lows = [candle.low for candle in data[-50:]]
-        highest_high = max(recent_highs)
-        lowest_low = min(recent_lows)
+        highest_high = max(candle.high for candle in data[-50:])
+        lowest_low = min(candle.low for candle in data[-50:])
         
         pct_from_high = ((highest_high - current_price) / highest_high) * 100
         pct_from_low = ((current_price - lowest_low) / lowest_low) * 100
         
-        recent_closes = closes[-20:]
-        mean_price = sum(recent_closes) / len(recent_closes)
-        variance = sum((x - mean_price) ** 2 for x in recent_closes) / len(recent_closes)
-        std_dev = variance ** 0.5
-        zscore = (current_price - mean_price) / std_dev if std_dev > 0 else 0
+        # Population stdev over the last 20 closes, as this endpoint has always reported
+        zscore = float(zscore_series(closes[-20:], 20, ddof=0)[-1])
         
         return {
             "timeframe": timeframe,
@@ -429,6 +424,9 @@ class MT5LiveMonitor:
     def add_strategy(self, pair: str, timeframe: str, strategy: BaseStrategy):
         """Add strategy for real-time trading"""
         key = f"{pair}_{timeframe}"
+        replaced = self.strategies.get(key)
+        if replaced is not None and replaced is not strategy and hasattr(replaced, 'release_indicators'):
+            replaced.release_indicators()
         self.strategies[key] = strategy
         logger.info(f"Strategy added: {key}")
     
@@ -467,6 +465,9 @@ class MT5LiveMonitor:
             
             result = mt5.order_send(request)
             
+            if result is None:
+                logger.error(f"Trade failed: order_send returned None ({mt5.last_error()})")
+                return None
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 logger.error(f"Trade failed: {result.comment}")
                 return None
@@ -482,41 +483,35 @@ class MT5LiveMonitor:
         # logger.error(f"MT5 disabled - cannot execute {signal.action} trade for {pair}")
         # return None
     
-    @require_mt5_connection
-    @handle_mt5_errors
+    def queue_trade(self, pair: str, timeframe: str, candle: Bar, signal: TradeSignal):
+        """Hand a signal to the order queue; the outcome is logged when the worker reports it"""
+        if not self.connected or not self.trading_enabled:
+            return None
+        
+        intent = OrderIntent(
+            key=f"monitor:{pair}:{timeframe}:{candle.timestamp}:{signal.action}",
+            symbol=pair,
+            action=signal.action,
+            lot_size=signal.lot_size,
+            take_profit=signal.take_profit,
+            # Risk-control close-all flattens every position of the pair, whoever opened it
+            magic=ANY_MAGIC if signal.action == "CLOSE_ALL" else 234000,
+            comment="Risk Control: Close All" if signal.action == "CLOSE_ALL" else f"Auto: {signal.reason}",
+            deviation=20,
+            received_at=time.perf_counter()
+        )
+        return order_queue.submit(intent, on_result=self._on_order_result)
+    
+    def _on_order_result(self, event: OrderEvent):
+        if event.status == ORDER_FILLED:
+            logger.info(f"Trade executed: {event.symbol} {event.action} - Order: {event.ticket}")
+        else:
+            logger.error(f"Trade {event.status}: {event.symbol} {event.action} - {event.message or event.retcode}")
+    
     def _close_all_positions(self, pair: str) -> int:
         """Close all positions for a pair"""
-        # TODO: Uncomment when MT5 is enabled
-        positions = mt5.positions_get(symbol=pair)
-        if not positions:
-            return 0
-        
-        closed_count = 0
-        for position in positions:
-            close_request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": pair,
-                "volume": position.volume,
-                "type": mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY,
-                "position": position.ticket,
-                "price": mt5.symbol_info_tick(pair).bid if position.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(pair).ask,
-                "deviation": 20,
-                "magic": 234000,
-                "comment": "Risk Control: Close All",
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
-            }
-            
-            result = mt5.order_send(close_request)
-            if result.retcode == mt5.TRADE_RETCODE_DONE:
-                closed_count += 1
-                logger.info(f"Position closed: {position.ticket}")
-        
-        return closed_count
-        
-        # TEMPORARY: MT5 disabled - return 0 to indicate no positions closed
-        # logger.error(f"MT5 disabled - cannot close positions for {pair}")
-        # return 0
+        report = order_execution_service.flatten([pair], ANY_MAGIC, "Risk Control: Close All")
+        return report['closed'] if report else 0
     
     def get_current_pnl(self, pair: str) -> Dict[str, Decimal]:
         """Get current P&L for a pair"""
@@ -553,7 +548,7 @@ class MT5LiveMonitor:
         
         return self.start_monitoring()
     
-    def _trading_callback(self, timeframe: str, candle: MarketData):
+    def _trading_callback(self, timeframe: str, candle: Bar):
         """Process trading signals from strategies"""
         if not self.trading_enabled:
             return
@@ -575,10 +570,8 @@ class MT5LiveMonitor:
                 )
                 
                 if signal and signal.action != "BLOCKED":
-                    # Execute trade
-                    order_id = self.execute_trade(pair, signal)
-                    if order_id:
-                        logger.info(f"Trade executed: {pair} {signal.action} - Order: {order_id}")
+                    # Queue the trade - the monitor loop never waits for the broker
+                    self.queue_trade(pair, timeframe, candle, signal)
                 
             except Exception as e:
                 logger.error(f"Trading callback error for {key}: {e}")
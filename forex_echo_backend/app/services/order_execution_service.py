@@ -0,0 +1,310 @@
+"""Long-lived order execution - one executor per symbol with pre-built request templates"""
+
+import threading
+import time
+from contextlib import ExitStack
+from typing import Dict, List, Optional
+from app.services.mt5_gateway import mt5, mt5_gateway
+from app.utilities.forex_logger import forex_logger
+from app.utilities.connection_decorator import require_mt5_connection, handle_mt5_errors
+
+logger = forex_logger.get_logger(__name__)
+
+ANY_MAGIC = -1  # flatten/close_all_positions filter matching positions of every magic number
+
+class SymbolExecutor:
+    """Sends market orders for one symbol.
+    
+    Request dicts are pre-built once per action and only get volume, price
+    and position filled in per order. Every send is priced from a tick
+    fetched right before it, within the templates' `deviation` points of
+    slippage. Orders for the same symbol are serialized by the executor lock.
+    """
+    
+    def __init__(self, symbol: str, magic_number: int = 12345, deviation: int = 20):
+        self.symbol = symbol
+        self.magic_number = magic_number
+        self.deviation = deviation
+        self.executor_lock = threading.Lock()
+        self.templates = self._build_templates()
+        self.metrics = {'orders': 0, 'failed': 0, 'timed': 0, 'prepare_ms': 0.0, 'max_prepare_ms': 0.0,
+                        'send_ms': 0.0, 'max_send_ms': 0.0}
+    
+    def _build_templates(self) -> Dict[str, Dict]:
+        base = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": self.symbol,
+            "magic": self.magic_number,
+            "deviation": self.deviation,
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }
+        return {
+            "BUY": dict(base, type=mt5.ORDER_TYPE_BUY, comment="Gold Buy Dip - BUY"),
+            "SELL": dict(base, type=mt5.ORDER_TYPE_SELL, comment="Gold Buy Dip - SELL"),
+            "CLOSE_BUY": dict(base, type=mt5.ORDER_TYPE_SELL, comment="Grid close all"),
+            "CLOSE_SELL": dict(base, type=mt5.ORDER_TYPE_BUY, comment="Grid close all"),
+        }
+    
+    def _send(self, request: Dict, received_at: Optional[float]):
+        """order_send with latency accounting (received_at = perf_counter() when the signal arrived)"""
+        started = time.perf_counter()
+        result = mt5.order_send(request)
+        self._record(result, started, (time.perf_counter() - started) * 1000, received_at)
+        return result
+    
+    def _record(self, result, started: float, send_ms: float, received_at: Optional[float]):
+        metrics = self.metrics
+        metrics['orders'] += 1
+        metrics['send_ms'] += send_ms
+        metrics['max_send_ms'] = max(metrics['max_send_ms'], send_ms)
+        if received_at is not None:
+            metrics['timed'] += 1
+            prepare_ms = (started - received_at) * 1000
+            metrics['prepare_ms'] += prepare_ms
+            metrics['max_prepare_ms'] = max(metrics['max_prepare_ms'], prepare_ms)
+        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+            metrics['failed'] += 1
+    
+    def close_request(self, position, tick, magic: int = ANY_MAGIC, comment: Optional[str] = None) -> Dict:
+        """Deal closing `position` at the tick's opposite side"""
+        if position.type == mt5.ORDER_TYPE_BUY:
+            request = dict(self.templates["CLOSE_BUY"], price=tick.bid)
+        else:
+            request = dict(self.templates["CLOSE_SELL"], price=tick.ask)
+        request["volume"] = position.volume
+        request["position"] = position.ticket
+        if magic != ANY_MAGIC:
+            request["magic"] = magic
+        if comment is not None:
+            request["comment"] = comment
+        return request
+    
+    def send_market(self, action: str, volume: float, take_profit: Optional[float] = None,
+                    magic: Optional[int] = None, comment: Optional[str] = None,
+                    deviation: Optional[int] = None, received_at: Optional[float] = None):
+        """Build a BUY/SELL deal from the template and send it; caller holds executor_lock.
+        
+        Returns (result, request), or (None, None) when no tick is available.
+        """
+        tick = mt5.symbol_info_tick(self.symbol)  # Never a cached price - stale quotes get requoted
+        if not tick:
+            logger.error(f"Failed to get tick for {self.symbol}")
+            return None, None
+        
+        request = dict(self.templates[action], volume=volume, price=tick.ask if action == "BUY" else tick.bid)
+        if take_profit is not None:
+            request["tp"] = take_profit
+        if magic is not None:
+            request["magic"] = magic
+        if comment is not None:
+            request["comment"] = comment
+        if deviation is not None:
+            request["deviation"] = deviation
+        
+        logger.info(f"Sending MT5 order: {request}")
+        return self._send(request, received_at), request
+    
+    @require_mt5_connection
+    @handle_mt5_errors
+    def place_order(self, action: str, lot_size: float, take_profit: Optional[float] = None,
+                    received_at: Optional[float] = None) -> Optional[Dict]:
+        """Place buy/sell market order."""
+        template = self.templates.get(action) if action in ("BUY", "SELL") else None
+        if template is None:
+            logger.error(f"Invalid action: {action}")
+            return None
+        
+        tp = take_profit if take_profit else None
+        with self.executor_lock:
+            result, request = self.send_market(action, lot_size, tp, received_at=received_at)
+        if request is None:
+            return None
+        price = request["price"]
+        
+        if result is None:
+            # Get last error from MT5
+            last_error = mt5.last_error()
+            logger.error(f"MT5 order_send returned None. Last error: {last_error}")
+            logger.error(f"Request sent: {request}")
+            return None
+        
+        if result.retcode != mt5.TRADE_RETCODE_DONE:
+            logger.error(f"MT5 Order rejected: Code {result.retcode} - {result.comment}")
+            logger.error(f"Request: {request}")
+            logger.error(f"Full result: {result._asdict() if hasattr(result, '_asdict') else result}")
+            return None
+        
+        logger.info(f"Order placed: {action} {lot_size} lots at {price} (Ticket: {result.order})")
+        
+        return {
+            "ticket": result.order,
+            "action": action,
+            "volume": lot_size,
+            "price": price,
+            "take_profit": tp,
+            "retcode": result.retcode
+        }
+    
+    @require_mt5_connection
+    @handle_mt5_errors
+    def close_all_positions(self, received_at: Optional[float] = None, magic: Optional[int] = None,
+                            comment: Optional[str] = None) -> bool:
+        """Close all open positions of this symbol opened by `magic` (our magic number by default, ANY_MAGIC for all)."""
+        magic = self.magic_number if magic is None else magic
+        report = OrderExecutionService().flatten([self.symbol], magic, comment, received_at)
+        if report is None:
+            return False
+        if not report['positions']:
+            logger.info("No positions to close")
+            return True
+        return report['closed'] > 0
+    
+    def get_stats(self) -> Dict:
+        metrics = self.metrics
+        orders = metrics['orders'] or 1
+        timed = metrics['timed'] or 1
+        return {
+            'orders': metrics['orders'],
+            'failed': metrics['failed'],
+            'avg_prepare_ms': round(metrics['prepare_ms'] / timed, 3),
+            'max_prepare_ms': round(metrics['max_prepare_ms'], 3),
+            'avg_send_ms': round(metrics['send_ms'] / orders, 3),
+            'max_send_ms': round(metrics['max_send_ms'], 3)
+        }
+
+class OrderExecutionService:
+    """Keeps one SymbolExecutor per symbol for the lifetime of the process"""
+    
+    _instance = None
+    _lock = threading.Lock()
+    
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.executors: Dict[str, SymbolExecutor] = {}
+            self.executors_lock = threading.Lock()
+            self.initialized = True
+            logger.info("OrderExecutionService initialized")
+    
+    def executor(self, symbol: str) -> SymbolExecutor:
+        executor = self.executors.get(symbol)
+        if executor is None:
+            with self.executors_lock:
+                executor = self.executors.get(symbol)
+                if executor is None:
+                    executor = self.executors[symbol] = SymbolExecutor(symbol)
+        return executor
+    
+    def place_order(self, symbol: str, action: str, lot_size: float, take_profit: Optional[float] = None,
+                    received_at: Optional[float] = None) -> Optional[Dict]:
+        return self.executor(symbol).place_order(action, lot_size, take_profit, received_at)
+    
+    def close_all_positions(self, symbol: str, received_at: Optional[float] = None) -> bool:
+        return self.executor(symbol).close_all_positions(received_at)
+    
+    @require_mt5_connection
+    @handle_mt5_errors
+    def flatten(self, symbols: Optional[List[str]] = None, magic: Optional[int] = ANY_MAGIC,
+                comment: Optional[str] = None, received_at: Optional[float] = None) -> Optional[Dict]:
+        """Close every position of `symbols` (all symbols if None) opened by `magic`.
+        
+        `magic` None means each symbol executor's own magic number, as for
+        close_all_positions; ANY_MAGIC matches every position.
+        
+        Positions are read with one positions_get snapshot, each symbol gets
+        one fresh tick, and all close requests are queued on the gateway back
+        to back before any result is awaited. The affected executors stay
+        locked for the whole batch so no new order interleaves with it.
+        """
+        started = time.perf_counter()
+        if symbols is not None and len(symbols) == 1:
+            positions = mt5.positions_get(symbol=symbols[0])
+        else:
+            positions = mt5.positions_get()
+        
+        wanted = set(symbols) if symbols is not None else None
+        by_symbol: Dict[str, List] = {}
+        for position in positions or ():
+            if wanted is not None and position.symbol not in wanted:
+                continue
+            position_magic = self.executor(position.symbol).magic_number if magic is None else magic
+            if position_magic != ANY_MAGIC and position.magic != position_magic:
+                continue
+            by_symbol.setdefault(position.symbol, []).append(position)
+        snapshot_done = time.perf_counter()
+        
+        report = {
+            'positions': sum(len(symbol_positions) for symbol_positions in by_symbol.values()),
+            'closed': 0,
+            'closed_volume': 0.0,
+            'failed': [],
+            'symbols': {symbol: {'positions': len(symbol_positions), 'closed': 0}
+                        for symbol, symbol_positions in by_symbol.items()}
+        }
+        ticks_done = sends_done = snapshot_done
+        
+        if by_symbol:
+            executors = [self.executor(symbol) for symbol in sorted(by_symbol)]
+            with ExitStack() as locks:
+                # Sorted lock order - concurrent flattens of overlapping symbol sets cannot deadlock
+                for executor in executors:
+                    locks.enter_context(executor.executor_lock)
+                
+                ticks = mt5_gateway.call_many('symbol_info_tick', [(executor.symbol,) for executor in executors])
+                ticks_done = time.perf_counter()
+                
+                batch = []
+                for executor, (tick, error) in zip(executors, ticks):
+                    if not tick:
+                        logger.error(f"Failed to get tick for {executor.symbol}: {error}")
+                        for position in by_symbol[executor.symbol]:
+                            report['failed'].append({'ticket': position.ticket, 'symbol': executor.symbol,
+                                                     'retcode': None, 'message': 'no tick'})
+                        continue
+                    for position in by_symbol[executor.symbol]:
+                        batch.append((executor, position, executor.close_request(
+                            position, tick, executor.magic_number if magic is None else magic, comment)))
+                
+                send_started = time.perf_counter()
+                results = mt5_gateway.call_many('order_send', [(request,) for _, _, request in batch])
+                sends_done = time.perf_counter()
+            
+            send_ms = (sends_done - send_started) * 1000 / len(batch) if batch else 0.0
+            for (executor, position, request), (result, error) in zip(batch, results):
+                executor._record(result, send_started, send_ms, received_at)
+                if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE:
+                    report['closed'] += 1
+                    report['closed_volume'] = round(report['closed_volume'] + position.volume, 8)
+                    report['symbols'][executor.symbol]['closed'] += 1
+                    logger.info(f"Position closed: {position.ticket}")
+                else:
+                    message = result.comment if result is not None else f"order_send returned None: {error}"
+                    logger.error(f"Failed to close position {position.ticket}: {message}")
+                    report['failed'].append({'ticket': position.ticket, 'symbol': executor.symbol,
+                                             'retcode': result.retcode if result is not None else None,
+                                             'message': message})
+        
+        finished = time.perf_counter()
+        report['timing_ms'] = {
+            'snapshot': round((snapshot_done - started) * 1000, 3),
+            'ticks': round((ticks_done - snapshot_done) * 1000, 3),
+            'send': round((sends_done - ticks_done) * 1000, 3),
+            'total': round((finished - started) * 1000, 3)
+        }
+        logger.info(f"Flatten closed {report['closed']}/{report['positions']} positions "
+                    f"in {report['timing_ms']['total']} ms")
+        return report
+    
+    def get_stats(self) -> Dict:
+        """Order counts and signal-to-order_send latency per symbol (milliseconds)"""
+        return {symbol: executor.get_stats() for symbol, executor in list(self.executors.items())}
+
+# Global instance
+order_execution_service = OrderExecutionService()
\ No newline at end of file
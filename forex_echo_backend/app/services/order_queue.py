@@ -0,0 +1,279 @@
+"""Non-blocking order pipeline - intents in, OrderEvents out"""
+
+import hashlib
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+from app.models.trading_models import (
+    OrderIntent, OrderEvent, ORDER_FILLED, ORDER_PARTIAL, ORDER_REJECTED, ORDER_FAILED, ORDER_UNKNOWN
+)
+from app.services.mt5_gateway import mt5
+from app.services.mt5_connection_state import mt5_connection_state
+from app.services.order_execution_service import order_execution_service
+from app.utilities.forex_logger import forex_logger
+
+logger = forex_logger.get_logger(__name__)
+
+# MT5 trade server return codes (MqlTradeResult.retcode)
+RETCODE_DONE = 10009
+RETCODE_DONE_PARTIAL = 10010
+# Rejected before execution - re-sending cannot double the position
+RETRYABLE_RETCODES = {
+    10004: "requote",
+    10020: "prices changed",
+    10021: "no quotes",
+}
+# The deal may have executed anyway - the broker's deal history decides whether to re-send
+UNCERTAIN_RETCODES = {
+    10012: "request timeout",
+    10031: "no connection to trade server",
+}
+UNCERTAIN_DEAL_WINDOW = 300  # Seconds of server time in which an unattributed deal may be a lost order
+
+class OrderQueue:
+    """Accepts OrderIntents without blocking and executes them on one worker thread per symbol.
+    
+    Intents are idempotent by key: submitting a key that was already
+    submitted returns the original future instead of sending again. Every
+    order carries a tag derived from the key in its comment. The worker
+    retries requotes/price changes with a fresh tick and re-sends the
+    unfilled remainder of IOC partial fills, up to `max_attempts` sends.
+    After a timeout, a lost connection or no result at all, it looks the
+    order up in the deal history and only re-sends what provably did not
+    execute; if that cannot be established the intent ends as
+    ORDER_UNKNOWN without another send. Every outcome is reported as one OrderEvent - through the returned
+    future, the per-intent callback and any registered listeners.
+    """
+    
+    def __init__(self, execution_service=None, max_attempts: int = 3, retry_delay: float = 0.05,
+                 key_retention: int = 10000):
+        self.execution = execution_service if execution_service is not None else order_execution_service
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.key_retention = key_retention
+        self.symbol_queues: Dict[str, queue.Queue] = {}
+        self.workers: Dict[str, threading.Thread] = {}
+        self.futures: "OrderedDict[str, Future]" = OrderedDict()
+        self.listeners: List[Callable[[OrderEvent], None]] = []
+        self.queue_lock = threading.Lock()
+        self.stats = {'submitted': 0, 'duplicates': 0, 'retries': 0,
+                      ORDER_FILLED: 0, ORDER_PARTIAL: 0, ORDER_REJECTED: 0, ORDER_FAILED: 0, ORDER_UNKNOWN: 0}
+    
+    def add_listener(self, listener: Callable[[OrderEvent], None]):
+        """Call `listener` with every OrderEvent (on the symbol's worker thread)"""
+        self.listeners.append(listener)
+    
+    def submit(self, intent: OrderIntent, on_result: Optional[Callable[[OrderEvent], None]] = None) -> Future:
+        """Queue an intent and return immediately; the future resolves to its OrderEvent"""
+        with self.queue_lock:
+            future = self.futures.get(intent.key)
+            if future is not None:
+                self.stats['duplicates'] += 1
+                logger.info(f"Duplicate order intent ignored: {intent.key}")
+                return future
+            
+            future = Future()
+            self.futures[intent.key] = future
+            while len(self.futures) > self.key_retention:
+                self.futures.popitem(last=False)
+            self.stats['submitted'] += 1
+            symbol_queue = self._symbol_queue(intent.symbol)
+        
+        if on_result is not None:
+            future.add_done_callback(lambda done: self._notify(on_result, done.result()))
+        symbol_queue.put((intent, future, time.perf_counter()))
+        return future
+    
+    def _symbol_queue(self, symbol: str) -> queue.Queue:
+        symbol_queue = self.symbol_queues.get(symbol)
+        if symbol_queue is None:
+            symbol_queue = self.symbol_queues[symbol] = queue.Queue()
+            worker = threading.Thread(target=self._worker_loop, args=(symbol_queue,),
+                                      name=f"orders-{symbol}", daemon=True)
+            self.workers[symbol] = worker
+            worker.start()
+        return symbol_queue
+    
+    @staticmethod
+    def _notify(callback: Callable[[OrderEvent], None], event: OrderEvent):
+        try:
+            callback(event)
+        except Exception as e:
+            logger.error(f"Order result handler failed for {event.key}: {e}")
+    
+    def _worker_loop(self, symbol_queue: queue.Queue):
+        while True:
+            item = symbol_queue.get()
+            if item is None:
+                break
+            
+            intent, future, queued_at = item
+            try:
+                event = self._execute(intent, queued_at)
+            except Exception as e:
+                logger.error(f"Order {intent.key} failed: {e}")
+                event = OrderEvent(intent.key, intent.symbol, intent.action, ORDER_FAILED, message=str(e),
+                                   latency_ms=(time.perf_counter() - queued_at) * 1000)
+            
+            self.stats[event.status] += 1
+            future.set_result(event)
+            for listener in list(self.listeners):
+                self._notify(listener, event)
+    
+    def _execute(self, intent: OrderIntent, queued_at: float) -> OrderEvent:
+        def outcome(status: str, **fields) -> OrderEvent:
+            return OrderEvent(intent.key, intent.symbol, intent.action, status,
+                              latency_ms=(time.perf_counter() - queued_at) * 1000, **fields)
+        
+        if intent.action == "CLOSE_ALL":
+            report = self.execution.flatten([intent.symbol], intent.magic, intent.comment, intent.received_at)
+            if report is None:
+                return outcome(ORDER_FAILED, attempts=1, message="MT5 not connected or trading not allowed")
+            status = ORDER_FILLED if not report['failed'] else ORDER_PARTIAL if report['closed'] else ORDER_FAILED
+            return outcome(status, filled_volume=report['closed_volume'], attempts=1,
+                           message=f"closed {report['closed']}/{report['positions']} positions")
+        
+        executor = self.execution.executor(intent.symbol)
+        
+        if intent.action not in ("BUY", "SELL"):
+            return outcome(ORDER_REJECTED, message=f"Invalid action: {intent.action}")
+        if not mt5_connection_state.get().trade_allowed:
+            return outcome(ORDER_FAILED, message="MT5 not connected or trading not allowed")
+        
+        take_profit = intent.take_profit if intent.take_profit else None
+        tag = self.order_tag(intent.key)
+        comment = f"{tag} {intent.comment or executor.templates[intent.action]['comment']}"[:31]  # MT5 keeps 31 comment characters
+        remaining = intent.lot_size
+        filled = 0.0
+        attempts = 0
+        orders = set()  # Order tickets of this intent's sends, for matching deals whose comment was rewritten
+        unknown = False
+        ticket = price = retcode = None
+        message = ""
+        while remaining > 0 and attempts < self.max_attempts:
+            attempts += 1
+            if attempts > 1:
+                self.stats['retries'] += 1
+            with executor.executor_lock:
+                # Only the first send counts toward signal latency
+                result, request = executor.send_market(
+                    intent.action, remaining, take_profit, intent.magic, comment, intent.deviation,
+                    received_at=intent.received_at if attempts == 1 else None)
+            
+            if request is None:
+                message = "no tick"
+                time.sleep(self.retry_delay * attempts)
+                continue
+            
+            retcode = result.retcode if result is not None else None
+            if result is not None and result.order:
+                orders.add(result.order)
+            if retcode in (RETCODE_DONE, RETCODE_DONE_PARTIAL):
+                # IOC can fill less than requested under either code
+                executed = result.volume
+                filled = round(filled + executed, 8)
+                remaining = round(intent.lot_size - filled, 8)
+                ticket = result.order
+                price = result.price or request["price"]
+                message = ""
+                if remaining > 0:
+                    logger.warning(f"Partial fill {intent.key}: {executed} lots, {remaining} remaining")
+                continue
+            
+            if result is None or retcode in UNCERTAIN_RETCODES:
+                message = (f"order_send returned None: {mt5.last_error()}" if result is None
+                           else f"{UNCERTAIN_RETCODES[retcode]}: {result.comment}")
+                executed = self.executed_volume(intent.symbol, tag, orders, request)
+                if executed is None:
+                    # Cannot prove the deal did not execute - re-sending could double the position
+                    logger.critical(f"Order {intent.key} outcome unknown ({message}); not re-sending - "
+                                    f"check {intent.symbol} positions in the terminal")
+                    message = f"outcome unknown: {message}"
+                    unknown = True
+                    break
+                if executed > filled:
+                    logger.warning(f"Order {intent.key} executed {executed} lots despite {message}")
+                    filled = round(executed, 8)
+                    remaining = round(intent.lot_size - filled, 8)
+                    message = ""
+                    continue
+                logger.warning(f"Order {intent.key} did not execute ({message}), attempt {attempts}")
+                time.sleep(self.retry_delay * attempts)
+                continue
+            
+            message = result.comment
+            if retcode in RETRYABLE_RETCODES:
+                logger.warning(f"Order {intent.key} {RETRYABLE_RETCODES[retcode]} (attempt {attempts})")
+                time.sleep(self.retry_delay * attempts)
+                continue
+            break  # Not retryable (no money, invalid volume, market closed, ...)
+        
+        fields = dict(ticket=ticket, price=price, filled_volume=filled, attempts=attempts,
+                      retcode=retcode, message=message)
+        if unknown:
+            return outcome(ORDER_UNKNOWN, **fields)
+        if remaining <= 0:
+            logger.info(f"Order filled {intent.key}: {intent.action} {filled} lots at {price} (Ticket: {ticket})")
+            return outcome(ORDER_FILLED, **fields)
+        if filled > 0:
+            return outcome(ORDER_PARTIAL, **fields)
+        logger.error(f"Order {intent.key} not filled after {attempts} attempt(s): {retcode} {message}")
+        return outcome(ORDER_REJECTED if retcode is not None else ORDER_FAILED, **fields)
+    
+    @staticmethod
+    def order_tag(key: str) -> str:
+        """Short, stable tag identifying an intent's orders in the broker's deal history"""
+        return "oq" + hashlib.sha1(key.encode()).hexdigest()[:10]
+    
+    def executed_volume(self, symbol: str, tag: str, orders: Set[int], request: Dict) -> Optional[float]:
+        """Lots dealt so far for an intent, or None if that cannot be established.
+        
+        Deals are matched by the tag in their comment or by the order ticket
+        of one of the intent's sends. Brokers may truncate or rewrite comments,
+        so any other recent deal with the request's magic, direction and at
+        most its volume could be the lost order: the outcome is then unknown.
+        """
+        now = datetime.now()
+        # Wide window - deal times are broker server time, not local time
+        deals = mt5.history_deals_get(now - timedelta(days=1), now + timedelta(days=1), group=symbol)
+        if deals is None:
+            logger.error(f"Deal history unavailable for {symbol}: {mt5.last_error()}")
+            return None
+        
+        tick = mt5.symbol_info_tick(symbol)
+        since = tick.time - UNCERTAIN_DEAL_WINDOW if tick else None  # Whole history window without a tick
+        executed = 0.0
+        for deal in deals:
+            if tag in (deal.comment or "") or deal.order in orders:
+                executed += deal.volume
+            elif (deal.magic == request["magic"] and deal.type == request["type"]
+                  and deal.volume <= request["volume"] and (since is None or deal.time >= since)):
+                logger.error(f"Deal {deal.ticket} ({deal.volume} lots, comment {deal.comment!r}) "
+                             f"may be the lost order {tag}")
+                return None
+        return round(executed, 8)
+    
+    def get_stats(self) -> Dict:
+        """Intent counts by outcome and current queue depth per symbol"""
+        return {
+            **self.stats,
+            'pending': {symbol: symbol_queue.qsize() for symbol, symbol_queue in list(self.symbol_queues.items())}
+        }
+    
+    def shutdown(self, timeout: float = 10.0):
+        """Let queued intents finish, then stop the workers"""
+        with self.queue_lock:
+            workers = list(self.workers.values())
+            for symbol_queue in self.symbol_queues.values():
+                symbol_queue.put(None)
+            self.symbol_queues.clear()
+            self.workers.clear()
+        for worker in workers:
+            worker.join(timeout=timeout)
+
+# Global instance
+order_queue = OrderQueue()
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""Per-user portfolio snapshots for the capital dashboards"""
+
+import threading
+import time
+from decimal import Decimal
+from typing import Callable, Dict, Optional
+from app.database.entities.capital_allocation_entity import PortfolioEntity
+from app.services.risk_ledger import risk_ledger, RiskEntry
+from app.utilities.forex_logger import forex_logger
+from config import PORTFOLIO_SNAPSHOT_TTL_MS
+
+logger = forex_logger.get_logger(__name__)
+
+class PortfolioSnapshotCache:
+    """Portfolio, strategy and pair allocation values per user, kept in memory.
+    
+    A snapshot is built from one eager-loaded portfolio query the first time
+    a dashboard asks for it and is then served without touching MySQL.
+    Capital mutations invalidate it; pair P&L and breach changes from the
+    risk ledger are patched into cached snapshots in place, so tick updates
+    never force a rebuild. Snapshots still expire after `ttl_ms`, so P&L
+    written by other processes (shard workers) and writes made outside
+    this service show up on the next rebuild.
+    """
+    
+    def __init__(self, ttl_ms: int = 5000):
+        self.ttl = ttl_ms / 1000.0
+        self.snapshots: Dict[str, Dict] = {}
+        self.pairs_by_id: Dict[int, Dict] = {}  # pair_allocation_id -> pair record in a cached snapshot
+        self.generation = 0
+        self.cache_lock = threading.Lock()
+        self.stats = {'hits': 0, 'builds': 0, 'expired': 0, 'invalidations': 0, 'pnl_updates': 0}
+    
+    def get(self, user_id: str, loader: Callable[[], Optional[PortfolioEntity]]) -> Optional[Dict]:
+        """Cached snapshot, built from the portfolio `loader` returns when missing (None = no portfolio)"""
+        snapshot = self.snapshots.get(user_id)
+        if snapshot is not None:
+            if time.monotonic() - snapshot['built_at'] < self.ttl:
+                self.stats['hits'] += 1
+                return snapshot
+            self.invalidate(user_id)
+            self.stats['expired'] += 1
+        
+        generation = self.generation
+        portfolio = loader()
+        if portfolio is None:
+            return None
+        snapshot = self.build(portfolio)
+        with self.cache_lock:
+            self.stats['builds'] += 1
+            if generation == self.generation:
+                # Not invalidated while loading - safe to keep
+                self.snapshots[user_id] = snapshot
+                for strategy in snapshot['strategies']:
+                    for pair in strategy['pairs']:
+                        self.pairs_by_id[pair['id']] = pair
+        return snapshot
+    
+    @staticmethod
+    def build(portfolio: PortfolioEntity) -> Dict:
+        """Plain-data copy of a portfolio with its strategy and pair allocations loaded"""
+        strategies = []
+        for strategy in portfolio.strategy_allocations:
+            pairs = []
+            for pa in strategy.pair_allocations:
+                pair = {
+                    'id': pa.id,
+                    'pair': pa.pair,
+                    'allocated_capital': Decimal(str(pa.allocated_capital)),
+                    'used_capital': Decimal(str(pa.used_capital or 0)),
+                    'realized_pnl': Decimal(str(pa.realized_pnl or 0)),
+                    'floating_pnl': Decimal(str(pa.floating_pnl or 0)),
+                    'risk_breached': bool(pa.risk_breached)
+                }
+                # The ledger is ahead of the database until its next flush
+                entry = risk_ledger.entries.get((pa.pair, strategy.strategy_name))
+                if entry is not None and entry.allocation_id == pa.id:
+                    pair.update(realized_pnl=entry.realized_pnl, floating_pnl=entry.floating_pnl,
+                                risk_breached=entry.risk_breached)
+                pairs.append(pair)
+            
+            strategies.append({
+                'strategy_name': strategy.strategy_name,
+                'allocation_percentage': Decimal(str(strategy.allocation_percentage)),
+                'allocated_capital': Decimal(str(strategy.allocated_capital)),
+                'realized_pnl': Decimal(str(strategy.realized_pnl or 0)),
+                'floating_pnl': Decimal(str(strategy.floating_pnl or 0)),
+                'pairs': pairs
+            })
+        
+        return {
+            'portfolio_id': portfolio.id,
+            'total_capital': Decimal(str(portfolio.total_capital)),
+            'allocated_capital': Decimal(str(portfolio.allocated_capital or 0)),
+            'available_capital': Decimal(str(portfolio.available_capital)),
+            'strategies': strategies,
+            'built_at': time.monotonic()
+        }
+    
+    def on_risk_update(self, entry: RiskEntry):
+        """Risk ledger listener: patch the pair's P&L and breach flag into its cached snapshot"""
+        pair = self.pairs_by_id.get(entry.allocation_id)
+        if pair is not None:
+            pair['realized_pnl'] = entry.realized_pnl
+            pair['floating_pnl'] = entry.floating_pnl
+            pair['risk_breached'] = entry.risk_breached
+            self.stats['pnl_updates'] += 1
+    
+    def invalidate(self, user_id: Optional[str] = None):
+        """Drop one user's snapshot (all snapshots by default) after a capital change"""
+        with self.cache_lock:
+            self.generation += 1
+            self.stats['invalidations'] += 1
+            if user_id is None:
+                self.snapshots.clear()
+                self.pairs_by_id.clear()
+                return
+            snapshot = self.snapshots.pop(user_id, None)
+            if snapshot is not None:
+                for strategy in snapshot['strategies']:
+                    for pair in strategy['pairs']:
+                        self.pairs_by_id.pop(pair['id'], None)
+    
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'users': len(self.snapshots)}
+
+# Global instance
+portfolio_snapshot_cache = PortfolioSnapshotCache(ttl_ms=PORTFOLIO_SNAPSHOT_TTL_MS)
+risk_ledger.add_listener(portfolio_snapshot_cache.on_risk_update)
\ No newline at end of file
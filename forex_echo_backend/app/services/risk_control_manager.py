@@ -5,7 +5,7 @@ from decimal import Decimal
 from sqlalchemy.orm import Session
 from app.services.capital_allocation_service import CapitalAllocationService
 from app.models.trading_models import TradeSignal
-from app.models.capital_allocation_models import RiskEvent
+from app.models.capital_allocation_models import RiskEvent, RiskEvaluation
 from app.utilities.forex_logger import forex_logger
 
 logger = forex_logger.get_logger(__name__)
@@ -17,28 +17,41 @@ class RiskControlManager:
         self.db = db
         self.capital_service = CapitalAllocationService(db) if db else None
     
-    def check_trade_permission(self, pair: str, strategy_name: str) -> bool:
-        """Check if trading is allowed for a pair/strategy combination"""
+    def evaluate(self, pair: str, strategy_name: str, floating_pnl: Optional[Decimal] = None,
+                 realized_pnl: Optional[Decimal] = None) -> RiskEvaluation:
+        """Trade permission, risk status and breach check in one call.
+        
+        With P&L the ledger is updated and thresholds are checked; without it
+        only permission and status are read. Everything comes from the same
+        risk snapshot, so one decision needs a single lookup.
+        """
         if not self.capital_service:
-            return True  # Allow trading if no capital service
-            
-        risk_status = self.capital_service.get_risk_status(pair, strategy_name)
-        if not risk_status:
-            logger.warning(f"No risk allocation found for {pair} in strategy {strategy_name}")
-            return False
+            return RiskEvaluation(can_trade=True)  # Allow trading if no capital service
         
-        return risk_status.can_trade
+        evaluation = self.capital_service.evaluate_risk(pair, strategy_name, floating_pnl, realized_pnl)
+        if evaluation is None:
+            logger.warning(f"No risk allocation found for {pair} in strategy {strategy_name}")
+            return RiskEvaluation(can_trade=False)
+        return evaluation
+    
+    def check_trade_permission(self, pair: str, strategy_name: str) -> bool:
+        """Check if trading is allowed for a pair/strategy combination"""
+        return self.evaluate(pair, strategy_name).can_trade
     
     def validate_trade_signal(self, pair: str, strategy_name: str, signal: TradeSignal, 
                             current_floating_pnl: Decimal = Decimal('0.00'),
-                            current_realized_pnl: Decimal = Decimal('0.00')) -> Optional[TradeSignal]:
-        """Validate trade signal against risk controls"""
+                            current_realized_pnl: Decimal = Decimal('0.00'),
+                            evaluation: Optional[RiskEvaluation] = None) -> Optional[TradeSignal]:
+        """Validate trade signal against risk controls (reusing `evaluation` if this tick already has one)"""
         
         if not self.capital_service:
             return signal  # Return signal as-is if no capital service
         
+        if evaluation is None:
+            evaluation = self.evaluate(pair, strategy_name, current_floating_pnl, current_realized_pnl)
+        
         # Check if trading is allowed
-        if not self.check_trade_permission(pair, strategy_name):
+        if not evaluation.can_trade:
             logger.warning(f"Trade blocked for {pair} - Risk breach active")
             return TradeSignal(
                 action="BLOCKED",
@@ -47,16 +60,12 @@ class RiskControlManager:
             )
         
         # Check risk control before allowing new trades
-        risk_triggered, risk_event = self.capital_service.check_risk_control(
-            pair, strategy_name, current_floating_pnl, current_realized_pnl
-        )
-        
-        if risk_triggered:
+        if evaluation.risk_triggered:
             logger.critical(f"Risk control triggered for {pair} - Overriding signal to CLOSE_ALL")
             return TradeSignal(
                 action="CLOSE_ALL",
                 lot_size=0,
-                reason=f"Risk control triggered: {risk_event.event_type.value}"
+                reason=f"Risk control triggered: {evaluation.risk_event.event_type.value}"
             )
         
         # Signal is valid
@@ -66,14 +75,11 @@ class RiskControlManager:
         """Update P&L and check risk controls"""
         if not self.capital_service:
             return None  # No risk control if no capital service
-            
-        risk_triggered, risk_event = self.capital_service.check_risk_control(
-            pair, strategy_name, floating_pnl, realized_pnl
-        )
         
-        if risk_triggered:
-            logger.critical(f"Risk control triggered during P&L update for {pair}: {risk_event.event_type.value}")
-            return risk_event
+        evaluation = self.evaluate(pair, strategy_name, floating_pnl, realized_pnl)
+        if evaluation.risk_triggered:
+            logger.critical(f"Risk control triggered during P&L update for {pair}: {evaluation.risk_event.event_type.value}")
+            return evaluation.risk_event
         
         return None
     
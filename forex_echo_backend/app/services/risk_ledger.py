@@ -0,0 +1,384 @@
+"""In-memory risk ledger - per-tick risk checks without a database round trip"""
+
+import threading
+import time
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from app.database.database import SessionLocal
+from app.database.entities.capital_allocation_entity import PairAllocationEntity, RiskEventEntity
+from app.models.capital_allocation_models import RiskEvent, RiskControlStatus, RiskEvaluation, RiskEventType
+from app.utilities.forex_logger import forex_logger
+from config import RISK_LEDGER_FLUSH_MS, RISK_LEDGER_REVALIDATE_MS
+
+logger = forex_logger.get_logger(__name__)
+
+class RiskEntry:
+    """Risk state of one pair allocation; P&L fields are ahead of the database until flushed"""
+    
+    __slots__ = ('pair', 'strategy_name', 'allocation_id', 'allocated_capital', 'used_capital',
+                 'threshold_pct', 'floating_pnl', 'realized_pnl', 'risk_breached', 'dirty', 'breach_dirty')
+    
+    def __init__(self, strategy_name: str, entity: PairAllocationEntity):
+        self.pair = entity.pair
+        self.strategy_name = strategy_name
+        self.allocation_id = entity.id
+        self.floating_pnl = Decimal(str(entity.floating_pnl or 0))
+        self.realized_pnl = Decimal(str(entity.realized_pnl or 0))
+        self.risk_breached = bool(entity.risk_breached)
+        self.dirty = False
+        self.breach_dirty = False  # A new breach not written yet
+        self.refresh(entity)
+    
+    def refresh(self, entity: PairAllocationEntity) -> bool:
+        """Take allocation fields and outside changes from the row; returns True if risk state changed.
+        
+        Unwritten P&L and breaches of this process win over the row.
+        """
+        self.allocated_capital = Decimal(str(entity.allocated_capital))
+        self.used_capital = Decimal(str(entity.used_capital or 0))
+        self.threshold_pct = Decimal(str(entity.floating_loss_threshold_pct))
+        changed = False
+        if not self.breach_dirty and self.risk_breached != bool(entity.risk_breached):
+            self.risk_breached = bool(entity.risk_breached)
+            changed = True
+        if not self.dirty:
+            floating_pnl = Decimal(str(entity.floating_pnl or 0))
+            realized_pnl = Decimal(str(entity.realized_pnl or 0))
+            if floating_pnl != self.floating_pnl or realized_pnl != self.realized_pnl:
+                self.floating_pnl = floating_pnl
+                self.realized_pnl = realized_pnl
+                changed = True
+        return changed
+    
+    def to_status(self) -> RiskControlStatus:
+        cumulative_loss = self.realized_pnl + self.floating_pnl
+        allocated = self.allocated_capital
+        return RiskControlStatus(
+            pair=self.pair,
+            strategy_name=self.strategy_name,
+            allocated_capital=allocated,
+            used_capital=self.used_capital,
+            realized_pnl=self.realized_pnl,
+            floating_pnl=self.floating_pnl,
+            cumulative_loss=cumulative_loss,
+            floating_loss_pct=abs(self.floating_pnl / allocated * 100) if allocated > 0 else 0,
+            capital_exhaustion_pct=abs(cumulative_loss / allocated * 100) if allocated > 0 else 0,
+            risk_breached=self.risk_breached,
+            can_trade=not self.risk_breached
+        )
+
+class RiskLedger:
+    """Pair allocation risk state keyed by (pair, strategy), evaluated in memory.
+    
+    Each allocation is read from MySQL once (through the caller's loader)
+    and then checked on every tick without touching the database. Changed
+    P&L and breach flags are written behind by a flusher thread in one
+    batched commit per interval; a new breach also records its RiskEvent
+    and wakes the flusher immediately. Services that change allocations
+    call invalidate() so the next check reloads the row. Changes made by
+    other processes (a reset from the API while shard workers trade, for
+    example) are picked up by the flusher, which re-reads every cached row
+    in one query each `revalidate_ms`; checks themselves never wait on it.
+    """
+    
+    def __init__(self, session_factory=None, flush_interval_ms: int = 1000, miss_ttl: float = 5.0,
+                 revalidate_ms: int = 5000):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.miss_ttl = miss_ttl
+        self.revalidate_interval = revalidate_ms / 1000.0
+        self.revalidated_at = time.monotonic()
+        self.entries: Dict[Tuple[str, str], RiskEntry] = {}
+        self.misses: Dict[Tuple[str, str], float] = {}  # key -> monotonic time of the empty lookup
+        self.pending_events: List[RiskEventEntity] = []
+        self.ledger_lock = threading.RLock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.flusher: Optional[threading.Thread] = None
+        self.running = True
+        self.listeners: List[Callable[[RiskEntry], None]] = []
+        self.stats = {'checks': 0, 'loads': 0, 'revalidations': 0, 'rows_revalidated': 0, 'flushes': 0,
+                      'rows_flushed': 0, 'events_flushed': 0, 'flush_errors': 0}
+    
+    def add_listener(self, listener: Callable[[RiskEntry], None]):
+        """Call `listener` with an entry whenever its P&L or breach state changes"""
+        self.listeners.append(listener)
+    
+    def _notify(self, entry: RiskEntry):
+        for listener in self.listeners:
+            try:
+                listener(entry)
+            except Exception as e:
+                logger.error(f"Risk ledger listener failed for {entry.pair}: {e}")
+    
+    def entry(self, pair: str, strategy_name: str,
+              loader: Callable[[], Optional[PairAllocationEntity]]) -> Optional[RiskEntry]:
+        """Cached entry, loaded with `loader` on first use (None if no allocation exists)"""
+        key = (pair, strategy_name)
+        entry = self.entries.get(key)
+        if entry is not None:
+            return entry
+        missed_at = self.misses.get(key)
+        if missed_at is not None and time.monotonic() - missed_at < self.miss_ttl:
+            return None
+        
+        entity = loader()
+        with self.ledger_lock:
+            self.stats['loads'] += 1
+            if entity is None:
+                self.misses[key] = time.monotonic()
+                return None
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = RiskEntry(strategy_name, entity)
+                self.misses.pop(key, None)
+        self._start_flusher()  # Cached entries need revalidating even if they never change here
+        return entry
+    
+    def revalidate(self) -> int:
+        """Re-read every cached row in one query so changes from other processes show up.
+        
+        Runs on the flusher thread; returns the number of entries whose risk state changed.
+        """
+        if self.session_factory is None:
+            return 0
+        with self.flush_lock:
+            with self.ledger_lock:
+                cached = dict(self.entries)
+            self.revalidated_at = time.monotonic()
+            if not cached:
+                return 0
+            
+            db = self.session_factory()
+            try:
+                ids = {entry.allocation_id for entry in cached.values()}
+                rows = db.scalars(select(PairAllocationEntity).where(PairAllocationEntity.id.in_(ids)))
+                entities = {entity.id: entity for entity in rows}
+                changed = []
+                with self.ledger_lock:
+                    self.stats['revalidations'] += 1
+                    self.stats['rows_revalidated'] += len(entities)
+                    for key, entry in cached.items():
+                        if self.entries.get(key) is not entry:
+                            continue  # Invalidated or reloaded meanwhile
+                        entity = entities.get(entry.allocation_id)
+                        if entity is None:
+                            # Allocation removed elsewhere - the next lookup goes through the loader again
+                            del self.entries[key]
+                        elif entry.refresh(entity):
+                            changed.append(entry)
+            except Exception as e:
+                logger.error(f"Risk ledger revalidation failed ({len(cached)} entries): {e}")
+                return 0  # Keep trading on the cached entries, retry at the next interval
+            finally:
+                db.close()
+        
+        for entry in changed:
+            logger.info(f"Risk state of {entry.pair} {entry.strategy_name} changed outside this process "
+                        f"(breached={entry.risk_breached})")
+            self._notify(entry)
+        return len(changed)
+    
+    def update(self, pair: str, strategy_name: str, floating_pnl: Decimal, realized_pnl: Decimal,
+               loader: Callable[[], Optional[PairAllocationEntity]]) -> Tuple[bool, Optional[RiskEvent]]:
+        """Record the latest P&L and check the thresholds"""
+        entry = self.entry(pair, strategy_name, loader)
+        if entry is None:
+            return False, None
+        return self._check(entry, floating_pnl, realized_pnl)
+    
+    def _check(self, entry: RiskEntry, floating_pnl: Decimal,
+               realized_pnl: Decimal) -> Tuple[bool, Optional[RiskEvent]]:
+        """Record P&L on an entry already looked up and check the thresholds"""
+        pair = entry.pair
+        with self.ledger_lock:
+            self.stats['checks'] += 1
+            changed = entry.floating_pnl != floating_pnl or entry.realized_pnl != realized_pnl
+            if changed:
+                entry.floating_pnl = floating_pnl
+                entry.realized_pnl = realized_pnl
+                self._mark_dirty(entry)
+            
+            allocated = entry.allocated_capital
+            cumulative_loss = realized_pnl + floating_pnl
+            floating_loss_pct = abs(floating_pnl / allocated * 100) if allocated > 0 else 0
+            
+            # Check floating loss threshold
+            if floating_loss_pct >= entry.threshold_pct:
+                event_type = RiskEventType.FLOATING_LOSS_BREACH
+                trigger_value = abs(floating_pnl)
+                threshold_value = allocated * (entry.threshold_pct / 100)
+            # Check capital exhaustion
+            elif abs(cumulative_loss) >= allocated:
+                event_type = RiskEventType.CAPITAL_EXHAUSTION
+                trigger_value = abs(cumulative_loss)
+                threshold_value = allocated
+            else:
+                event_type = None
+            
+            newly_breached = event_type is not None and not entry.risk_breached
+            if newly_breached:
+                entry.risk_breached = True
+                entry.breach_dirty = True
+                self._mark_dirty(entry)
+                self.pending_events.append(RiskEventEntity(
+                    pair_allocation_id=entry.allocation_id,
+                    event_type=event_type.value,
+                    trigger_value=trigger_value,
+                    threshold_value=threshold_value,
+                    action_taken="CLOSE_ALL_TRADES"
+                ))
+        
+        if changed or newly_breached:
+            self._notify(entry)
+        if event_type is None:
+            return False, None
+        
+        if newly_breached:
+            self.wake.set()  # Breaches are persisted right away, not at the next interval
+            if event_type == RiskEventType.FLOATING_LOSS_BREACH:
+                logger.critical(f"FLOATING LOSS BREACH: {pair} - {floating_loss_pct:.2f}% >= {entry.threshold_pct}%")
+            else:
+                logger.critical(f"CAPITAL EXHAUSTION: {pair} - Loss ${abs(cumulative_loss)} >= Allocated ${allocated}")
+        
+        return True, RiskEvent(
+            pair_allocation_id=entry.allocation_id,
+            event_type=event_type,
+            trigger_value=trigger_value,
+            threshold_value=threshold_value,
+            action_taken="CLOSE_ALL_TRADES"
+        )
+    
+    def evaluate(self, pair: str, strategy_name: str, floating_pnl: Optional[Decimal],
+                 realized_pnl: Optional[Decimal],
+                 loader: Callable[[], Optional[PairAllocationEntity]]) -> Optional[RiskEvaluation]:
+        """Permission, status and (when P&L is given) breach check from one entry lookup"""
+        entry = self.entry(pair, strategy_name, loader)
+        if entry is None:
+            return None
+        
+        can_trade = not entry.risk_breached  # Permission as of before this update
+        if floating_pnl is None or realized_pnl is None:
+            risk_triggered, risk_event = False, None
+        else:
+            risk_triggered, risk_event = self._check(entry, floating_pnl, realized_pnl)
+        return RiskEvaluation(can_trade=can_trade, risk_triggered=risk_triggered, risk_event=risk_event,
+                              status=entry.to_status())
+    
+    def reset(self, pair: str, strategy_name: str):
+        """Clear breach and P&L of a cached entry (the caller persists the reset itself)"""
+        with self.flush_lock, self.ledger_lock:
+            entry = self.entries.get((pair, strategy_name))
+            if entry is not None:
+                entry.risk_breached = False
+                entry.floating_pnl = Decimal('0.00')
+                entry.realized_pnl = Decimal('0.00')
+                entry.dirty = False
+                entry.breach_dirty = False
+        if entry is not None:
+            self._notify(entry)
+    
+    def invalidate(self, pair: Optional[str] = None, strategy_name: Optional[str] = None):
+        """Write pending changes and drop cached entries (all of them by default) so they reload"""
+        self.flush()
+        with self.ledger_lock:
+            if pair is None and strategy_name is None:
+                self.entries.clear()
+                self.misses.clear()
+                return
+            for cache in (self.entries, self.misses):
+                for key in [key for key in cache
+                            if (pair is None or key[0] == pair) and (strategy_name is None or key[1] == strategy_name)]:
+                    del cache[key]
+    
+    def _mark_dirty(self, entry: RiskEntry):
+        entry.dirty = True
+        self._start_flusher()
+    
+    def _start_flusher(self):
+        if self.flusher is None and self.session_factory is not None:
+            # Started on first use so importing the ledger never creates a thread
+            with self.ledger_lock:
+                if self.flusher is None:
+                    self.flusher = threading.Thread(target=self._flush_loop, name="risk-ledger-flush",
+                                                    daemon=True)
+                    self.flusher.start()
+    
+    def _flush_loop(self):
+        while self.running:
+            self.wake.wait(min(self.flush_interval, self.revalidate_interval))
+            self.wake.clear()
+            self.flush()
+            if time.monotonic() - self.revalidated_at >= self.revalidate_interval:
+                self.revalidate()
+    
+    def flush(self) -> int:
+        """Write every changed entry and pending risk event in one commit; returns rows written"""
+        if self.session_factory is None:
+            return 0
+        with self.flush_lock:
+            with self.ledger_lock:
+                flushed = [entry for entry in self.entries.values() if entry.dirty]
+                breached = [entry for entry in flushed if entry.breach_dirty]
+                updates = []
+                for entry in flushed:
+                    update = {'id': entry.allocation_id, 'floating_pnl': entry.floating_pnl,
+                              'realized_pnl': entry.realized_pnl}
+                    if entry.breach_dirty:
+                        # The flag is only ever written when it is raised, so a reset made
+                        # by another process is not overwritten by this process's P&L flushes
+                        update['risk_breached'] = True
+                    updates.append(update)
+                    entry.dirty = False
+                    entry.breach_dirty = False
+                events, self.pending_events = self.pending_events, []
+            
+            if not updates and not events:
+                return 0
+            
+            db = self.session_factory()
+            try:
+                if updates:
+                    db.bulk_update_mappings(PairAllocationEntity, updates)
+                if events:
+                    db.add_all(events)
+                db.commit()
+                self.stats['flushes'] += 1
+                self.stats['rows_flushed'] += len(updates)
+                self.stats['events_flushed'] += len(events)
+                return len(updates) + len(events)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Risk ledger flush failed ({len(updates)} rows, {len(events)} events): {e}")
+                self.stats['flush_errors'] += 1
+                with self.ledger_lock:
+                    for entry in flushed:
+                        entry.dirty = True
+                    for entry in breached:
+                        entry.breach_dirty = True
+                    self.pending_events = events + self.pending_events
+                return 0
+            finally:
+                db.close()
+    
+    def get_stats(self) -> Dict:
+        with self.ledger_lock:
+            return {
+                **self.stats,
+                'entries': len(self.entries),
+                'dirty': sum(1 for entry in self.entries.values() if entry.dirty),
+                'pending_events': len(self.pending_events)
+            }
+    
+    def shutdown(self):
+        """Stop the flusher and write what is still pending"""
+        self.running = False
+        self.wake.set()
+        if self.flusher is not None:
+            self.flusher.join(timeout=10)
+        self.flush()
+
+# Global instance
+risk_ledger = RiskLedger(SessionLocal, flush_interval_ms=RISK_LEDGER_FLUSH_MS,
+                         revalidate_ms=RISK_LEDGER_REVALIDATE_MS)
\ No newline at end of file
@@ -6,8 +6,9 @@ from decimal import Decimal
 from sqlalchemy.orm import Session
 from app.models.trading_models import MarketData, TradeSignal, TradeDirection
 from app.models.strategy_models import RSIPairsConfig, RSIPairsState
-from app.indicators.rsi import calculate_rsi
-from app.indicators.atr import calculate_atr
+from app.indicators.batch import rates_to_columns
+from app.services.indicator_cache import indicator_cache
+from app.services.symbol_info_cache import symbol_info_cache
 from app.utilities.forex_logger import forex_logger
 from app.services.base_strategy import BaseStrategy
 
@@ -19,12 +20,18 @@ class RSIPairsStrategy(BaseStrategy):
     def __init__(self, config: RSIPairsConfig, pair: str, timeframe: str = "5M", db: Session = None):
         super().__init__(pair, timeframe, "rsi_pairs", db)
         self.config = config
-        self.state = RSIPairsState()
+        self.state = RSIPairsState(self._max_candles_needed())
         
         # Store both symbols for pairs trading
         self.symbol1 = config.symbol1
         self.symbol2 = config.symbol2
         
+        # Streaming RSI/ATR per symbol, shared with other tasks using the same symbol/timeframe/params
+        self.s1_rsi = indicator_cache.acquire(self, self.symbol1, timeframe, "rsi", config.rsi_period, config.rsi_mode)
+        self.s2_rsi = indicator_cache.acquire(self, self.symbol2, timeframe, "rsi", config.rsi_period, config.rsi_mode)
+        self.s1_atr = indicator_cache.acquire(self, self.symbol1, timeframe, "atr", config.atr_period, config.atr_mode)
+        self.s2_atr = indicator_cache.acquire(self, self.symbol2, timeframe, "atr", config.atr_period, config.atr_mode)
+        
         # Capital allocation integration
         self.allocated_capital = Decimal('0.00')
         self.risk_threshold_pct = Decimal('20.00')
@@ -34,24 +41,41 @@ class RSIPairsStrategy(BaseStrategy):
     
     def add_candle_data(self, symbol: str, candle: MarketData):
         """Add candle data for specific symbol"""
-        candle_dict = {
-            'timestamp': candle.timestamp,
-            'open': candle.open,
-            'high': candle.high,
-            'low': candle.low,
-            'close': candle.close
-        }
-        
+        # Candle buffers are sized to what the indicators need, oldest candles drop off
+        if symbol == self.symbol1:
+            self.state.s1_candles.append_candle(candle)
+            self.s1_rsi.update(candle.timestamp, candle.close)
+            self.s1_atr.update(candle.timestamp, candle.high, candle.low, candle.close)
+        elif symbol == self.symbol2:
+            self.state.s2_candles.append_candle(candle)
+            self.s2_rsi.update(candle.timestamp, candle.close)
+            self.s2_atr.update(candle.timestamp, candle.high, candle.low, candle.close)
+    
+    def _max_candles_needed(self) -> int:
+        return max(self.config.rsi_period, self.config.atr_period) + 10
+    
+    def warm_up(self, symbol: str, rates) -> int:
+        """Load indicator state for one symbol from historical MT5 rates without evaluating signals."""
         if symbol == self.symbol1:
-            self.state.s1_candles.append(candle_dict)
-            # Keep only necessary candles
-            max_needed = max(self.config.rsi_period, self.config.atr_period) + 10
-            if len(self.state.s1_candles) > max_needed:
-                self.state.s1_candles = self.state.s1_candles[-max_needed:]
+            rsi, atr, candles = self.s1_rsi, self.s1_atr, self.state.s1_candles
         elif symbol == self.symbol2:
-            self.state.s2_candles.append(candle_dict)
-            if len(self.state.s2_candles) > max_needed:
-                self.state.s2_candles = self.state.s2_candles[-max_needed:]
+            rsi, atr, candles = self.s2_rsi, self.s2_atr, self.state.s2_candles
+        else:
+            return 0
+        
+        columns = rates_to_columns(rates)
+        if columns['close'].size == 0:
+            return 0
+        
+        last_timestamp = int(columns['timestamp'][-1])
+        rsi.warm_up(last_timestamp, columns['close'])
+        atr.warm_up(last_timestamp, columns['high'], columns['low'], columns['close'])
+        
+        candles.clear()
+        candles.extend(columns)
+        
+        logger.info(f"Warmed up {symbol} with {len(columns['close'])} historical candles")
+        return len(columns['close'])
     
     def calculate_indicators(self) -> Dict[str, float]:
         """Calculate RSI and ATR for both symbols"""
@@ -60,50 +84,24 @@ class RSIPairsStrategy(BaseStrategy):
             's1_atr': 0.0, 's2_atr': 0.0
         }
         
-        # Calculate RSI for symbol1
-        if len(self.state.s1_candles) >= self.config.rsi_period + 1:
-            s1_closes = [c['close'] for c in self.state.s1_candles]
-            indicators['s1_rsi'] = calculate_rsi(s1_closes, self.config.rsi_period)
-        
-        # Calculate RSI for symbol2
-        if len(self.state.s2_candles) >= self.config.rsi_period + 1:
-            s2_closes = [c['close'] for c in self.state.s2_candles]
-            indicators['s2_rsi'] = calculate_rsi(s2_closes, self.config.rsi_period)
-        
-        # Calculate ATR for symbol1
-        if len(self.state.s1_candles) >= self.config.atr_period:
-            s1_market_data = [MarketData(
-                timestamp=c['timestamp'], open=c['open'], high=c['high'],
-                low=c['low'], close=c['close']
-            ) for c in self.state.s1_candles]
-            indicators['s1_atr'] = calculate_atr(s1_market_data, self.config.atr_period)
-        
-        # Calculate ATR for symbol2
-        if len(self.state.s2_candles) >= self.config.atr_period:
-            s2_market_data = [MarketData(
-                timestamp=c['timestamp'], open=c['open'], high=c['high'],
-                low=c['low'], close=c['close']
-            ) for c in self.state.s2_candles]
-            indicators['s2_atr'] = calculate_atr(s2_market_data, self.config.atr_period)
+        # RSI and ATR are maintained incrementally as candles arrive
+        if self.s1_rsi.ready:
+            indicators['s1_rsi'] = self.s1_rsi.value
+        
+        if self.s2_rsi.ready:
+            indicators['s2_rsi'] = self.s2_rsi.value
+        
+        if self.s1_atr.ready:
+            indicators['s1_atr'] = self.s1_atr.value
+        
+        if self.s2_atr.ready:
+            indicators['s2_atr'] = self.s2_atr.value
         
         return indicators
     
     def get_pip_size(self, symbol: str) -> float:
-        """Get pip size for symbol - dynamic calculation"""
-        symbol = symbol.upper()
-        
-        # JPY pairs have different pip size
-        if 'JPY' in symbol:
-            return 0.01
-        # Metals typically use 2 decimal places
-        elif symbol.startswith('XAU') or symbol.startswith('XAG') or 'GOLD' in symbol or 'SILVER' in symbol:
-            return 0.01
-        # Crypto pairs (if supported)
-        elif 'BTC' in symbol or 'ETH' in symbol:
-            return 1.0
-        # Standard forex pairs use 4 decimal places
-        else:
-            return 0.0001
+        """Get pip size for symbol from terminal metadata (name-based guess without a terminal)"""
+        return symbol_info_cache.get_pip_size(symbol)
     
     def calculate_hedge_ratio(self, s1_atr: float, s2_atr: float) -> float:
         """Calculate hedge ratio based on ATR"""
@@ -223,7 +221,7 @@ class RSIPairsStrategy(BaseStrategy):
                 self.state.in_trade = True
                 self.state.entry_time = datetime.now()
                 self.state.entry_price_s1 = candle.close
-                self.state.entry_price_s2 = self.state.s2_candles[-1]['close'] if self.state.s2_candles else candle.close
+                self.state.entry_price_s2 = self.state.s2_candles.last('close') if self.state.s2_candles else candle.close
                 self.state.lot_size_s1 = s1_lots
                 self.state.lot_size_s2 = s2_lots
                 self.state.trade_direction = trade_type
@@ -304,21 +302,16 @@ class RSIPairsStrategy(BaseStrategy):
         logger.info(f"Position size calculated: {adjusted_lot_size} (Capital: ${self.allocated_capital})")
         return adjusted_lot_size
     
-    def check_capital_allocation_risk(self) -> bool:
-        """Check if strategy should stop due to capital allocation risk"""
-        if not self.can_trade():
-            logger.warning(f"Trading blocked by capital allocation for {self.pair}")
-            return True
-        
-        risk_status = self.get_risk_status()
-        if risk_status and risk_status.get('risk_breached', False):
-            logger.critical(f"Risk breached for {self.pair} - stopping strategy")
-            return True
-        
-        return False
-    
     def reset_strategy(self):
         """Reset strategy state"""
         logger.info("Resetting RSI Pairs strategy state")
-        self.state = RSIPairsState()
-        self._initialize_capital_allocation()
\ No newline at end of file
+        self.state = RSIPairsState(self._max_candles_needed())
+        self.s1_rsi.reset()
+        self.s2_rsi.reset()
+        self.s1_atr.reset()
+        self.s2_atr.reset()
+        self._initialize_capital_allocation()
+    
+    def release_indicators(self):
+        """Unsubscribe from shared indicators so unused ones can be evicted"""
+        indicator_cache.release(self)
\ No newline at end of file
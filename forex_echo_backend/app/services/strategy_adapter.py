@@ -33,6 +33,10 @@ class CapitalAllocatedGoldStrategy(BaseStrategy):
         """Reset strategy state"""
         self.strategy.reset_strategy()
     
+    def release_indicators(self):
+        """Release shared indicators held by the underlying strategy"""
+        self.strategy.release_indicators()
+    
     def get_strategy_status(self) -> dict:
         """Get strategy status including grid info"""
         return {
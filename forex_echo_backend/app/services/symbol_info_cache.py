@@ -0,0 +1,156 @@
+"""Symbol metadata cache - loaded once per MT5 connection, refreshed on demand"""
+
+import math
+import threading
+from typing import Dict, List, NamedTuple, Optional
+from app.services.mt5_gateway import mt5
+from app.utilities.forex_logger import forex_logger
+
+logger = forex_logger.get_logger(__name__)
+
+def guess_pip_size(symbol: str) -> float:
+    """Pip size from the symbol name, for when no terminal metadata is available"""
+    symbol = symbol.upper()
+    
+    # JPY pairs have different pip size
+    if 'JPY' in symbol:
+        return 0.01
+    # Metals typically use 2 decimal places
+    elif symbol.startswith('XAU') or symbol.startswith('XAG') or 'GOLD' in symbol or 'SILVER' in symbol:
+        return 0.01
+    # Crypto pairs (if supported)
+    elif 'BTC' in symbol or 'ETH' in symbol:
+        return 1.0
+    # Standard forex pairs use 4 decimal places
+    else:
+        return 0.0001
+
+class SymbolSpec(NamedTuple):
+    """The parts of mt5.symbol_info() that sizing and the API need"""
+    name: str
+    description: str
+    currency_base: str
+    currency_profit: str
+    digits: int
+    point: float
+    spread: int
+    trade_mode: int
+    visible: bool
+    trade_contract_size: float
+    trade_tick_size: float
+    trade_tick_value: float
+    volume_min: float
+    volume_max: float
+    volume_step: float
+    
+    @classmethod
+    def from_symbol_info(cls, info) -> 'SymbolSpec':
+        return cls(*(getattr(info, field) for field in cls._fields))
+    
+    @property
+    def pip_size(self) -> float:
+        """One pip: a tenth of the quote for 3/5-digit (fractional pip) quotes, otherwise one point"""
+        if self.digits in (3, 5):
+            return round(self.point * 10, self.digits - 1)
+        return self.point
+    
+    @property
+    def pip_value(self) -> float:
+        """Account-currency value of one pip for 1.0 lot"""
+        if not self.trade_tick_size:
+            return 0.0
+        return self.trade_tick_value * self.pip_size / self.trade_tick_size
+    
+    def normalize_volume(self, volume: float) -> float:
+        """Round a lot size down to the volume step and clamp it to the symbol's limits"""
+        step = self.volume_step or 0.01
+        steps = math.floor(volume / step + 1e-9)
+        decimals = max(0, -int(math.floor(math.log10(step)))) if step < 1 else 0
+        normalized = round(steps * step, decimals)
+        return min(max(normalized, self.volume_min), self.volume_max)
+    
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'description': self.description,
+            'currency_base': self.currency_base,
+            'currency_profit': self.currency_profit,
+            'digits': self.digits,
+            'point': self.point,
+            'spread': self.spread,
+            'trade_mode': self.trade_mode
+        }
+
+class SymbolInfoCache:
+    """Symbol specs keyed by name.
+    
+    load() reads every symbol with one symbols_get() call when the terminal
+    connects; symbols missing from that load are fetched lazily with
+    symbol_info() once. Lookups never touch MT5 after that, so pip sizes and
+    lot steps are free on the sizing path. Without a terminal (e.g. in
+    engine shard workers) get() returns None and callers fall back.
+    """
+    
+    def __init__(self, mt5_module=None):
+        self.mt5 = mt5_module if mt5_module is not None else mt5
+        self.specs: Dict[str, Optional[SymbolSpec]] = {}  # None = known missing until the next load
+        self.loaded = False
+        self.cache_lock = threading.Lock()
+    
+    def load(self) -> int:
+        """(Re)load every symbol from the terminal; returns the number of symbols"""
+        if self.mt5 is None:
+            return 0
+        symbols = self.mt5.symbols_get()
+        if not symbols:
+            logger.warning("Symbol info cache: terminal returned no symbols")
+            return 0
+        
+        specs = {info.name: SymbolSpec.from_symbol_info(info) for info in symbols}
+        with self.cache_lock:
+            self.specs = specs
+            self.loaded = True
+        logger.info(f"Symbol info cache loaded {len(specs)} symbols")
+        return len(specs)
+    
+    def refresh(self, symbol: str) -> Optional[SymbolSpec]:
+        """Re-read one symbol from the terminal"""
+        if self.mt5 is None:
+            return None
+        info = self.mt5.symbol_info(symbol)
+        spec = SymbolSpec.from_symbol_info(info) if info else None
+        with self.cache_lock:
+            self.specs[symbol] = spec
+        return spec
+    
+    def clear(self):
+        """Forget everything (on disconnect / account change)"""
+        with self.cache_lock:
+            self.specs = {}
+            self.loaded = False
+    
+    def get(self, symbol: str) -> Optional[SymbolSpec]:
+        if symbol in self.specs:
+            return self.specs[symbol]
+        try:
+            return self.refresh(symbol)
+        except Exception as e:
+            logger.warning(f"Could not load symbol info for {symbol}: {e}")
+            return None
+    
+    def all_symbols(self) -> List[SymbolSpec]:
+        """Every loaded symbol, loading them first if this connection has not yet"""
+        if not self.loaded:
+            self.load()
+        return [spec for spec in self.specs.values() if spec is not None]
+    
+    def get_pip_size(self, symbol: str) -> float:
+        spec = self.get(symbol)
+        return spec.pip_size if spec else guess_pip_size(symbol)
+    
+    def normalize_volume(self, symbol: str, volume: float) -> float:
+        spec = self.get(symbol)
+        return spec.normalize_volume(volume) if spec else round(max(volume, 0.01), 2)
+
+# Global instance
+symbol_info_cache = SymbolInfoCache()
\ No newline at end of file
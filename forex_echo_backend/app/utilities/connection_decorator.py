@@ -17,10 +17,10 @@ def require_mt5_connection(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
         try:
-            import MetaTrader5 as mt5
+            from app.services.mt5_connection_state import mt5_connection_state
             
-            # Check if MT5 is initialized and connected
-            terminal_info = mt5.terminal_info()
+            # Check if MT5 is initialized and connected (shared snapshot, refreshed at most once per TTL)
+            terminal_info = mt5_connection_state.terminal_info()
             if terminal_info is None:
                 logger.error("MT5 terminal not connected - trade execution blocked")
                 return None
@@ -50,10 +50,10 @@ def require_symbol_available(symbol: str):
         @wraps(func)
         def wrapper(*args, **kwargs):
             try:
-                import MetaTrader5 as mt5
+                from app.services.symbol_info_cache import symbol_info_cache
                 
                 # Check if symbol is available
-                symbol_info = mt5.symbol_info(symbol)
+                symbol_info = symbol_info_cache.get(symbol)
                 if symbol_info is None:
                     logger.error(f"Symbol {symbol} not available - trade execution blocked")
                     return None
@@ -80,7 +80,7 @@ def handle_mt5_errors(func):
         try:
             return func(*args, **kwargs)
         except Exception as e:
-            import MetaTrader5 as mt5
+            from app.services.mt5_gateway import mt5
             
             # Get MT5 specific error if available
             mt5_error = mt5.last_error()
@@ -100,10 +100,10 @@ def prevent_db_entry_without_connection(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
         try:
-            import MetaTrader5 as mt5
+            from app.services.mt5_connection_state import mt5_connection_state
             
             # Check if MT5 is connected before allowing DB operations
-            terminal_info = mt5.terminal_info()
+            terminal_info = mt5_connection_state.terminal_info()
             if terminal_info is None or not terminal_info.connected:
                 logger.error("MT5 not connected - blocking database entry for trade")
                 return None
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Bar Type Micro-Benchmark
+- Pydantic MarketData vs Bar NamedTuple construction
+- Attribute access cost on the strategy hot path
+- Conversion of a full MT5 rates array
+"""
+
+import sys
+import timeit
+import numpy as np
+from app.models.trading_models import MarketData, Bar
+from app.indicators.batch import rates_to_bars
+
+RATES_DTYPE = [('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+               ('close', '<f8'), ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')]
+
+def make_rates(count: int) -> np.ndarray:
+    """Synthetic rates array shaped like mt5.copy_rates_from_pos output"""
+    rng = np.random.default_rng(7)
+    closes = 2000 + np.cumsum(rng.normal(0, 1, count))
+    rates = np.zeros(count, dtype=RATES_DTYPE)
+    rates['time'] = 1700000000 + np.arange(count) * 900
+    rates['open'] = closes
+    rates['high'] = closes + rng.random(count)
+    rates['low'] = closes - rng.random(count)
+    rates['close'] = closes
+    rates['tick_volume'] = rng.integers(1, 500, count)
+    return rates
+
+def market_data_from_rates(rates):
+    return [MarketData(timestamp=int(rate['time']), open=float(rate['open']), high=float(rate['high']),
+                       low=float(rate['low']), close=float(rate['close']), volume=int(rate['tick_volume']))
+            for rate in rates]
+
+def report(label: str, seconds: float, runs: int, baseline: float = None):
+    per_call = seconds / runs * 1e6
+    speedup = f"  ({baseline / seconds:.1f}x faster)" if baseline else ""
+    print(f"  {label:<32} {per_call:10.2f} us{speedup}")
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rate = make_rates(1)[0]
+    values = (int(rate['time']), float(rate['open']), float(rate['high']),
+              float(rate['low']), float(rate['close']), int(rate['tick_volume']))
+    
+    print("Bar Type Benchmark")
+    print("=" * 18)
+    
+    print(f"\n1. Single candle construction ({runs} runs):")
+    pydantic_time = timeit.timeit(
+        lambda: MarketData(timestamp=values[0], open=values[1], high=values[2],
+                           low=values[3], close=values[4], volume=values[5]), number=runs)
+    bar_time = timeit.timeit(lambda: Bar(*values), number=runs)
+    report("MarketData (pydantic)", pydantic_time, runs)
+    report("Bar (NamedTuple)", bar_time, runs, pydantic_time)
+    
+    print(f"\n2. Attribute access, close/high/low ({runs} runs):")
+    market_data, bar = MarketData(timestamp=values[0], open=values[1], high=values[2],
+                                  low=values[3], close=values[4]), Bar(*values)
+    pydantic_time = timeit.timeit(lambda: market_data.close + market_data.high - market_data.low, number=runs)
+    bar_time = timeit.timeit(lambda: bar.close + bar.high - bar.low, number=runs)
+    report("MarketData (pydantic)", pydantic_time, runs)
+    report("Bar (NamedTuple)", bar_time, runs, pydantic_time)
+    
+    for count in (5, 1000):
+        conversions = max(runs // count, 10)
+        rates = make_rates(count)
+        print(f"\n3. Convert {count} MT5 rates ({conversions} runs):")
+        pydantic_time = timeit.timeit(lambda: market_data_from_rates(rates), number=conversions)
+        bar_time = timeit.timeit(lambda: rates_to_bars(rates), number=conversions)
+        report("MarketData per rate", pydantic_time, conversions)
+        report("rates_to_bars", bar_time, conversions, pydantic_time)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Risk Evaluation Benchmark
+- Database round trips and latency of one trade decision
+- Per-call risk path (can_trade + get_risk_status + check_trade_permission + check_risk_control)
+  queried straight from the database, as before the risk ledger
+- The same per-call path answered by the risk ledger, as it ran before evaluate()
+- One RiskControlManager.evaluate() snapshot
+The ledger rows include its write-behind: the ledger is flushed every N decisions
+(default 1 - a task decides once per closed bar, and the flusher runs every second).
+- evaluate() on closed-bar spacing: each decision comes after the revalidation interval
+  has passed, with the ledger's own flusher thread revalidating in the background
+Runs against an in-memory SQLite database; pass a round-trip time to estimate remote MySQL cost.
+
+Usage: benchmark_risk_evaluation.py [runs] [rtt_ms] [decisions_per_flush]
+"""
+
+import sys
+import threading
+import time
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database.database import Base
+from app.database.entities.capital_allocation_entity import (
+    PortfolioEntity, StrategyAllocationEntity, PairAllocationEntity
+)
+from app.services import capital_allocation_service
+from app.services.risk_control_manager import RiskControlManager
+from app.services.risk_ledger import RiskLedger
+
+PAIR = "XAUUSD"
+STRATEGY = "gold_buy_dip"
+
+def make_database():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    
+    db = session_factory()
+    portfolio = PortfolioEntity(user_id="benchmark", total_capital=10000, available_capital=9000,
+                                allocated_capital=1000)
+    db.add(portfolio)
+    db.commit()
+    strategy = StrategyAllocationEntity(portfolio_id=portfolio.id, strategy_name=STRATEGY,
+                                        allocation_percentage=10, allocated_capital=1000)
+    db.add(strategy)
+    db.commit()
+    db.add(PairAllocationEntity(strategy_allocation_id=strategy.id, pair=PAIR, allocated_capital=1000,
+                                floating_loss_threshold_pct=20))
+    db.commit()
+    db.close()
+    
+    statements = [0, 0]  # All statements, statements run on the deciding (main) thread
+    def count(*args, **kwargs):
+        statements[0] += 1
+        if threading.current_thread() is threading.main_thread():
+            statements[1] += 1
+    event.listen(engine, "before_cursor_execute", count)
+    return session_factory, statements
+
+def legacy_decision(service, db, floating_pnl: Decimal):
+    """The per-call path with every risk read going to the database"""
+    for _ in range(3):  # can_trade(), get_risk_status(), check_trade_permission()
+        row = service._get_pair_allocation(PAIR, STRATEGY)
+        _ = not row.risk_breached
+    row = service._get_pair_allocation(PAIR, STRATEGY)  # check_risk_control()
+    row.floating_pnl = floating_pnl
+    db.commit()
+
+def ledger_decision(service, floating_pnl: Decimal):
+    """The per-call path on the ledger: every call does its own ledger lookup"""
+    service.check_risk_control(PAIR, STRATEGY, floating_pnl, Decimal("0.00"))  # update_pnl()
+    for _ in range(3):  # can_trade(), get_risk_status(), check_trade_permission()
+        _ = service.get_risk_status(PAIR, STRATEGY).can_trade
+    service.check_risk_control(PAIR, STRATEGY, floating_pnl, Decimal("0.00"))  # validate_trade_signal()
+
+def evaluate_decision(manager, floating_pnl: Decimal):
+    """One consolidated evaluation"""
+    manager.evaluate(PAIR, STRATEGY, floating_pnl, Decimal("0.00"))
+
+def count_lookups(ledger: RiskLedger):
+    """Count ledger entry lookups (update() and evaluate() go through entry() as well)"""
+    lookups = [0]
+    entry = ledger.entry
+    def counted(*args, **kwargs):
+        lookups[0] += 1
+        return entry(*args, **kwargs)
+    ledger.entry = counted
+    return lookups
+
+def measure(label: str, decision, runs: int, statements, rtt_ms: float, lookups,
+            ledger: RiskLedger = None, decisions_per_flush: int = 1):
+    before, lookups_before = statements[0], lookups[0]
+    started = time.perf_counter()
+    for i in range(runs):
+        decision(Decimal(-(i % 50)))
+        if ledger is not None and (i + 1) % decisions_per_flush == 0:
+            ledger.flush()
+    if ledger is not None:
+        ledger.flush()
+    elapsed = time.perf_counter() - started
+    per_decision = (statements[0] - before) / runs
+    remote_ms = per_decision * rtt_ms
+    print(f"  {label:<28} {elapsed / runs * 1e6:10.1f} us  {per_decision:6.2f} SQL/decision  "
+          f"{(lookups[0] - lookups_before) / runs:5.2f} lookups/decision  "
+          f"~{remote_ms:6.1f} ms at {rtt_ms:g} ms RTT")
+
+def measure_spaced(manager, ledger: RiskLedger, runs: int, statements, rtt_ms: float):
+    """Decisions spaced past the revalidation interval, as closed-bar evaluation spaces them"""
+    spacing = ledger.revalidate_interval * 1.5
+    evaluate_decision(manager, Decimal(0))  # First lookup loads the entry
+    revalidations = ledger.stats['revalidations']
+    before_all, before_decisions = statements
+    elapsed = 0.0
+    decision_statements = 0
+    for i in range(runs):
+        time.sleep(spacing)
+        before_decision = statements[1]
+        started = time.perf_counter()
+        evaluate_decision(manager, Decimal(-(i % 50)))
+        elapsed += time.perf_counter() - started
+        decision_statements += statements[1] - before_decision
+    background_statements = (statements[0] - before_all) - (statements[1] - before_decisions)
+    per_decision = decision_statements / runs
+    print(f"  {'evaluate(), interval passed':<28} {elapsed / runs * 1e6:10.1f} us  {per_decision:6.2f} SQL/decision  "
+          f"~{per_decision * rtt_ms:6.1f} ms at {rtt_ms:g} ms RTT")
+    print(f"  Flusher thread meanwhile: {ledger.stats['revalidations'] - revalidations} revalidations, "
+          f"{background_statements} statements off the decision path")
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rtt_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 20.0
+    decisions_per_flush = max(1, int(sys.argv[3])) if len(sys.argv) > 3 else 1
+    session_factory, statements = make_database()
+    
+    # Write-behind against the benchmark database; flushed explicitly so every flush is counted
+    ledger = RiskLedger(session_factory, flush_interval_ms=3600 * 1000, revalidate_ms=3600 * 1000)
+    capital_allocation_service.risk_ledger = ledger
+    lookups = count_lookups(ledger)
+    db = session_factory()
+    manager = RiskControlManager(db)
+    service = manager.capital_service
+    
+    print("Risk Evaluation Benchmark")
+    print("=" * 25)
+    print(f"\n1. One trade decision ({runs} runs, ledger flushed every {decisions_per_flush} decisions):")
+    measure("Per-call, database", lambda pnl: legacy_decision(service, db, pnl), runs, statements, rtt_ms,
+            lookups)
+    measure("Per-call, risk ledger", lambda pnl: ledger_decision(service, pnl), runs, statements, rtt_ms,
+            lookups, ledger, decisions_per_flush)
+    measure("evaluate()", lambda pnl: evaluate_decision(manager, pnl), runs, statements, rtt_ms,
+            lookups, ledger, decisions_per_flush)
+    print(f"\n2. Ledger: {ledger.get_stats()}")
+    ledger.shutdown()
+    
+    # The ledger as configured in production, with a short revalidation interval so the run stays quick
+    ledger = RiskLedger(session_factory, flush_interval_ms=100, revalidate_ms=200)
+    capital_allocation_service.risk_ledger = ledger
+    spaced_runs = 10
+    print(f"\n3. One trade decision every {ledger.revalidate_interval * 1.5:g} s "
+          f"(revalidation every {ledger.revalidate_interval:g} s, {spaced_runs} runs):")
+    measure_spaced(manager, ledger, spaced_runs, statements, rtt_ms)
+    ledger.shutdown()
+    db.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
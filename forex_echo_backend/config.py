@@ -25,4 +25,19 @@ JWT_SECRET_KEY = config("JWT_SECRET_KEY", default="O9fTITThxK2UY9EUdQQMXT0UMMKHu
 ALGORITHM = config("ALGORITHM", default="HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = config("ACCESS_TOKEN_EXPIRE_MINUTES", default=30, cast=int)
 
+# Trading Engine Configuration
+# "threads": one pool thread per task; "async": coroutine per task on one event loop;
+# "sharded": strategies run in worker processes, one shard per (pair, timeframe) hash
+TRADING_ENGINE_MODE = config("TRADING_ENGINE_MODE", default="threads")
+TRADING_ENGINE_IO_WORKERS = config("TRADING_ENGINE_IO_WORKERS", default=8, cast=int)
+TRADING_ENGINE_SHARDS = config("TRADING_ENGINE_SHARDS", default=0, cast=int)  # 0 = one per CPU core
 
+# MT5 Configuration
+MT5_STATE_TTL_MS = config("MT5_STATE_TTL_MS", default=500, cast=int)  # Max age of cached terminal/account info
+ACCOUNT_SYNC_INTERVAL_MS = config("ACCOUNT_SYNC_INTERVAL_MS", default=5000, cast=int)  # Balance refresh for portfolio reads
+
+
+# Risk Control Configuration
+RISK_LEDGER_FLUSH_MS = config("RISK_LEDGER_FLUSH_MS", default=1000, cast=int)  # Write-behind interval for tick P&L
+RISK_LEDGER_REVALIDATE_MS = config("RISK_LEDGER_REVALIDATE_MS", default=5000, cast=int)  # Re-read rows changed by other processes
+PORTFOLIO_SNAPSHOT_TTL_MS = config("PORTFOLIO_SNAPSHOT_TTL_MS", default=5000, cast=int)  # Max age of cached dashboard snapshots
\ No newline at end of file
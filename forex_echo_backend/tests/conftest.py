@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the backend as `app`, like run.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""Fake MetaTrader5 module and strategies for running the engine without a terminal"""
+
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+import numpy as np
+from app.models.trading_models import TradeSignal
+
+RATES_DTYPE = np.dtype([('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+                        ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')])
+
+class FakeMT5:
+    """The parts of the MetaTrader5 module the feed, gateway and engine use.
+    
+    Bars are kept per (symbol, timeframe constant), oldest first; the last
+    one is the forming bar, as copy_rates_from_pos position 0 is in MT5.
+    """
+    
+    TIMEFRAME_M1 = 1
+    TIMEFRAME_M5 = 5
+    TIMEFRAME_M15 = 15
+    TIMEFRAME_H1 = 16385
+    TIMEFRAME_H4 = 16388
+    TIMEFRAME_D1 = 16408
+    
+    def __init__(self, balance: float = 10000.0, server_offset: int = 0):
+        self.bars: Dict[Tuple[str, int], List[tuple]] = {}
+        self.account = SimpleNamespace(balance=balance, equity=balance, login=1001)
+        self.server_offset = server_offset
+        self.calls: Dict[str, int] = {}
+        self.lock = threading.Lock()
+    
+    def _count(self, name: str):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+    
+    def add_bar(self, symbol: str, timeframe: int, timestamp: int, close: float):
+        self.bars.setdefault((symbol, timeframe), []).append(
+            (timestamp, close, close + 1.0, close - 1.0, close, 100, 0, 0))
+    
+    def terminal_info(self):
+        self._count('terminal_info')
+        return SimpleNamespace(connected=True, trade_allowed=True)
+    
+    def account_info(self):
+        self._count('account_info')
+        return self.account
+    
+    def symbol_info_tick(self, symbol: str):
+        self._count('symbol_info_tick')
+        return SimpleNamespace(time=int(time.time()) + self.server_offset, bid=1.0, ask=1.1)
+    
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int):
+        self._count('copy_rates_from_pos')
+        bars = self.bars.get((symbol, timeframe), [])
+        if start_pos >= len(bars):
+            return None
+        end = len(bars) - start_pos
+        return np.array(bars[max(0, end - count):end], dtype=RATES_DTYPE)
+    
+    def last_error(self):
+        return (1, "Success")
+
+class FakeConnectionState:
+    """mt5_connection_state stand-in serving a FakeMT5 account"""
+    
+    def __init__(self, terminal: FakeMT5):
+        self.terminal = terminal
+    
+    def get(self, max_age=None):
+        return SimpleNamespace(account_info=self.terminal.account_info())
+
+class EchoStrategy:
+    """Signals BUY on every closed bar and CLOSE_ALL on forming-bar updates.
+    
+    The reason records where and with what it ran.
+    """
+    
+    def __init__(self, config: dict, pair: str, timeframe: str):
+        self.pair = pair
+        self.timeframe = timeframe
+    
+    def process_tick(self, candle, current_equity: float = 0):
+        from app.services.account_balance_sync import account_balance_sync
+        return TradeSignal(action="BUY", lot_size=0.01,
+                           reason=f"{os.getpid()}|{candle.timestamp}|{current_equity}|{account_balance_sync.balance}")
+    
+    def on_bar_update(self, candle):
+        return TradeSignal(action="CLOSE_ALL", lot_size=0, reason=f"{os.getpid()}|{candle.timestamp}")
\ No newline at end of file
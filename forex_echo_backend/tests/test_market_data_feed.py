@@ -0,0 +1,84 @@
+import pytest
+from app.models.trading_models import BAR_CLOSED, BAR_UPDATE
+from app.services.market_data_feed import FeedSubscription, MarketDataFeed
+from fakes import FakeMT5
+
+TIMEOUT = 5
+
+@pytest.fixture
+def terminal():
+    terminal = FakeMT5()
+    for minute in range(3):
+        terminal.add_bar("XAUUSD", FakeMT5.TIMEFRAME_M1, 60 * minute, 2000.0 + minute)
+        terminal.add_bar("EURUSD", FakeMT5.TIMEFRAME_M1, 60 * minute, 1.1)
+    return terminal
+
+@pytest.fixture
+def feed(terminal):
+    feed = MarketDataFeed(mt5_module=terminal)
+    yield feed
+    for subscriptions in list(feed.subscribers.values()):
+        for subscription in list(subscriptions):
+            subscription.close()
+
+def test_one_poller_per_symbol_and_timeframe(feed):
+    first = feed.subscribe("XAUUSD", "1M")
+    second = feed.subscribe("XAUUSD", "1M")
+    other = feed.subscribe("EURUSD", "1M")
+    
+    assert set(feed.pollers) == {("XAUUSD", "1M"), ("EURUSD", "1M")}
+    assert feed.get_stats()['subscribers'] == 3
+    
+    poller = feed.pollers[("XAUUSD", "1M")]
+    first.close()
+    second.close()
+    poller.join(TIMEOUT)
+    assert not poller.is_alive()
+    assert ("XAUUSD", "1M") not in feed.pollers
+    assert ("EURUSD", "1M") in feed.pollers
+    other.close()
+
+def test_closed_bars_fan_out_once_to_every_subscriber(feed, terminal):
+    # Registered without subscribe() so no poller thread races the polls below
+    subscriptions = [FeedSubscription(feed, "XAUUSD", "1M") for _ in range(3)]
+    feed.subscribers[("XAUUSD", "1M")] = list(subscriptions)
+    
+    # The first poll delivers the last closed bar, never the forming one
+    assert feed.poll_closed(("XAUUSD", "1M")).timestamp == 60
+    for subscription in subscriptions:
+        event = subscription.get(timeout=TIMEOUT)
+        assert event.kind == BAR_CLOSED
+        assert event.bar.timestamp == 60
+    
+    terminal.add_bar("XAUUSD", FakeMT5.TIMEFRAME_M1, 180, 2003.0)
+    polls = terminal.calls['copy_rates_from_pos']
+    assert feed.poll_closed(("XAUUSD", "1M")).timestamp == 120
+    assert feed.poll_closed(("XAUUSD", "1M")) is None  # Same bar again is not republished
+    assert terminal.calls['copy_rates_from_pos'] == polls + 2  # One fetch per poll, not per subscriber
+    
+    for subscription in subscriptions:
+        event = subscription.get(timeout=TIMEOUT)
+        assert (event.kind, event.bar.timestamp, event.bar.close) == (BAR_CLOSED, 120, 2002.0)
+        assert subscription.get(timeout=0.1) is None
+
+def test_late_subscriber_starts_from_last_closed_bar(feed):
+    feed.subscribe("XAUUSD", "1M").get(timeout=TIMEOUT)
+    
+    late = feed.subscribe("XAUUSD", "1M")
+    assert late.get(timeout=TIMEOUT).bar.timestamp == 60
+
+def test_intrabar_updates_only_reach_intrabar_subscribers(feed, terminal):
+    closed_only = feed.subscribe("XAUUSD", "1M")
+    intrabar = feed.subscribe("XAUUSD", "1M", intrabar=True)
+    closed_only.get(timeout=TIMEOUT)
+    intrabar.get(timeout=TIMEOUT)
+    
+    # Drain whatever the poller already published for the forming bar
+    while intrabar.get(timeout=0.2) is not None:
+        pass
+    terminal.bars[("XAUUSD", FakeMT5.TIMEFRAME_M1)][-1] = (120, 2002.0, 2010.0, 2001.0, 2009.0, 150, 0, 0)
+    feed.poll_forming(("XAUUSD", "1M"))  # The running poller may publish the change first
+    
+    event = intrabar.get(timeout=TIMEOUT)
+    assert (event.kind, event.bar.timestamp, event.bar.close) == (BAR_UPDATE, 120, 2009.0)
+    assert closed_only.get(timeout=0.1) is None
\ No newline at end of file
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from decimal import Decimal
+import pytest
+from app.core import sharded_trading_engine
+from app.core.sharded_trading_engine import ShardedTaskRunner, shard_for
+from app.models.trading_models import TradingTask
+from app.services.account_balance_sync import AccountBalanceSync
+from app.services.market_data_feed import MarketDataFeed
+from app.services.mt5_gateway import MT5Gateway
+from fakes import EchoStrategy, FakeConnectionState, FakeMT5
+
+TIMEOUT = 60  # Worker processes are spawned, so the first message can take a while
+
+class FakeEngine:
+    """The engine hooks the runner calls back into"""
+    
+    def __init__(self):
+        self.strategies_registry = {"echo": EchoStrategy}
+        self.signals = []
+        self.cleaned = []
+        self.signalled = threading.Event()
+    
+    def _fetch_warm_up_history(self, task):
+        return None
+    
+    def _get_current_equity(self):
+        return 2500.0
+    
+    def _dispatch_signal(self, task_id, task, candle, signal):
+        self.signals.append((task_id, candle, signal))
+        self.signalled.set()
+    
+    def _cleanup_task(self, task_id, task, strategy, subscription):
+        self.cleaned.append(task_id)
+
+def make_task(task_id: str, pair: str = "XAUUSD", timeframe: str = "1M", config: dict = None) -> TradingTask:
+    return TradingTask(task_id=task_id, session_id="test", pair=pair, timeframe=timeframe,
+                       strategy_name="echo", config=config or {})
+
+def wait_for(predicate, timeout: float = TIMEOUT) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+@pytest.fixture
+def terminal():
+    terminal = FakeMT5(balance=5000.0)
+    for minute in range(3):
+        terminal.add_bar("XAUUSD", FakeMT5.TIMEFRAME_M1, 60 * minute, 2000.0 + minute)
+    return terminal
+
+@pytest.fixture
+def runner(terminal, monkeypatch):
+    monkeypatch.setattr(sharded_trading_engine, "account_balance_sync",
+                        AccountBalanceSync(None, FakeConnectionState(terminal)))
+    runner = ShardedTaskRunner(FakeEngine(), shards=2, feed=MarketDataFeed(mt5_module=terminal))
+    yield runner
+    runner.shutdown()
+
+def test_strategies_run_in_worker_processes_with_parent_account(runner):
+    future = runner.submit(make_task("t1"))
+    
+    assert runner.engine.signalled.wait(TIMEOUT)
+    task_id, candle, signal = runner.engine.signals[0]
+    pid, timestamp, equity, balance = signal.reason.split("|")
+    assert task_id == "t1"
+    assert candle.timestamp == 60  # Last closed bar, not the forming one
+    assert int(pid) != os.getpid()
+    assert float(equity) == 2500.0
+    assert Decimal(balance) == Decimal("5000.0")
+    assert not future.done()
+
+def test_forming_bars_only_reach_intrabar_tasks(runner, terminal):
+    runner.submit(make_task("closed"))
+    runner.submit(make_task("intrabar", config={'intrabar_mode': True}))
+    assert wait_for(lambda: {task_id for task_id, _, _ in runner.engine.signals} == {"closed", "intrabar"})
+    
+    terminal.bars[("XAUUSD", FakeMT5.TIMEFRAME_M1)][-1] = (120, 2002.0, 2010.0, 2001.0, 2009.0, 150, 0, 0)
+    runner.feed.poll_forming(("XAUUSD", "1M"))
+    
+    def forming_signals():
+        return [(task_id, candle.timestamp) for task_id, candle, signal in runner.engine.signals
+                if signal.action == "CLOSE_ALL"]
+    assert wait_for(lambda: forming_signals())
+    time.sleep(0.5)  # Give a wrongly routed update time to arrive
+    assert set(forming_signals()) == {("intrabar", 120)}
+
+def test_stop_resolves_after_worker_confirms(runner):
+    future = runner.submit(make_task("t1"))
+    assert runner.engine.signalled.wait(TIMEOUT)
+    
+    runner.stop("t1")
+    future.result(timeout=TIMEOUT)
+    assert runner.engine.cleaned == ["t1"]
+    assert runner.get_stats()['feeds'] == 0
+
+def test_dead_worker_ends_its_tasks(runner):
+    future = runner.submit(make_task("t1"))
+    assert runner.engine.signalled.wait(TIMEOUT)
+    
+    shard = shard_for("XAUUSD", "1M", runner.shards)
+    runner.processes[shard].kill()
+    future.result(timeout=TIMEOUT)
+    assert runner.engine.cleaned == ["t1"]
+    
+    # Stopping or starting a task on the dead shard does not hang either
+    runner.stop("t1")
+    runner.submit(make_task("t2")).result(timeout=TIMEOUT)
+
+def test_detached_gateway_refuses_terminal_calls():
+    terminal = FakeMT5()
+    gateway = MT5Gateway(terminal)
+    gateway.detach()
+    
+    assert gateway.proxy.TIMEFRAME_H1 == FakeMT5.TIMEFRAME_H1
+    assert gateway.proxy.account_info() is None
+    assert gateway.proxy.last_error()[0] == -10003
+    assert "account_info" not in terminal.calls
+    gateway.shutdown()
\ No newline at end of file